@@ -0,0 +1,136 @@
+import os
+import tempfile
+import time
+from collections import namedtuple
+from multiprocessing import Pool
+import numpy as np
+import scipy.sparse
+from sklearn import svm
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+
+JobResult = namedtuple('JobResult', ['params', 'fold', 'score', 'fit_time', 'score_time'])
+JobResult.__doc__ = """The score of a model fit on one fold.
+
+Attributes:
+    params: A dictionary of the parameters of the model.
+    fold: An integer for the index of the fold.
+    score: A float for the accuracy on the fold's test data.
+    fit_time: A float for the seconds spent fitting the model.
+    score_time: A float for the seconds spent scoring the model.
+"""
+
+def evaluate_grid(data, target, param_grid, folds = 5, processes = None,
+    estimator = svm.SVC
+):
+    """Cross validates every combination of parameters in a process pool.
+
+    Every (parameters, fold) pair is a job. The data and target are written
+    once to memory-mapped files that every worker maps, rather than being
+    pickled and sent with each job.
+
+    Arguments:
+        data: A 2D array-like or scipy.sparse matrix of samples.
+        target: A 1D array-like of targets.
+        param_grid: A dictionary of parameter names to lists of values, or a
+            list of such dictionaries, as accepted by
+            sklearn.model_selection.ParameterGrid.
+        folds: An integer for the number of stratified folds, as used by
+            sklearn.model_selection.cross_val_score.
+        processes: An optional integer for the number of worker processes,
+            defaults to the number of CPUs.
+        estimator: A class of a sklearn estimator that's initialized with each
+            combination of parameters.
+
+    Yields:
+        A JobResult for each job in the order they finish.
+    """
+
+    if not scipy.sparse.issparse(data):
+        data = np.asarray(data)
+    target = np.asarray(target)
+    splits = list(StratifiedKFold(n_splits = folds).split(target, target))
+    jobs = [(params, fold, train_index, test_index)
+        for params in ParameterGrid(param_grid)
+        for fold, (train_index, test_index) in enumerate(splits)]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_filename = os.path.join(temp_dir, 'data')
+        target_filename = os.path.join(temp_dir, 'target')
+        _save_shared(data_filename, data)
+        _save_shared(target_filename, target)
+
+        with Pool(processes, _init_worker,
+            (data_filename, target_filename, estimator)
+        ) as pool:
+            yield from pool.imap_unordered(_run_job, jobs)
+
+def summarize(results):
+    """Groups job results by parameters.
+
+    Arguments:
+        results: An iterable of JobResult.
+
+    Returns:
+        A list of (parameters, numpy.array of scores ordered by fold) pairs.
+    """
+
+    scores = dict()
+    for result in results:
+        key = tuple(sorted(result.params.items()))
+        scores.setdefault(key, dict())[result.fold] = result.score
+
+    return [(dict(key), np.array([fold_scores[fold] for fold in sorted(fold_scores)]))
+        for key, fold_scores in scores.items()]
+
+# Helper Functions
+_worker_state = dict()
+
+def _init_worker(data_filename, target_filename, estimator):
+    """Maps the shared data and target into a worker process."""
+
+    _worker_state['data'] = _load_shared(data_filename)
+    _worker_state['target'] = _load_shared(target_filename)
+    _worker_state['estimator'] = estimator
+
+def _run_job(job):
+    """Fits and scores a model on one fold in a worker process."""
+
+    params, fold, train_index, test_index = job
+    data = _worker_state['data']
+    target = _worker_state['target']
+    model = _worker_state['estimator'](**params)
+
+    start = time.perf_counter()
+    model.fit(data[train_index], target[train_index])
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    score = model.score(data[test_index], target[test_index])
+    score_time = time.perf_counter() - start
+
+    return JobResult(params, fold, score, fit_time, score_time)
+
+def _save_shared(filename, array):
+    """Saves a numpy.array, or the arrays of a scipy.sparse.csr_matrix, to be
+    memory-mapped by _load_shared."""
+
+    if not scipy.sparse.issparse(array):
+        np.save(f'{filename}.npy', array)
+        return
+
+    array = scipy.sparse.csr_matrix(array)
+    for part in ('data', 'indices', 'indptr'):
+        np.save(f'{filename}.{part}.npy', getattr(array, part))
+    np.save(f'{filename}.shape.npy', np.array(array.shape))
+
+def _load_shared(filename):
+    """Memory-maps an array saved by _save_shared."""
+
+    if os.path.exists(f'{filename}.npy'):
+        return np.load(f'{filename}.npy', mmap_mode = 'r')
+
+    data, indices, indptr = (np.load(f'{filename}.{part}.npy', mmap_mode = 'r')
+        for part in ('data', 'indices', 'indptr'))
+    shape = tuple(np.load(f'{filename}.shape.npy'))
+    return scipy.sparse.csr_matrix((data, indices, indptr), shape = shape,
+        copy = False)
@@ -0,0 +1,315 @@
+import os
+import pickle
+import numpy as np
+import scipy.sparse
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+from nbastats.aggregates import ShotAggregates
+from nbastats.cache import ResponseCache
+from nbastats.game import OutcomeIndex, get_game_outcomes
+from nbastats.http import Client, set_default_client
+from nbastats.options import Season, SeasonType
+from nbastats.store import ShotStore
+from .svc_model import GRID_LENGTH, GRID_WIDTH
+
+# Logistic loss so win probabilities are available, named 'log' before
+# scikit-learn 1.1
+LOG_LOSS = 'log_loss' if 'log_loss' in SGDClassifier.loss_functions else 'log'
+
+class OnlineOutcomeModel(object):
+    """A game outcome model trained incrementally as games are played.
+
+    Samples are the same as a TeamPreprocessor's or a TeamView's: a team's
+    features in a game followed by its opponent's, targeted on whether the
+    team won. Every game gives a sample from each team's side. Only games that
+    haven't been trained on are used by update, one epoch of stochastic
+    gradient descent at a time, so a nightly update costs as much as the games
+    played that night rather than a refit over the season.
+
+    Upcoming games have no shots yet, so each team is represented by the
+    running mean of its features over the games trained on. Since the model is
+    linear, that's the average decision over the team's games.
+
+    The features are scaled as in the first update only. The regularization
+    keeps the weights small enough that the probabilities don't saturate to 0
+    or 1 for both orders of a matchup, which would average out to 0.5.
+
+    The classifier, the feature scaler, the running means and the ids of the
+    trained games are pickled together to a single file after every update.
+
+    Attributes:
+        filename: A string for the path of the pickled state.
+        decay: An optional float in (0, 1] that the running means of past games
+            are weighted by for every new game, None for plain means.
+        game_ids: A set of the ids of the games trained on.
+    """
+
+    def __init__(self, filename, decay = None, alpha = 0.01, random_state = 0):
+        """Initializes an OnlineOutcomeModel, loading its state if it exists.
+
+        Arguments:
+            filename: A string for the path of the pickled state.
+            decay: An optional float in (0, 1] that the running means of past
+                games are weighted by for every new game, e.g. 0.9 so recent
+                form counts more. Plain means are kept if it's None.
+            alpha: A float for the regularization of a new classifier.
+            random_state: An optional integer seed of a new classifier.
+        """
+
+        if decay is not None and not 0 < decay <= 1:
+            raise ValueError("decay must be in (0, 1]")
+
+        self.filename = filename
+        self.decay = decay
+        self.game_ids = set()
+
+        self._classifier = SGDClassifier(loss = LOG_LOSS, alpha = alpha,
+            random_state = random_state)
+        self._scaler = StandardScaler(with_mean = False)
+        self._team_ids = dict()
+        self._sums = None
+        self._weights = None
+
+        if os.path.exists(filename):
+            with open(filename, 'rb') as in_f:
+                state = pickle.load(in_f)
+            self._classifier = state['classifier']
+            self._scaler = state['scaler']
+            self._team_ids = state['team_ids']
+            self._sums = state['sums']
+            self._weights = state['weights']
+            self.game_ids = state['game_ids']
+
+    @property
+    def features_count(self):
+        """The number of features of a team in a game, None until trained."""
+
+        return None if self._sums is None else self._sums.shape[1]
+
+    def update(self, keys, features, winners, epochs = 1):
+        """Trains on the games that haven't been trained on and saves the state.
+
+        Games without a known winner are left for a later update.
+
+        Arguments:
+            keys: A pandas.MultiIndex (or list of pairs) of the (GAME_ID,
+                TEAM_ID) of each row of features, e.g. from
+                nbastats.aggregates.ShotAggregates.grid_features or the
+                featurizer of a LeaguePreprocessor.
+            features: A 2D numpy.array (or scipy.sparse.csr_matrix) with the
+                features of each key as a row.
+            winners: A dictionary of game ids to the id of the winning team,
+                e.g. from nbastats.game.OutcomeIndex.winners.
+            epochs: An integer for the passes over the new games, e.g. more
+                than 1 for the first update over a whole season.
+
+        Raises:
+            ValueError: If the features don't have as many columns as the
+                features trained on before.
+
+        Returns:
+            A list of the ids of the games trained on, in ascending order.
+        """
+
+        if self.features_count is not None and features.shape[1] != self.features_count:
+            raise ValueError(f"features have {features.shape[1]} columns, the "
+                f"model was trained on {self.features_count}")
+
+        game_rows = dict()
+        for row, (game_id, team_id) in enumerate(keys):
+            game_rows.setdefault(int(game_id), []).append((int(team_id), row))
+        game_ids = sorted(game_id for game_id in game_rows
+            if game_id not in self.game_ids and game_id in winners)
+        if not game_ids:
+            return []
+
+        # A team without shots in a game has a row of zeros, as in a TeamView
+        zero_row = features.shape[0]
+        if scipy.sparse.issparse(features):
+            features = scipy.sparse.vstack((features,
+                scipy.sparse.csr_matrix((1, features.shape[1]))), format = 'csr')
+        else:
+            features = np.vstack((features, np.zeros((1, features.shape[1]))))
+
+        rows = list()
+        opponent_rows = list()
+        target = list()
+        for game_id in game_ids:
+            teams = game_rows[game_id]
+            for team_id, row in teams:
+                others = [other_row for other_id, other_row in teams
+                    if other_id != team_id]
+                rows.append(row)
+                opponent_rows.append(others[0] if others else zero_row)
+                target.append(winners[game_id] == team_id)
+        data = _samples(features[rows], features[opponent_rows])
+        target = np.array(target, dtype = bool)
+
+        # The scale is frozen after the first update, rescaling the features
+        # later would shift them under the weights already learned
+        if not hasattr(self._scaler, 'scale_'):
+            self._scaler.fit(data)
+        scaled = self._scaler.transform(data)
+        for _ in range(max(epochs, 1)):
+            self._classifier.partial_fit(scaled, target, classes = [False, True])
+
+        self._add_means(features, [(team_id, row) for game_id in game_ids
+            for team_id, row in game_rows[game_id]])
+        self.game_ids.update(game_ids)
+        self.save()
+        return game_ids
+
+    def predict_proba(self, matchups):
+        """Returns the probability that the first team of each matchup wins.
+
+        Both orders of every matchup are scored in a single batch and
+        averaged, so the probabilities of (a, b) and (b, a) add up to 1.
+
+        Arguments:
+            matchups: A list of (team id, opponent team id) pairs, e.g. the
+                games scheduled for tonight.
+
+        Raises:
+            ValueError: If the model hasn't been trained yet.
+
+        Returns:
+            A 1D numpy.array of probabilities.
+        """
+
+        if self._sums is None:
+            raise ValueError("the model hasn't been trained yet")
+        if not len(matchups):
+            return np.empty(0)
+
+        team_ids, opponent_ids = zip(*matchups)
+        teams = self._means(team_ids)
+        opponents = self._means(opponent_ids)
+        data = np.vstack((np.hstack((teams, opponents)),
+            np.hstack((opponents, teams))))
+
+        wins = list(self._classifier.classes_).index(True)
+        probabilities = self._classifier.predict_proba(
+            self._scaler.transform(data))[:, wins]
+        return (probabilities[:len(matchups)] + 1 - probabilities[len(matchups):]) / 2
+
+    def predict(self, matchups):
+        """Returns whether the first team of each matchup is predicted to win,
+        as a 1D numpy.array of booleans."""
+
+        return self.predict_proba(matchups) > 0.5
+
+    def save(self):
+        """Writes the state to its file."""
+
+        temp_filename = f'{self.filename}.tmp'
+        with open(temp_filename, 'wb') as out:
+            pickle.dump({
+                'classifier': self._classifier,
+                'scaler': self._scaler,
+                'team_ids': self._team_ids,
+                'sums': self._sums,
+                'weights': self._weights,
+                'game_ids': self.game_ids
+            }, out)
+        os.replace(temp_filename, self.filename)
+
+    def _add_means(self, features, team_rows):
+        """Adds the rows of features of each (team id, row) in game order to
+        the running means of the teams."""
+
+        if self._sums is None:
+            self._sums = np.zeros((0, features.shape[1]))
+            self._weights = np.zeros(0)
+
+        new_teams = sorted(set(team_id for team_id, _ in team_rows) - set(self._team_ids))
+        for team_id in new_teams:
+            self._team_ids[team_id] = len(self._team_ids)
+        if new_teams:
+            self._sums = np.vstack((self._sums,
+                np.zeros((len(new_teams), self._sums.shape[1]))))
+            self._weights = np.concatenate((self._weights, np.zeros(len(new_teams))))
+
+        for team_id, row in team_rows:
+            index = self._team_ids[team_id]
+            values = features[row]
+            if scipy.sparse.issparse(values):
+                values = values.toarray().ravel()
+            if self.decay is not None:
+                self._sums[index] *= self.decay
+                self._weights[index] *= self.decay
+            self._sums[index] += values
+            self._weights[index] += 1
+
+    def _means(self, team_ids):
+        """Returns the running mean features of teams, the mean of every team
+        for a team that hasn't played yet."""
+
+        trained = self._weights > 0
+        league_mean = (self._sums[trained] / self._weights[trained, None]).mean(axis = 0)
+        means = np.empty((len(team_ids), self._sums.shape[1]))
+        for i, team_id in enumerate(team_ids):
+            index = self._team_ids.get(team_id)
+            if index is None or not self._weights[index]:
+                means[i] = league_mean
+            else:
+                means[i] = self._sums[index] / self._weights[index]
+        return means
+
+def main(season = None, season_type = SeasonType.REGULAR_SEASON,
+    grid_width = GRID_WIDTH, grid_length = GRID_LENGTH
+):
+    """Trains the model on the games stored since the last run."""
+
+    if season is None:
+        season = Season.current()
+
+    # Game outcomes are only downloaded the first time
+    set_default_client(Client(cache = ResponseCache('scraped_data/responses.sqlite')))
+
+    store = ShotStore('scraped_data/shots')
+    grid = (grid_width, grid_length)
+    with ShotAggregates('scraped_data/aggregates.sqlite', store, [grid]) as aggregates:
+        aggregates.update([season], [season_type])
+        keys, features = aggregates.grid_features(grid, [season], [season_type])
+
+    model = OnlineOutcomeModel('scraped_data/online_model.pickle')
+    new_game_ids = sorted(set(int(game_id) for game_id, _ in keys) - model.game_ids)
+    # Games without an outcome are trained on by a later run
+    outcome_errors = dict()
+    outcomes = get_game_outcomes(new_game_ids,
+        index = OutcomeIndex('scraped_data/outcomes.json'), errors = outcome_errors)
+    if outcome_errors:
+        print(f"Warning: failed to get the outcomes of {len(outcome_errors)} "
+            f"games {sorted(outcome_errors)}")
+    winners = {game_id: outcome['winner'] for game_id, outcome in outcomes.items()}
+
+    game_ids = model.update(keys, features, winners,
+        epochs = 5 if not model.game_ids else 1)
+    print(f"Trained on {len(game_ids)} new games, {len(model.game_ids)} in total")
+
+    if model.features_count is None:
+        return
+
+    # Every matchup getting the same probability means the model learned nothing
+    team_ids = sorted(set(int(team_id) for _, team_id in keys))
+    probabilities = model.predict_proba([(team_id, opponent_id)
+        for team_id in team_ids for opponent_id in team_ids
+        if team_id != opponent_id])
+    if not len(probabilities):
+        return
+    if np.ptp(probabilities) < 1e-6:
+        print(f"Warning: every matchup is predicted at {probabilities[0]:.3f}")
+    else:
+        print(f"Win probabilities range from {probabilities.min():.3f} to "
+            f"{probabilities.max():.3f}")
+
+# Helper Functions
+def _samples(team_features, opponent_features):
+    """Concatenates the features of teams and their opponents as samples."""
+
+    if scipy.sparse.issparse(team_features):
+        return scipy.sparse.hstack((team_features, opponent_features), format = 'csr')
+    return np.hstack((team_features, opponent_features))
+
+if __name__ == '__main__':
+    main()
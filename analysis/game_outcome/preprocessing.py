@@ -1,29 +1,48 @@
 import json
-from functools import reduce
+import os
 from math import ceil
 import numpy as np
 import pandas as pd
+import scipy.sparse
 from sklearn.model_selection import train_test_split, KFold
-from nbastats.game import get_game_info
+from nbastats.court import CourtGrid
+from nbastats.game import OutcomeIndex, get_game_outcomes
+from nbastats.store import ShotStore
+
+# Columns of the shots used by the game outcome models
+SHOT_COLUMNS = ['GAME_ID', 'TEAM_ID', 'LOC_X', 'LOC_Y', 'SHOT_TYPE']
 
 class DataPreprocessor(object):
     """Generic data preprocessor loads a CSV file into a pandas.DataFrame.
 
     Attributes:
         raw_data: A pandas.DataFrame of the data from the CSV file.
-        data: A list of data used for a model.
-        target: A list of targets corresponding to the data for a model.
+        data: The data used for a model. A single contiguous 2D numpy.array (or
+            scipy.sparse.csr_matrix) if the data preprocessor returns arrays.
+        target: The targets corresponding to the data for a model. A 1D
+            numpy.array if the target preprocessor returns scalars.
+        store_columns: An optional list of the columns read when loading from
+            a nbastats.store.ShotStore, every column is read if it's None.
     """
 
-    def __init__(self, data_filename, data_preprocessor, target_preprocessor, **kwargs):
+    store_columns = None
+
+    def __init__(self, data_filename, data_preprocessor, target_preprocessor,
+        dtype = None, sparse = False, **kwargs
+    ):
         """Initializes a DataProcessor object.
 
         Arguments:
-            data_filename: A string for the CSV file to be loaded.
+            data_filename: A string for the CSV file or the
+                nbastats.store.ShotStore directory to be loaded, or a
+                pandas.DataFrame that's already loaded.
             data_preprocessor: A function that takes some intermediate data
                 and outputs some final data.
             target_preprocessor: A function that takes some intermediate target
                 and outputs some final target.
+            dtype: An optional numpy dtype of the data, e.g. numpy.float32.
+            sparse: A boolean for whether to store the data as a
+                scipy.sparse.csr_matrix, as grid counts are mostly zero.
             kwargs: A dictionary of keys and values for the overloaded 
                 self._set_data function.
         """
@@ -31,21 +50,27 @@ class DataPreprocessor(object):
         self.raw_data = None
         self.data = None
         self.target = None
+        self.dtype = dtype
+        self.sparse = sparse
 
         self._load_data(data_filename)
         self._set_data(data_preprocessor, target_preprocessor, **kwargs)
 
     def _load_data(self, data_filename):
-        """Loads a CSV file with the first column as the index into raw_data."""
+        """Loads a CSV file with the first column as the index into raw_data.
 
-        self.raw_data = pd.read_csv(data_filename, index_col = 0) 
+        A ShotStore directory is read with store_columns and a pandas.DataFrame
+        that's already loaded is used as is.
+        """
+
+        self.raw_data = _read_data(data_filename, self.store_columns)
 
     def _set_data(self, data_preprocessor, target_preprocessor, **kwargs):
         """Generates intermediate and final data/target."""
 
         raw_data, raw_target = self._prep_data(**kwargs)
-        self.data = data_preprocessor(raw_data)
-        self.target = target_preprocessor(raw_target)
+        self.data = _to_matrix(data_preprocessor(raw_data), self.dtype, self.sparse)
+        self.target = _to_vector(target_preprocessor(raw_target))
         
     def _prep_data(self):
         """Generates intermediate data/targte for user supplied preprocessors.
@@ -68,20 +93,38 @@ class DataPreprocessor(object):
         return train_test_split(self.data, self.target, test_size = test_size,
             random_state = random_state)
 
-    def kfold(self, splits, shuffle = True, random_state = None):
-        """Returns train/test data defined by sklearn.model_selection.KFold."""
+    def kfold(self, splits, shuffle = True, random_state = None, indices = True):
+        """Returns train/test folds defined by sklearn.model_selection.KFold.
+
+        (train indices, test indices) pairs are returned so no fold data is
+        copied, e.g. for estimators that are fit on self.data[train_index] one
+        fold at a time. If indices is False, (x_train, x_test, y_train, y_test)
+        copies of each fold are returned instead.
+        """
+
+        kf = KFold(n_splits = splits, shuffle = shuffle,
+            random_state = random_state if shuffle else None) 
+        for train_index, test_index in kf.split(self.target):
+            if indices:
+                yield train_index, test_index
+                continue
 
-        kf = KFold(n_splits = splits, shuffle = shuffle, random_state = random_state) 
-        for train_index, test_index in kf.split(self.data):
             x_train, x_test = self.data[train_index], self.data[test_index]
             y_train, y_test = self.target[train_index], self.target[test_index]
             yield x_train, x_test, y_train, y_test
 
 class TeamPreprocessor(DataPreprocessor):
+    store_columns = SHOT_COLUMNS
+
     def __init__(self, shot_data_filename, team_id, data_preprocessor, 
-        target_preprocessor, outcome_filename = None
+        target_preprocessor, outcome_filename = None, dtype = None, sparse = False
     ):
         """Initializes a TeamPreprocessor object.
+
+        shot_data_filename
+            A string for the CSV file or the nbastats.store.ShotStore directory
+            of shots, a pandas.DataFrame of shots or a ShotGroups to share the
+            grouping of shots between teams.
         
         data_preprocessor
             Arguments:
@@ -95,56 +138,318 @@ class TeamPreprocessor(DataPreprocessor):
                 A list of boolean values indicating if team_id's team won the
                     game.
             Returns:
-                A list of processed targets. 
+                A list of processed targets.
+
+        outcome_filename
+            An optional string for a JSON file of game ids to whether team_id's
+            team won, as written by export_outcomes. It isn't the file of a
+            nbastats.game.OutcomeIndex, which LeaguePreprocessor uses instead.
+            Outcomes are fetched from NBA stats if it's None.
         """
 
         super(TeamPreprocessor, self).__init__(
             shot_data_filename, 
             data_preprocessor,
             target_preprocessor,
+            dtype = dtype,
+            sparse = sparse,
             team_id = team_id,
             outcome_filename = outcome_filename
         )
 
+    def _load_data(self, shot_data_filename):
+        """Loads shots and groups them by game and team."""
+
+        if isinstance(shot_data_filename, ShotGroups):
+            self.shot_groups = shot_data_filename
+            self.raw_data = self.shot_groups.shots
+        else:
+            super(TeamPreprocessor, self)._load_data(shot_data_filename)
+            self.shot_groups = ShotGroups(self.raw_data)
+
     def _prep_data(self, *, team_id, outcome_filename):
         """Get's shot information on a per game basis and the game's outcome."""
 
-        # Reindex DataFrame
-        self.raw_data = self.raw_data.set_index('GAME_ID')
-
-        # Get game ids of the team
-        team_games = self.raw_data[self.raw_data.TEAM_ID == team_id]
-        self._game_ids = list(set(team_games.index))
+        # Get game ids of the team in ascending order
+        self._game_ids = self.shot_groups.games(team_id)
 
-        # Get target
+        # Get target, leaving out games whose outcome couldn't be fetched
         self._get_outcomes(outcome_filename, team_id)
+        self._game_ids = [game_id for game_id in self._game_ids
+            if game_id in self._outcomes]
         target = [self._outcomes[game_id] for game_id in self._game_ids]
 
         # Get data
-        data = [_split_team_shots(self.raw_data.loc[game_id], team_id)
+        data = [self.shot_groups.split(game_id, team_id)
             for game_id in self._game_ids]
 
         return data, target
 
     def _get_outcomes(self, outcome_filename, team_id):
-        """Loads cached game outcomes or gets outcomes from NBA stats."""
+        """Loads cached game outcomes or gets outcomes from NBA stats.
+
+        outcome_filename is a file written by export_outcomes for team_id,
+        i.e. game ids to whether the team won, not the file of a
+        nbastats.game.OutcomeIndex. LeaguePreprocessor can import such files
+        into an OutcomeIndex.
+        """
 
+        self.outcome_errors = dict()
         if outcome_filename is not None:
-            with open(outcome_filename, 'r') as in_f:
-                self._outcomes = json.load(in_f)
-                # Changing keys back to int (json format doesn't allow keys to be ints)
-                for key in list(self._outcomes.keys()):
-                    self._outcomes[int(key)] = self._outcomes.pop(key)
+            self._outcomes = _load_team_outcomes(outcome_filename)
         else:
-            self._outcomes = {game_id: get_game_info(game_id)['winner']['TEAM_ID'] == team_id 
-                for game_id in self._game_ids}
+            outcomes = get_game_outcomes(self._game_ids,
+                errors = self.outcome_errors)
+            _report_outcome_errors(self.outcome_errors)
+            self._outcomes = {game_id: outcome['winner'] == team_id 
+                for game_id, outcome in outcomes.items()}
 
     def export_outcomes(self, filename):
-        """Caches game outcomes to the given file."""
+        """Caches game outcomes to the given file as game ids to whether the
+        team won."""
 
         with open(filename, 'w') as out:
             json.dump(self._outcomes, out, indent = 4)
 
+class ShotGroups(object):
+    """Shots partitioned by game and team in a single pass.
+
+    A ShotGroups can be shared between the TeamPreprocessor of every team so
+    shots are only grouped once for the whole league.
+
+    Attributes:
+        shots: A pandas.DataFrame of shots with GAME_ID and TEAM_ID as columns
+            or index levels.
+    """
+
+    def __init__(self, shots):
+        """Initializes a ShotGroups object.
+
+        Arguments:
+            shots: A pandas.DataFrame of shots with GAME_ID and TEAM_ID as
+                columns or index levels.
+        """
+
+        self.shots = shots
+
+        game_ids = _get_column(shots, 'GAME_ID')
+        team_ids = _get_column(shots, 'TEAM_ID')
+        indices = pd.Series(np.arange(len(shots))).groupby(
+            [game_ids, team_ids], sort = True).indices
+
+        # Keys as python scalars rather than numpy scalars
+        self._rows = {(_to_scalar(game_id), _to_scalar(team_id)): rows
+            for (game_id, team_id), rows in indices.items()}
+        self._game_teams = dict()
+        self._team_games = dict()
+        for game_id, team_id in self._rows:
+            self._game_teams.setdefault(game_id, []).append(team_id)
+            self._team_games.setdefault(team_id, []).append(game_id)
+        for game_ids in self._team_games.values():
+            game_ids.sort()
+
+    def games(self, team_id):
+        """Returns a sorted list of the ids of the games a team has shots in."""
+
+        return list(self._team_games.get(team_id, []))
+
+    def teams(self):
+        """Returns a sorted list of the ids of every team."""
+
+        return sorted(self._team_games)
+
+    def rows(self, game_id, team_id):
+        """Returns a numpy.array of the positions of a team's shots in a game."""
+
+        return self._rows.get((game_id, team_id), np.empty(0, dtype = np.intp))
+
+    def opponent_rows(self, game_id, team_id):
+        """Returns a numpy.array of the positions of the shots in a game that
+        aren't by the given team."""
+
+        rows = [self._rows[(game_id, other_id)]
+            for other_id in self._game_teams.get(game_id, []) if other_id != team_id]
+        if not rows:
+            return np.empty(0, dtype = np.intp)
+        return np.sort(np.concatenate(rows))
+
+    def split(self, game_id, team_id):
+        """Splits the shots of a game by team.
+
+        Returns:
+            A pair of pandas.DataFrame such that it's (team_id's shots,
+            opponent shots).
+        """
+
+        return (self.shots.iloc[self.rows(game_id, team_id)],
+            self.shots.iloc[self.opponent_rows(game_id, team_id)])
+
+class LeaguePreprocessor(object):
+    """Featurizes the games of every team in a league exactly once.
+
+    Every (game, team) feature vector is stored as a row of one shared matrix
+    that each team's TeamView indexes into, and the winner of every game is
+    known so targets are derived for every team at the same time.
+
+    Attributes:
+        raw_data: A pandas.DataFrame of the shots from the CSV file.
+        keys: A pandas.MultiIndex of the (GAME_ID, TEAM_ID) of each feature row.
+        features: A 2D numpy.array (or scipy.sparse.csr_matrix) with a row of
+            features per key followed by a row of zeros for a team without any
+            shots in a game.
+        winners: A dictionary of game ids to the id of the winning team.
+        outcome_errors: A dictionary of the ids of the games whose outcome
+            couldn't be fetched to the exception of each. They're left out of
+            every TeamView.
+    """
+
+    def __init__(self, shot_data_filename, featurizer, outcome_filename = None,
+        team_outcome_filenames = None
+    ):
+        """Initializes a LeaguePreprocessor object.
+
+        Arguments:
+            shot_data_filename: A string for the CSV file or the
+                nbastats.store.ShotStore directory of shots, or a
+                pandas.DataFrame of shots that's already loaded.
+            featurizer: A function that takes a pandas.DataFrame of shots and
+                returns a pair of a pandas.MultiIndex of (GAME_ID, TEAM_ID) keys
+                and a 2D numpy.array of features with a row per key, such as
+                the function of shots_to_grid_features_wrapper.
+            outcome_filename: An optional string for the JSON file of a
+                nbastats.game.OutcomeIndex shared between runs. Only games
+                missing from it are fetched.
+            team_outcome_filenames: An optional dictionary of team ids to the
+                JSON files written by TeamPreprocessor.export_outcomes for
+                that team. Their games are imported into the outcome index
+                rather than fetched.
+        """
+
+        self.raw_data = _read_data(shot_data_filename, SHOT_COLUMNS)
+
+        self.keys, features = featurizer(self.raw_data)
+        if scipy.sparse.issparse(features):
+            self.features = scipy.sparse.vstack((features,
+                scipy.sparse.csr_matrix((1, features.shape[1]), dtype = features.dtype)),
+                format = 'csr')
+        else:
+            self.features = np.vstack((features,
+                np.zeros((1, features.shape[1]), dtype = features.dtype)))
+
+        self._rows = dict()
+        self._game_teams = dict()
+        self._team_games = dict()
+        for row, (game_id, team_id) in enumerate(self.keys):
+            game_id, team_id = _to_scalar(game_id), _to_scalar(team_id)
+            self._rows[(game_id, team_id)] = row
+            self._game_teams.setdefault(game_id, []).append(team_id)
+            self._team_games.setdefault(team_id, []).append(game_id)
+
+        self._get_winners(outcome_filename, team_outcome_filenames or dict())
+
+    def teams(self):
+        """Returns a sorted list of the ids of every team."""
+
+        return sorted(self._team_games)
+
+    def team_view(self, team_id):
+        """Returns a TeamView of a team's games with a known winner in
+        ascending order.
+
+        Raises:
+            ValueError: If a game of the team has shots of more than one other
+                team, so it has no single opponent.
+        """
+
+        game_ids = sorted(game_id for game_id in self._team_games.get(team_id, [])
+            if game_id in self.winners)
+        zero_row = self.features.shape[0] - 1
+
+        rows = np.empty(len(game_ids), dtype = np.intp)
+        opponent_rows = np.full(len(game_ids), zero_row, dtype = np.intp)
+        for i, game_id in enumerate(game_ids):
+            rows[i] = self._rows[(game_id, team_id)]
+            opponent_ids = [other_id for other_id in self._game_teams[game_id]
+                if other_id != team_id]
+            if len(opponent_ids) > 1:
+                raise ValueError(f"Game {game_id} has shots of teams "
+                    f"{sorted(self._game_teams[game_id])}, not a single opponent "
+                    f"of {team_id}")
+            if opponent_ids:
+                opponent_rows[i] = self._rows[(game_id, opponent_ids[0])]
+
+        target = np.array([self.winners[game_id] == team_id
+            for game_id in game_ids], dtype = bool)
+        return TeamView(self.features, team_id, game_ids, rows, opponent_rows,
+            target)
+
+    def _get_winners(self, outcome_filename, team_outcome_filenames):
+        """Gets game winners from the outcome index, fetching missing games
+        from NBA stats."""
+
+        index = OutcomeIndex(outcome_filename)
+        imported = 0
+        for team_id, filename in team_outcome_filenames.items():
+            for game_id, won in _load_team_outcomes(filename).items():
+                opponent_ids = [other_id for other_id in
+                    self._game_teams.get(game_id, []) if other_id != team_id]
+                if game_id in index or (not won and not opponent_ids):
+                    continue
+                index.add_winner(game_id, team_id if won else opponent_ids[0])
+                imported += 1
+        if imported:
+            index.save()
+
+        self.outcome_errors = dict()
+        outcomes = get_game_outcomes(sorted(self._game_teams), index = index,
+            errors = self.outcome_errors)
+        _report_outcome_errors(self.outcome_errors)
+        self.winners = {game_id: outcome['winner']
+            for game_id, outcome in outcomes.items()}
+
+class TeamView(object):
+    """A team's games as rows of a LeaguePreprocessor's feature matrix.
+
+    A sample is the team's features followed by its opponent's features. The
+    samples are only built when they're taken, e.g. one fold at a time.
+
+    Attributes:
+        team_id: An integer id of the team.
+        game_ids: A list of the ids of the team's games in ascending order.
+        rows: A numpy.array of the feature rows of the team in each game.
+        opponent_rows: A numpy.array of the feature rows of the opponent in
+            each game.
+        target: A numpy.array of booleans indicating if the team won each game.
+    """
+
+    def __init__(self, features, team_id, game_ids, rows, opponent_rows, target):
+        self._features = features
+        self.team_id = team_id
+        self.game_ids = game_ids
+        self.rows = rows
+        self.opponent_rows = opponent_rows
+        self.target = target
+
+    def __len__(self):
+        return len(self.game_ids)
+
+    @property
+    def data(self):
+        """A 2D numpy.array (or scipy.sparse.csr_matrix) with a sample per game."""
+
+        return self.take(slice(None))
+
+    def take(self, index):
+        """Returns a 2D numpy.array (or scipy.sparse.csr_matrix if the
+        features are sparse) of the samples of the games at index."""
+
+        team_features = self._features[self.rows[index]]
+        opponent_features = self._features[self.opponent_rows[index]]
+        if scipy.sparse.issparse(team_features):
+            return scipy.sparse.hstack((team_features, opponent_features),
+                format = 'csr')
+        return np.hstack((team_features, opponent_features))
+
 # Preprocessing functions
 def identity(*args):
     """Generic identity function.
@@ -164,25 +469,11 @@ def identity(*args):
 def shots_to_matrix_wrapper(width, length, width_shift = 0, length_shift = 0):
     """A wrapper that converts shot coordinates to a matrix."""
 
-    def shots_to_matrix(shots):
-        def shift_x(x_coord):
-            shifted = x_coord + width_shift
-            return shifted, shifted >= 0 and shifted < width
-
-        def shift_y(y_coord):
-            shifted = y_coord + length_shift
-            return shifted, shifted >= 0 and shifted < length
-
-        shot_matrix = np.full((length, width), 0)
-        for _, shot in shots.iterrows():
-            y, is_y_valid = shift_y(shot.LOC_Y)
-            x, is_x_valid = shift_x(shot.LOC_X)
-
-            if not is_y_valid or not is_x_valid:
-                continue
+    grid = CourtGrid(width, length, width_shift, length_shift)
 
-            shot_matrix[y, x] += 1 
-        return shot_matrix
+    def shots_to_matrix(shots):
+        _, cells = grid.cells(shots.LOC_X, shots.LOC_Y)
+        return np.bincount(cells, minlength = length * width).reshape(length, width)
 
     return shots_to_matrix
 
@@ -210,33 +501,76 @@ def sum_matrix_by_grids_wrapper(w, l = None):
         corrected_mat[length_pad: length_pad + length, 
             width_pad: width_pad + width] = shots
 
-        # Split matrix into grids of l x w
-        grids = np.split(corrected_mat, length_chunks, axis = 0)
-        grids = [np.split(h_slice, width_chunks, axis = 1) for h_slice in grids]
-
-        # Compute sum for each grid
-        grids_sum = [[np.sum(chunk) for chunk in chunks] for chunks in grids]
-        return np.array(grids_sum)
+        # Compute sum for each grid of l x w
+        return corrected_mat.reshape(length_chunks, l, width_chunks, w).sum(axis = (1, 3))
 
     return sum_matrix_by_grids 
 
 def shots_to_features_wrapper(court_width, court_length, court_width_shift = 0, 
-    court_length_shift = 0, grid_width = 1, grid_length = 1
+    court_length_shift = 0, grid_width = 1, grid_length = 1, sparse = False
 ):
-    """A wrapper that converts shot coordinates to a list of features."""
+    """A wrapper that converts shot coordinates to a list of features.
 
-    shots_to_matrix = shots_to_matrix_wrapper(court_width, court_length, 
-        court_width_shift, court_length_shift)
-    sum_matrix_by_grids = sum_matrix_by_grids_wrapper(grid_width, grid_length)
+    Shots are binned straight into the grids, which gives the same features as
+    summing the matrix of shots_to_matrix_wrapper by grids. If sparse is True,
+    the features are a 1 x grids scipy.sparse.csr_matrix so fine grids only
+    take memory for the grids with shots.
+    """
+
+    grid = CourtGrid(court_width, court_length, court_width_shift,
+        court_length_shift, grid_width, grid_length)
 
     def shots_to_features(shots):
-        shot_mat = shots_to_matrix(shots)
-        shot_mat = sum_matrix_by_grids(shot_mat)
-        dimension = reduce(lambda x, y: x * y, shot_mat.shape)
-        return shot_mat.reshape(dimension)
+        _, cells = grid.cells(shots.LOC_X, shots.LOC_Y)
+        if sparse:
+            return _sparse_counts(np.zeros(len(cells), dtype = np.intp), cells,
+                (1, grid.size))
+        return np.bincount(cells, minlength = grid.size)
 
     return shots_to_features
 
+def shots_to_grid_features_wrapper(court_width, court_length, court_width_shift = 0,
+    court_length_shift = 0, grid_width = 1, grid_length = 1, sparse = False
+):
+    """A wrapper that converts the shots of every game and team to features.
+
+    All shots are binned in one pass over (game, team, grid) so it's far faster
+    than calling the function of shots_to_features_wrapper on every team's shots
+    in every game, and the features are identical. If sparse is True, the
+    features are a scipy.sparse.csr_matrix.
+    """
+
+    grid = CourtGrid(court_width, court_length, court_width_shift,
+        court_length_shift, grid_width, grid_length)
+
+    def shots_to_grid_features(shots):
+        """Converts shots to features for each (game, team).
+
+        Arguments:
+            shots: A pandas.DataFrame of shots with GAME_ID and TEAM_ID as
+                columns or index levels.
+
+        Returns:
+            A pair of a pandas.MultiIndex of sorted (GAME_ID, TEAM_ID) keys and
+            a 2D numpy.array (or scipy.sparse.csr_matrix) with the features of
+            each key as a row.
+        """
+
+        keys = pd.MultiIndex.from_arrays([_get_column(shots, 'GAME_ID'),
+            _get_column(shots, 'TEAM_ID')])
+        codes, keys = keys.factorize(sort = True)
+        keys = pd.MultiIndex.from_tuples(keys, names = ['GAME_ID', 'TEAM_ID'])
+
+        valid, cells = grid.cells(shots.LOC_X, shots.LOC_Y)
+        if sparse:
+            return keys, _sparse_counts(codes[valid], cells, (len(keys), grid.size))
+
+        bins = codes[valid] * grid.size + cells
+        features = np.bincount(bins, minlength = len(keys) * grid.size)
+        return keys, features.reshape(len(keys), grid.size)
+
+    return shots_to_grid_features
+
 def shots_to_shot_types(shots):
     """Converts shots into a (2pt attempts, 3pt attempts) pair."""
 
@@ -245,23 +579,77 @@ def shots_to_shot_types(shots):
     return [twopt_count, threept_count]
 
 # Helper Functions
-def _split_team_shots(game_shots, team_id = None):
-    """Splits shots by team.
+def _load_team_outcomes(filename):
+    """Loads a dictionary of game ids to whether the team won from a file
+    written by TeamPreprocessor.export_outcomes."""
 
-    Arguments:
-        game_shots: A pandas.DataFrame containing shots in a game.
-        team_id: An optional integer ID for the team to be returned first.
-        
-    Returns:
-        A pair of pandas.DataFrame such that it's (team1 shots, team2 shots).
+    with open(filename, 'r') as in_f:
+        # Changing keys back to int (json format doesn't allow keys to be ints)
+        return {int(game_id): won for game_id, won in json.load(in_f).items()}
+
+def _report_outcome_errors(errors):
+    """Prints the games whose outcome couldn't be fetched, which are left out."""
+
+    if errors:
+        print(f"Warning: left out {len(errors)} games without an outcome "
+            f"{sorted(errors)} - {next(iter(errors.values()))}")
+
+def _sparse_counts(rows, cols, shape):
+    """Counts (row, col) pairs into a scipy.sparse.csr_matrix."""
 
-        team1 shots will be shots by team_id if team_id is not None.
+    counts = scipy.sparse.coo_matrix((np.ones(len(rows), dtype = np.int64),
+        (rows, cols)), shape = shape)
+    # Converting to CSR sums duplicate pairs
+    return counts.tocsr()
+
+def _to_matrix(data, dtype = None, sparse = False):
+    """Stacks a list of 1D numpy.array (or 1 x n scipy.sparse) samples into
+    one contiguous 2D array (or scipy.sparse.csr_matrix).
+
+    Data that isn't made of numpy arrays, e.g. pairs of pandas.DataFrame, is
+    returned as is.
     """
 
-    if team_id is None:
-        team_id = next(iter(set(game_shots.TEAM_ID)))
+    if isinstance(data, list):
+        if data and all(scipy.sparse.issparse(sample) for sample in data):
+            data = scipy.sparse.vstack(data, format = 'csr')
+        elif data and all(isinstance(sample, np.ndarray) for sample in data):
+            data = np.vstack(data)
+        else:
+            return data
+    elif not isinstance(data, np.ndarray) and not scipy.sparse.issparse(data):
+        return data
+
+    if sparse:
+        return scipy.sparse.csr_matrix(data, dtype = dtype)
+    if scipy.sparse.issparse(data):
+        return data if dtype is None else data.astype(dtype)
+    return np.ascontiguousarray(data, dtype = dtype)
+
+def _to_vector(target):
+    """Converts a list of scalar targets into a 1D numpy.array."""
+
+    if isinstance(target, list) and all(np.isscalar(value) for value in target):
+        return np.array(target)
+    return target
+
+def _read_data(data_filename, store_columns = None):
+    """Reads a CSV file, a ShotStore directory or uses a pandas.DataFrame."""
+
+    if isinstance(data_filename, pd.DataFrame):
+        return data_filename
+    if os.path.isdir(data_filename):
+        return ShotStore(data_filename).read(columns = store_columns)
+    return pd.read_csv(data_filename, index_col = 0)
+
+def _get_column(shots, name):
+    """Returns the values of a column or index level of a pandas.DataFrame."""
+
+    if name in shots.columns:
+        return shots[name].to_numpy()
+    return shots.index.get_level_values(name).to_numpy()
 
-    team1_shots = game_shots[game_shots.TEAM_ID == team_id]
-    team2_shots = game_shots[game_shots.TEAM_ID != team_id]
+def _to_scalar(value):
+    """Converts a numpy scalar to the equivalent python scalar."""
 
-    return team1_shots, team2_shots
\ No newline at end of file
+    return value.item() if isinstance(value, np.generic) else value
@@ -1,60 +1,81 @@
-import numpy as np
-from sklearn import svm, metrics
-from sklearn.model_selection import cross_val_score
-from .preprocessing import TeamPreprocessor, shots_to_features_wrapper, identity
+import os
+from nbastats.cache import ResponseCache
+from nbastats.court import COURT_LENGTH, COURT_WIDTH, LENGTH_SHIFT, WIDTH_SHIFT
+from nbastats.http import Client, set_default_client
+from .evaluation import evaluate_grid, summarize
+from .preprocessing import LeaguePreprocessor, shots_to_grid_features_wrapper
 
-def main():
-    # Preloaded GSW data
+GSW_TEAM_ID = 1610612744
+
+# Written by examples/all_shots before it wrote a ShotStore, examples/convert_shots
+# converts it to one
+SHOTS_CSV_FILENAME = 'scraped_data/shots 2018-19.csv'
+SHOT_STORE_DIR = 'scraped_data/shots' # Written by examples/convert_shots
+OUTCOME_FILENAME = 'scraped_data/outcomes.json'
+
+# Outcome files written by TeamPreprocessor.export_outcomes before there was a
+# league-wide OutcomeIndex, imported so their games aren't fetched again
+TEAM_OUTCOME_FILENAMES = {GSW_TEAM_ID: 'scraped_data/gsw_outcomes.json'}
+
+WIDTH = COURT_WIDTH
+LENGTH = COURT_LENGTH
+GRID_WIDTH = 25 # X axis size of the grid
+GRID_LENGTH = 25 # Y axis size of the grid
+
+# gamma is ignored by the linear kernel
+PARAM_GRID = [
+    {'kernel': ['linear'], 'C': [0.1, 1, 10]},
+    {'kernel': ['poly', 'rbf'], 'C': [0.1, 1, 10], 'gamma': ['auto', 'scale']}
+]
+
+def main(team_ids = (GSW_TEAM_ID,), grid_width = GRID_WIDTH,
+    grid_length = GRID_LENGTH, sparse = False, shot_data_filename = None
+):
+    # Game outcomes are only downloaded the first time
+    set_default_client(Client(cache = ResponseCache('scraped_data/responses.sqlite')))
+
+    # The store is only there once the CSV is converted, the CSV reads the same
+    if shot_data_filename is None:
+        shot_data_filename = (SHOT_STORE_DIR if os.path.isdir(SHOT_STORE_DIR)
+            else SHOTS_CSV_FILENAME)
+    team_outcome_filenames = {team_id: filename
+        for team_id, filename in TEAM_OUTCOME_FILENAMES.items()
+        if os.path.exists(filename)}
+
+    # Every team's games are featurized once
     print("Prepping data...")
-    team_id = 1610612744 # GSW
-    shots = TeamPreprocessor('scraped_data/shots 2018-19.csv', team_id, 
-        data_preprocessor, identity, 'scraped_data/gsw_outcomes.json')
+    league = LeaguePreprocessor(shot_data_filename,
+        grid_featurizer(grid_width, grid_length, sparse), OUTCOME_FILENAME,
+        team_outcome_filenames)
 
     # Cross Validation
     print("Model Results:")
-    for kernel in ('linear', 'poly', 'rbf'):
-        clf = svm.SVC(kernel = kernel, gamma = 'auto')
-        scores = cross_val_score(clf, shots.data, shots.target, cv = 5)
-        print(f"Model: {kernel[0].upper()}{kernel[1:]}")
-        print(f"Scores: {', '.join(f'{score:0.2f}' for score in scores)}")
-        print(f"Accuracy: {scores.mean():0.2f} (+/- {scores.std() * 2})")
-
-def data_preprocessor(raw_data):
-    """Processes shot data into features.
-
-    Width of a basketball court: axis from courtside to courtside
-    Length of a basketball court: axis from basket to basket
-
-    Arguments:
-        raw_data: A list of pairs of pandas.DataFrame containing shot 
-            information.
-
-    Returns:
-        A list of numpy.array that contains the features of home team and 
-        visiting team shots concatenated into a 1D array of size home team
-        features count + visiting team features count.
-
-        Shot features are simply the number of shots in a given grid on a
-        basketball court.
-    """
+    for team_id in team_ids:
+        shots = league.team_view(team_id)
+        print(f"Team: {team_id}")
 
-    width = 500 # X axis or bounding width of a basketball court
-    length = 375 # Y axis or bounding length of half a basketball court
-    width_shift = 250 # X axis values start from -250
-    length_shift = 50 # Y axis values start from -50
-    grid_width = 25 # X axis size of the grid
-    grid_length = 25 # Y axis size of the grid
+        results = list()
+        for result in evaluate_grid(shots.data, shots.target, PARAM_GRID, folds = 5):
+            print(f"{result.params} fold {result.fold}: {result.score:0.2f} "
+                f"(fit {result.fit_time:0.3f}s, score {result.score_time:0.3f}s)")
+            results.append(result)
 
-    shots_to_features = shots_to_features_wrapper(width, length, width_shift, 
-        length_shift, grid_width, grid_length)
+        for params, scores in summarize(results):
+            print(f"Model: {params}")
+            print(f"Scores: {', '.join(f'{score:0.2f}' for score in scores)}")
+            print(f"Accuracy: {scores.mean():0.2f} (+/- {scores.std() * 2})")
 
-    data = list()
-    for (ht_shots, vt_shots) in raw_data:
-        ht_features = shots_to_features(ht_shots)
-        vt_features = shots_to_features(vt_shots)
-        data.append(np.concatenate((ht_features, vt_features)))
+def grid_featurizer(grid_width = GRID_WIDTH, grid_length = GRID_LENGTH,
+    sparse = False
+):
+    """Returns a featurizer of the shots of every game and team for
+    LeaguePreprocessor on a grid_width x grid_length grid of the court.
+
+    Fine grids, e.g. 10 x 10 (1 ft) or even 1 x 1, should be sparse.
+    """
 
-    return data
+    return shots_to_grid_features_wrapper(WIDTH, LENGTH, WIDTH_SHIFT,
+        LENGTH_SHIFT, grid_width, grid_length, sparse)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,186 @@
+import json
+import os
+import random
+
+# Ids of the 30 teams, starting from the Atlanta Hawks
+TEAM_IDS = [1610612737 + i for i in range(30)]
+TEAM_ABBREVIATIONS = ['ATL', 'BOS', 'CLE', 'NOP', 'CHI', 'DAL', 'DEN', 'GSW',
+    'HOU', 'LAC', 'LAL', 'MIA', 'MIL', 'MIN', 'BKN', 'NYK', 'ORL', 'IND', 'PHI',
+    'PHX', 'POR', 'SAC', 'SAS', 'OKC', 'TOR', 'UTA', 'MEM', 'WAS', 'DET', 'CHA']
+
+SHOT_LOG_HEADERS = ['GRID_TYPE', 'GAME_ID', 'GAME_EVENT_ID', 'PLAYER_ID',
+    'PLAYER_NAME', 'TEAM_ID', 'TEAM_NAME', 'PERIOD', 'MINUTES_REMAINING',
+    'SECONDS_REMAINING', 'EVENT_TYPE', 'ACTION_TYPE', 'SHOT_TYPE',
+    'SHOT_ZONE_BASIC', 'SHOT_ZONE_AREA', 'SHOT_ZONE_RANGE', 'SHOT_DISTANCE',
+    'LOC_X', 'LOC_Y', 'SHOT_ATTEMPTED_FLAG', 'SHOT_MADE_FLAG', 'GAME_DATE',
+    'HTM', 'VTM']
+
+LEAGUE_AVERAGES_HEADERS = ['GRID_TYPE', 'SHOT_ZONE_BASIC', 'SHOT_ZONE_AREA',
+    'SHOT_ZONE_RANGE', 'FGA', 'FGM', 'FG_PCT']
+
+LEADERS_HEADERS = ['PLAYER_ID', 'PLAYER_NAME', 'TEAM_ID', 'TEAM_ABBREVIATION',
+    'AGE', 'GP', 'W', 'L', 'W_PCT', 'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M',
+    'FG3A', 'FG3_PCT', 'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST',
+    'TOV', 'STL', 'BLK', 'BLKA', 'PF', 'PFD', 'PTS', 'PLUS_MINUS',
+    'NBA_FANTASY_PTS', 'DD2', 'TD3']
+
+LINE_SCORE_HEADERS = ['GAME_DATE_EST', 'GAME_SEQUENCE', 'GAME_ID', 'TEAM_ID',
+    'TEAM_ABBREVIATION', 'TEAM_CITY_NAME', 'TEAM_NICKNAME', 'TEAM_WINS_LOSSES',
+    'PTS_QTR1', 'PTS_QTR2', 'PTS_QTR3', 'PTS_QTR4', 'PTS']
+
+FIRST_GAME_ID = 21500001
+
+def schedule(games, seed = 0):
+    """Returns a list of (game id, home team id, visiting team id, game date)
+    of a synthetic season."""
+
+    rand = random.Random(seed)
+    games_per_day = 8
+    schedule = list()
+    for i in range(games):
+        home, visiting = rand.sample(TEAM_IDS, 2)
+        day = i // games_per_day
+        game_date = f'2015{10 + day // 30 % 3:02d}{1 + day % 30:02d}'
+        schedule.append((FIRST_GAME_ID + i, home, visiting, game_date))
+    return schedule
+
+def shot_log_payload(rows = 200000, games = 1230, seed = 0):
+    """Returns a synthetic shotchartdetail response as a dictionary.
+
+    Shots are spread evenly over the games of schedule, half by each team, and
+    followed by a small league averages result set like the real endpoint.
+    """
+
+    rand = random.Random(seed)
+    games = schedule(games, seed)
+    abbreviations = dict(zip(TEAM_IDS, TEAM_ABBREVIATIONS))
+    action_types = ['Jump Shot', 'Layup Shot', 'Driving Layup Shot',
+        'Pullup Jump shot', 'Dunk Shot', 'Step Back Jump shot']
+
+    shots = list()
+    for i in range(rows):
+        game_id, home, visiting, game_date = games[i % len(games)]
+        team_id = home if i // len(games) % 2 else visiting
+        loc_x = rand.randint(-250, 249)
+        loc_y = rand.randint(-50, 400)
+        distance = int((loc_x ** 2 + loc_y ** 2) ** 0.5 / 10)
+        three = distance >= 23
+        made = rand.random() < 0.45
+        shots.append(['Shot Chart Detail', f'{game_id:010d}', i // len(games) + 1,
+            team_id * 10 + i % 13, f'Player {team_id % 100}-{i % 13}', team_id,
+            f'Team {abbreviations[team_id]}', rand.randint(1, 4),
+            rand.randint(0, 11), rand.randint(0, 59),
+            'Made Shot' if made else 'Missed Shot', rand.choice(action_types),
+            '3PT Field Goal' if three else '2PT Field Goal',
+            'Above the Break 3' if three else 'Mid-Range',
+            rand.choice(['Left Side(L)', 'Center(C)', 'Right Side(R)']),
+            '24+ ft.' if three else '16-24 ft.', distance, loc_x, loc_y, 1,
+            int(made), game_date, abbreviations[home], abbreviations[visiting]])
+
+    averages = [['League Averages', zone, 'Center(C)', '24+ ft.', 100, 45, 0.45]
+        for zone in ['Above the Break 3', 'Mid-Range', 'Restricted Area']]
+    return {
+        'resource': 'shotchart',
+        'parameters': {},
+        'resultSets': [
+            {'name': 'Shot_Chart_Detail', 'headers': SHOT_LOG_HEADERS, 'rowSet': shots},
+            {'name': 'LeagueAverages', 'headers': LEAGUE_AVERAGES_HEADERS,
+                'rowSet': averages}
+        ]
+    }
+
+def leaders_payload(players = 500, seed = 0):
+    """Returns a synthetic leaguedashplayerstats response as a dictionary."""
+
+    rand = random.Random(seed)
+    abbreviations = dict(zip(TEAM_IDS, TEAM_ABBREVIATIONS))
+    rows = list()
+    for i in range(players):
+        team_id = TEAM_IDS[i % len(TEAM_IDS)]
+        stats = [round(rand.uniform(0, 30), 1)
+            for _ in LEADERS_HEADERS[9:]]
+        rows.append([200000 + i, f'Player {i}', team_id, abbreviations[team_id],
+            rand.randint(19, 40), rand.randint(1, 82), rand.randint(0, 60),
+            rand.randint(0, 60), round(rand.random(), 3)] + stats)
+    rows.sort(key = lambda row: row[LEADERS_HEADERS.index('PTS')], reverse = True)
+
+    return {
+        'resource': 'leaguedashplayerstats',
+        'parameters': {},
+        'resultSets': [
+            {'name': 'LeagueDashPlayerStats', 'headers': LEADERS_HEADERS,
+                'rowSet': rows}
+        ]
+    }
+
+def game_info_payload(game_id, home, visiting, game_date, seed = 0):
+    """Returns a synthetic boxscoresummaryv2 response as a dictionary."""
+
+    rand = random.Random(seed * 100003 + game_id)
+    abbreviations = dict(zip(TEAM_IDS, TEAM_ABBREVIATIONS))
+    game = f'{game_id:010d}'
+    date = f'{game_date[:4]}-{game_date[4:6]}-{game_date[6:]}T00:00:00'
+
+    def line(team_id):
+        quarters = [rand.randint(15, 35) for _ in range(4)]
+        return [date, 1, game, team_id, abbreviations[team_id],
+            f'City {abbreviations[team_id]}', f'Team {abbreviations[team_id]}',
+            '1-0'] + quarters + [sum(quarters)]
+
+    home_line, visiting_line = line(home), line(visiting)
+    # Ties would go to overtime
+    if home_line[-1] == visiting_line[-1]:
+        home_line[-1] += 2
+
+    def result_set(name, headers, rows):
+        return {'name': name, 'headers': headers, 'rowSet': rows}
+
+    return {
+        'resource': 'boxscore',
+        'parameters': {'GameID': game},
+        'resultSets': [
+            result_set('GameSummary', ['GAME_DATE_EST', 'GAME_ID',
+                'GAME_STATUS_TEXT', 'HOME_TEAM_ID', 'VISITOR_TEAM_ID', 'SEASON'],
+                [[date, game, 'Final', home, visiting, '2015']]),
+            result_set('OtherStats', ['LEAGUE_ID', 'TEAM_ID', 'PTS_PAINT',
+                'PTS_2ND_CHANCE', 'PTS_FB', 'LARGEST_LEAD', 'LEAD_CHANGES'],
+                [['00', team_id, rand.randint(20, 60), rand.randint(5, 20),
+                    rand.randint(5, 20), rand.randint(1, 25), rand.randint(0, 20)]
+                    for team_id in (home, visiting)]),
+            result_set('Officials', ['OFFICIAL_ID', 'FIRST_NAME', 'LAST_NAME',
+                'JERSEY_NUM'], [[1000 + i, 'First', f'Official {i}', str(i)]
+                    for i in range(3)]),
+            result_set('InactivePlayers', ['PLAYER_ID', 'FIRST_NAME', 'LAST_NAME',
+                'JERSEY_NUM', 'TEAM_ID'], [[300000 + i, 'First', f'Inactive {i}',
+                    str(i), (home, visiting)[i % 2]] for i in range(4)]),
+            result_set('GameInfo', ['GAME_DATE', 'ATTENDANCE', 'GAME_TIME'],
+                [[date, rand.randint(15000, 21000), '2:15']]),
+            result_set('LineScore', LINE_SCORE_HEADERS, [home_line, visiting_line]),
+            result_set('LastMeeting', ['GAME_ID', 'LAST_GAME_ID',
+                'LAST_GAME_HOME_TEAM_ID', 'LAST_GAME_VISITOR_TEAM_ID'],
+                [[game, f'{game_id - 100:010d}', visiting, home]]),
+            result_set('SeasonSeries', ['GAME_ID', 'HOME_TEAM_ID',
+                'VISITOR_TEAM_ID', 'HOME_TEAM_WINS', 'HOME_TEAM_LOSSES'],
+                [[game, home, visiting, 1, 0]]),
+            result_set('AvailableVideo', ['GAME_ID', 'VIDEO_AVAILABLE_FLAG'],
+                [[game, 1]])
+        ]
+    }
+
+def load_payload(directory, name):
+    """Returns the bytes of a recorded response, e.g. <directory>/<name>.json,
+    or None if it wasn't recorded."""
+
+    if directory is None:
+        return None
+
+    filename = os.path.join(directory, f'{name}.json')
+    if not os.path.exists(filename):
+        return None
+    with open(filename, 'rb') as in_f:
+        return in_f.read()
+
+def encode(payload):
+    """Encodes a payload the way stats.nba.com does, as compact UTF-8 JSON."""
+
+    return json.dumps(payload, separators = (',', ':')).encode('utf-8')
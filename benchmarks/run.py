@@ -0,0 +1,383 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn import svm
+from nbastats.decode import get_backend, load_result_sets
+from nbastats.game import (OutcomeIndex, _nba_to_listdict,
+    get_game_info, get_game_outcomes, get_line_score)
+from nbastats.http import Client, set_default_client
+from nbastats.importtime import CORE_MODULES
+from nbastats.options import Season, SeasonType
+from nbastats.player import (PLAYER_SHOT_LOG_URL, SHOT_CHART_DETAIL,
+    get_leaders, get_shot_log, iter_shot_log)
+from analysis.game_outcome.preprocessing import (LeaguePreprocessor, ShotGroups,
+    TeamPreprocessor, identity, shots_to_matrix_wrapper, sum_matrix_by_grids_wrapper)
+from analysis.game_outcome.svc_model import (GRID_LENGTH, GRID_WIDTH, LENGTH,
+    LENGTH_SHIFT, WIDTH, WIDTH_SHIFT, grid_featurizer)
+from .fixtures import (encode, game_info_payload, leaders_payload, load_payload,
+    schedule, shot_log_payload)
+from .stub_server import StubServer
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+GSW_TEAM_ID = 1610612744
+SEASON = Season(2015)
+SEASON_TYPE = SeasonType.REGULAR_SEASON
+
+Measurement = namedtuple('Measurement', ['stage', 'seconds', 'items', 'bytes',
+    'peak_memory'])
+Measurement.__doc__ = """The timing of a pipeline stage.
+
+Attributes:
+    stage: A string for the name of the stage, e.g. 'scrape.get_shot_log'.
+    seconds: A float for the fastest of the repeated runs.
+    items: An integer for the number of rows, games or samples processed.
+    bytes: An integer for the number of bytes of input processed, 0 if it
+        doesn't apply.
+    peak_memory: An integer for the peak bytes allocated by the stage as
+        traced by tracemalloc, None if memory wasn't measured.
+"""
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Benchmarks the scrape, "
+        "decode, featurize and train pipeline against a local stub server.")
+    parser.add_argument('--rows', type = int, default = 200000,
+        help = "number of shots in the shotchartdetail fixture")
+    parser.add_argument('--games', type = int, default = 1230,
+        help = "number of games the shots are spread over")
+    parser.add_argument('--box-scores', type = int, default = 200,
+        help = "number of boxscoresummaryv2 requests per scrape stage")
+    parser.add_argument('--repeat', type = int, default = 3,
+        help = "number of timed runs of each stage, the fastest is kept")
+    parser.add_argument('--stage', action = 'append', default = None,
+        help = "only run stages starting with this prefix, can be repeated")
+    parser.add_argument('--fixtures', default = None,
+        help = "directory of recorded <endpoint>.json responses to use in place "
+            "of the synthetic ones")
+    parser.add_argument('--no-memory', action = 'store_true',
+        help = "skip the extra traced run that measures peak memory")
+    parser.add_argument('--save', metavar = 'NAME', default = None,
+        help = "save the results as the baseline NAME")
+    parser.add_argument('--compare', metavar = 'NAME', default = None,
+        help = "compare the results against the baseline NAME")
+    parser.add_argument('--tolerance', type = float, default = 0.25,
+        help = "fraction a stage may be slower or use more memory than its "
+            "baseline before it's reported as a regression")
+    args = parser.parse_args(argv)
+
+    print(f"Preparing fixtures ({args.rows} shots over {args.games} games)...")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with StubServer(_payloads(args)) as server:
+            context = _setup(args, server, temp_dir)
+            stages = [stage for stage in _stages(context)
+                if args.stage is None
+                or any(stage[0].startswith(prefix) for prefix in args.stage)]
+
+            measurements = list()
+            for name, function, items, nbytes in stages:
+                measurement = measure(name, function, items, nbytes,
+                    args.repeat, not args.no_memory)
+                print(format_measurement(measurement))
+                measurements.append(measurement)
+
+    regressions = list()
+    if args.compare is not None:
+        baseline = load_baseline(args.compare)
+        if baseline is None:
+            print(f"No baseline named {args.compare} to compare against")
+        else:
+            regressions = compare(measurements, baseline, args.tolerance)
+            for regression in regressions:
+                print(f"REGRESSION {regression}")
+            if not regressions:
+                print(f"No regressions against baseline {args.compare}")
+
+    if args.save is not None:
+        filename = save_baseline(args.save, measurements, vars(args))
+        print(f"Saved baseline to {filename}")
+
+    return 1 if regressions else 0
+
+def measure(name, function, items, nbytes = 0, repeat = 3, memory = True):
+    """Times a stage and measures its peak memory.
+
+    The stage is timed repeat times without tracing, since tracemalloc slows
+    down allocations, and then run once more with tracemalloc for its peak.
+
+    Arguments:
+        name: A string for the name of the stage.
+        function: A function without arguments that runs the stage.
+        items: An integer for the number of items the stage processes.
+        nbytes: An integer for the number of bytes the stage processes.
+        repeat: An integer for the number of timed runs.
+        memory: A boolean for whether to measure the peak memory.
+
+    Returns:
+        A Measurement.
+    """
+
+    timings = list()
+    for _ in range(max(repeat, 1)):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    peak_memory = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            function()
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return Measurement(name, min(timings), items, nbytes, peak_memory)
+
+def format_measurement(measurement):
+    """Returns a line describing a Measurement."""
+
+    line = (f"{measurement.stage:<32} {measurement.seconds * 1000:>10.1f} ms "
+        f"{measurement.items / measurement.seconds:>14,.0f} items/s")
+    if measurement.bytes:
+        line += f" {measurement.bytes / measurement.seconds / 2 ** 20:>8.1f} MB/s"
+    else:
+        line += ' ' * 14
+    if measurement.peak_memory is not None:
+        line += f" {measurement.peak_memory / 2 ** 20:>8.1f} MB peak"
+    return line
+
+def save_baseline(name, measurements, options):
+    """Saves measurements as a baseline.
+
+    Returns:
+        A string for the filename of the baseline.
+    """
+
+    os.makedirs(BASELINE_DIR, exist_ok = True)
+    filename = os.path.join(BASELINE_DIR, f'{name}.json')
+    baseline = {
+        'environment': _environment(),
+        'options': {key: options[key] for key in ('rows', 'games', 'box_scores', 'repeat')},
+        'results': {measurement.stage: measurement._asdict()
+            for measurement in measurements}
+    }
+    with open(filename, 'w') as out:
+        json.dump(baseline, out, indent = 4)
+    return filename
+
+def load_baseline(name):
+    """Returns a saved baseline, or None if there isn't one."""
+
+    filename = os.path.join(BASELINE_DIR, f'{name}.json')
+    if not os.path.exists(filename):
+        return None
+    with open(filename, 'r') as in_f:
+        return json.load(in_f)
+
+def compare(measurements, baseline, tolerance = 0.25):
+    """Compares measurements against a baseline.
+
+    Arguments:
+        measurements: A list of Measurement.
+        baseline: A dictionary of a baseline as saved by save_baseline.
+        tolerance: A float for the fraction a stage may be slower or use more
+            memory than its baseline.
+
+    Returns:
+        A list of strings describing each regression.
+    """
+
+    regressions = list()
+    results = baseline['results']
+    for measurement in measurements:
+        previous = results.get(measurement.stage)
+        if previous is None:
+            continue
+
+        # Throughput rather than time in case the fixture sizes changed
+        rate = measurement.items / measurement.seconds
+        previous_rate = previous['items'] / previous['seconds']
+        if rate * (1 + tolerance) < previous_rate:
+            regressions.append(f"{measurement.stage}: {rate:,.0f} items/s, "
+                f"baseline {previous_rate:,.0f} items/s")
+
+        if measurement.peak_memory is not None and previous['peak_memory']:
+            # Scale the baseline peak to the number of items processed now
+            previous_peak = previous['peak_memory'] * measurement.items / previous['items']
+            if measurement.peak_memory > previous_peak * (1 + tolerance):
+                regressions.append(f"{measurement.stage}: "
+                    f"{measurement.peak_memory / 2 ** 20:.1f} MB peak, baseline "
+                    f"{previous_peak / 2 ** 20:.1f} MB")
+    return regressions
+
+# Helper Functions
+def _payloads(args):
+    """Returns the payloads of the stub server for every endpoint."""
+
+    shot_log = load_payload(args.fixtures, 'shotchartdetail')
+    if shot_log is None:
+        shot_log = encode(shot_log_payload(args.rows, args.games))
+
+    leaders = load_payload(args.fixtures, 'leaguedashplayerstats')
+    if leaders is None:
+        leaders = encode(leaders_payload())
+
+    # Box scores are encoded up front so the server isn't what's measured
+    game_info = load_payload(args.fixtures, 'boxscoresummaryv2')
+    if game_info is None:
+        box_scores = {f'{game_id:010d}': encode(game_info_payload(game_id, home,
+            visiting, game_date))
+            for game_id, home, visiting, game_date in schedule(args.games)}
+        game_info = lambda params: box_scores[params['GameID']]
+
+    return {
+        'shotchartdetail': shot_log,
+        'leaguedashplayerstats': leaders,
+        'boxscoresummaryv2': game_info
+    }
+
+def _setup(args, server, temp_dir):
+    """Builds the inputs of every stage outside of the timed runs."""
+
+    client = Client(base_url = server.base_url)
+    set_default_client(client)
+
+    shot_bytes = server.payloads['shotchartdetail']
+    leaders_bytes = server.payloads['leaguedashplayerstats']
+    shots = get_shot_log(0, SEASON, SEASON_TYPE, client, as_frame = True)
+    shot_groups = ShotGroups(shots)
+    game_ids = sorted(set(int(game_id) for game_id in shots.GAME_ID))
+    team_id = GSW_TEAM_ID if GSW_TEAM_ID in shot_groups.teams() else shot_groups.teams()[0]
+
+    # Outcomes are fetched once so the preprocessors don't scrape
+    outcome_filename = os.path.join(temp_dir, 'outcomes.json')
+    outcomes = get_game_outcomes(game_ids, index = OutcomeIndex(outcome_filename),
+        raise_errors = True)
+    team_outcome_filename = os.path.join(temp_dir, 'team_outcomes.json')
+    with open(team_outcome_filename, 'w') as out:
+        json.dump({game_id: outcome['winner'] == team_id
+            for game_id, outcome in outcomes.items()}, out)
+
+    team = TeamPreprocessor(shot_groups, team_id, identity, identity,
+        team_outcome_filename)
+    league = LeaguePreprocessor(shots, grid_featurizer(), outcome_filename)
+    views = [league.team_view(other_id) for other_id in league.teams()]
+
+    return {
+        'args': args,
+        'client': client,
+        'shot_bytes': shot_bytes,
+        'leaders_bytes': leaders_bytes,
+        'shot_result_set': json.loads(shot_bytes.decode('utf-8'))['resultSets'][0],
+        'shots': shots,
+        'box_score_ids': game_ids[:args.box_scores],
+        'team_id': team_id,
+        'team': team,
+        'team_outcome_filename': team_outcome_filename,
+        'outcome_filename': outcome_filename,
+        'train_data': np.vstack([view.data for view in views]),
+        'train_target': np.concatenate([view.target for view in views])
+    }
+
+def _stages(context):
+    """Returns a list of (name, function, items, bytes) of every stage."""
+
+    args = context['args']
+    client = context['client']
+    shots = context['shots']
+    shot_bytes = context['shot_bytes']
+    box_score_ids = context['box_score_ids']
+    team = context['team']
+    rows = len(context['shot_result_set']['rowSet'])
+    leaders_rows = len(json.loads(context['leaders_bytes'].decode('utf-8'))
+        ['resultSets'][0]['rowSet'])
+
+    shots_to_matrix = shots_to_matrix_wrapper(WIDTH, LENGTH, WIDTH_SHIFT, LENGTH_SHIFT)
+    sum_matrix_by_grids = sum_matrix_by_grids_wrapper(GRID_WIDTH, GRID_LENGTH)
+    team_pairs, _ = team._prep_data(team_id = context['team_id'],
+        outcome_filename = context['team_outcome_filename'])
+    matrices = [shots_to_matrix(team_shots)
+        for pair in team_pairs for team_shots in pair]
+
+    def get_game_infos():
+        for game_id in box_score_ids:
+            get_game_info(game_id, client)
+
+    def get_line_scores():
+        for game_id in box_score_ids:
+            get_line_score(game_id, client)
+
+    def import_core():
+        subprocess.run([sys.executable, '-c', 'import ' + ', '.join(CORE_MODULES)],
+            check = True)
+
+    def train():
+        svm.SVC(gamma = 'scale').fit(context['train_data'], context['train_target'])
+
+    return [
+        ('startup.import_core', import_core, 1, 0),
+        ('scrape.fetch_shotchartdetail', lambda: client.get_content(
+            PLAYER_SHOT_LOG_URL, {'PlayerID': 0}), rows, len(shot_bytes)),
+        ('scrape.get_shot_log', lambda: get_shot_log(0, SEASON, SEASON_TYPE,
+            client), rows, len(shot_bytes)),
+        ('scrape.get_shot_log_frame', lambda: get_shot_log(0, SEASON, SEASON_TYPE,
+            client, as_frame = True), rows, len(shot_bytes)),
+        ('scrape.iter_shot_log', lambda: sum(1 for _ in iter_shot_log(0, SEASON,
+            SEASON_TYPE, client)), rows, len(shot_bytes)),
+        ('scrape.get_leaders', lambda: get_leaders(SEASON, SEASON_TYPE, client),
+            leaders_rows, len(context['leaders_bytes'])),
+        ('scrape.get_game_info', get_game_infos, len(box_score_ids), 0),
+        ('scrape.get_line_score', get_line_scores, len(box_score_ids), 0),
+        ('decode.json_loads', lambda: json.loads(shot_bytes.decode('utf-8')),
+            rows, len(shot_bytes)),
+        ('decode.result_sets_json', lambda: load_result_sets(shot_bytes, 'utf-8',
+            [SHOT_CHART_DETAIL], backend = 'json'), rows, len(shot_bytes)),
+        ('decode.nba_to_listdict', lambda: _nba_to_listdict(
+            context['shot_result_set']), rows, 0),
+        ('featurize.shot_groups', lambda: ShotGroups(shots), len(shots), 0),
+        ('featurize.team_prep_data', lambda: team._prep_data(
+            team_id = context['team_id'],
+            outcome_filename = context['team_outcome_filename']),
+            len(team_pairs), 0),
+        ('featurize.shots_to_matrix', lambda: [shots_to_matrix(team_shots)
+            for pair in team_pairs for team_shots in pair], 2 * len(team_pairs), 0),
+        ('featurize.sum_matrix_by_grids', lambda: [sum_matrix_by_grids(matrix)
+            for matrix in matrices], len(matrices), 0),
+        ('featurize.grid_features', lambda: grid_featurizer()(shots), len(shots), 0),
+        ('featurize.league_preprocessor', lambda: LeaguePreprocessor(shots,
+            grid_featurizer(), context['outcome_filename']), len(shots), 0),
+        ('train.svc', train, len(context['train_target']), 0)
+    ] + ([
+        ('decode.result_sets_orjson', lambda: load_result_sets(shot_bytes,
+            'utf-8', [SHOT_CHART_DETAIL], backend = 'orjson'), rows,
+            len(shot_bytes))
+    ] if get_backend() == 'orjson' else [])
+
+def _environment():
+    """Returns a dictionary describing the machine and library versions."""
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'json_backend': get_backend()
+    }
+
+if __name__ == '__main__':
+    sys.exit(main())
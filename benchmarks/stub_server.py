@@ -0,0 +1,113 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, urlsplit
+
+class StubServer(object):
+    """A local HTTP server that stands in for stats.nba.com.
+
+    Responses are looked up by the last segment of the requested path, e.g.
+    'shotchartdetail', so a nbastats.http.Client with the server's base_url
+    runs completely offline.
+
+    A payload function can also return a (status code, body) or a (status
+    code, body, headers dictionary) tuple, e.g. to throttle requests with a
+    429 and a Retry-After header.
+
+    Attributes:
+        payloads: A dictionary of endpoint names to either the bytes of the
+            response or a function of the dictionary of queries that returns
+            them.
+        requests: An integer for the number of requests served.
+        base_url: A string for the url of the server once it's started.
+    """
+
+    def __init__(self, payloads, host = '127.0.0.1', port = 0):
+        """Initializes a StubServer.
+
+        Arguments:
+            payloads: A dictionary of endpoint names to either the bytes of the
+                response or a function of the dictionary of queries that
+                returns them.
+            host: A string for the address to listen on.
+            port: An integer for the port to listen on, any free port if 0.
+        """
+
+        self.payloads = payloads
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = _ThreadingHTTPServer((host, port), _handler(self))
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        """Serves requests from a background thread."""
+
+        self._thread = threading.Thread(target = self._server.serve_forever,
+            daemon = True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops serving and closes the socket."""
+
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def respond(self, path):
+        """Returns the (status code, body, headers) of a request for path."""
+
+        with self._lock:
+            self.requests += 1
+
+        url = urlsplit(path)
+        payload = self.payloads.get(url.path.rstrip('/').rsplit('/', 1)[-1])
+        if payload is None:
+            return 404, b'Not found', {}
+        if callable(payload):
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            payload = payload(params)
+        if isinstance(payload, tuple):
+            status, body, *headers = payload
+            return status, body, headers[0] if headers else {}
+        return 200, payload, {}
+
+# Helper Functions
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+def _handler(stub):
+    """Returns a request handler class that serves the payloads of stub."""
+
+    class Handler(BaseHTTPRequestHandler):
+        # Keep connections alive like stats.nba.com
+        protocol_version = 'HTTP/1.1'
+        # The headers and body are separate writes, don't wait for an ACK
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            status, body, headers = stub.respond(self.path)
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
@@ -1,32 +1,48 @@
-import json
-import pandas as pd
-from nbastats.player import get_leaders, get_shot_log
+from nbastats.cache import ResponseCache
+from nbastats.http import Client, RateLimiter, set_default_client
+from nbastats.metrics import SummaryReporter
+from nbastats.journal import ScrapeJournal
+from nbastats.player import get_leaders, get_shot_logs
 from nbastats.options import Season, SeasonType
+from nbastats.store import ShotStore, player_chunk_name
 
 def main():
+    reporter = SummaryReporter()
+    set_default_client(Client(cache = ResponseCache('scraped_data/responses.sqlite'),
+        observers = [reporter]))
+
     season = Season(2018)
     season_type = SeasonType.REGULAR_SEASON
 
     leaderboard = get_leaders(season, season_type)
-    player_ids = [player['PLAYER_ID'] for player in leaderboard]
+    player_names = {player['PLAYER_ID']: player['PLAYER_NAME'] for player in leaderboard}
+
+    # Resume from the players scraped by an earlier run
+    journal = ScrapeJournal('scraped_data/shots 2018-19.jsonl')
+    player_ids = [player_id for player_id in player_names if player_id not in journal]
+    print(f"{len(journal)} players already scraped, {len(player_ids)} remaining")
 
-    shots = list()
-    for i, player_id in enumerate(player_ids):
-        print(f"{ordinal(i + 1)} player: {leaderboard[i]['PLAYER_NAME']}")
-        shots += get_shot_log(player_id, season, season_type)
+    results = get_shot_logs(player_ids, season, season_type,
+        max_concurrency = 4, rate_limiter = RateLimiter(4))
+    for result in results:
+        if result.error is not None:
+            print(f"Failed to get shots of {player_names[result.player_id]}: {result.error}")
+            continue
 
         # Save progress
-        with open('scraped_data/temp.json', 'w') as out:
-            json.dump(shots, out, indent = 4)
+        journal.append(result.player_id, result.shots)
+        print(f"{ordinal(len(journal))} player: {player_names[result.player_id]}")
+
+    # Write a typed, columnar chunk per player
+    store = ShotStore('scraped_data/shots')
+    for player_id, shots in journal.iter_players():
+        store.append(shots, season, season_type, player_chunk_name(player_id))
 
-    column_names = list(shots[0].keys())
-    column_data = [[shot.get(key, '') for key in column_names] for shot in shots]
-    shots_df = pd.DataFrame(data = shots, columns = column_names)
-    shots_df.to_csv('scraped_data/shots 2018-19.csv')
+    reporter.report()
 
 def ordinal(num):
     num_ord = {1: 'st', 2: 'nd', 3: 'rd'}.get(num if num < 20 else num % 10, 'th')
     return f'{num}{num_ord}'
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
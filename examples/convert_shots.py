@@ -0,0 +1,13 @@
+from nbastats.options import Season, SeasonType
+from nbastats.store import ShotStore, convert_csv
+
+def main():
+    season = Season(2018)
+    season_type = SeasonType.REGULAR_SEASON
+
+    store = ShotStore('scraped_data/shots')
+    convert_csv('scraped_data/shots 2018-19.csv', store, season, season_type)
+    print(f"Converted {len(store.chunks([season], [season_type]))} players")
+
+if __name__ == '__main__':
+    main()
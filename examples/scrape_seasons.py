@@ -0,0 +1,37 @@
+from nbastats.cache import ResponseCache
+from nbastats.game import OutcomeIndex
+from nbastats.http import Client, RateLimiter
+from nbastats.metrics import SummaryReporter
+from nbastats.options import Season, SeasonType
+from nbastats.orchestrator import ScrapeOrchestrator
+from nbastats.store import ShotStore
+
+SEASONS = [Season(year) for year in range(2013, 2019)]
+SEASON_TYPES = [SeasonType.REGULAR_SEASON, SeasonType.PLAYOFFS]
+ENDPOINTS = ['shots', 'outcomes']
+
+def main():
+    reporter = SummaryReporter()
+    client = Client(cache = ResponseCache('scraped_data/responses.sqlite'),
+        observers = [reporter])
+
+    # Progress is kept in the state database so an interrupted run resumes
+    with ScrapeOrchestrator('scraped_data/scrape_state.sqlite',
+        ShotStore('scraped_data/shots'), OutcomeIndex('scraped_data/outcomes.json'),
+        max_concurrency = 4, rate_limiter = RateLimiter(4), client = client
+    ) as orchestrator:
+        print(f"Queued {orchestrator.plan(SEASONS, SEASON_TYPES, ENDPOINTS)} new jobs")
+
+        for result in orchestrator.run():
+            job = result.job
+            if result.error is not None:
+                print(f"Failed {job.endpoint} {Season(job.season)} {job.season_type} "
+                    f"{job.subject}: {result.error}")
+
+        for (endpoint, status), count in sorted(orchestrator.progress().items()):
+            print(f"{endpoint} {status}: {count}")
+
+    reporter.report()
+
+if __name__ == '__main__':
+    main()
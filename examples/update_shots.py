@@ -0,0 +1,34 @@
+from nbastats.aggregates import ShotAggregates
+from nbastats.cache import ResponseCache
+from nbastats.game import OutcomeIndex
+from nbastats.http import Client, RateLimiter, set_default_client
+from nbastats.metrics import SummaryReporter
+from nbastats.options import Season, SeasonType
+from nbastats.store import ShotStore
+from nbastats.update import update_season
+
+def main():
+    reporter = SummaryReporter()
+    set_default_client(Client(cache = ResponseCache('scraped_data/responses.sqlite'),
+        observers = [reporter]))
+
+    season = Season.current()
+    season_type = SeasonType.REGULAR_SEASON
+
+    store = ShotStore('scraped_data/shots')
+    outcomes = OutcomeIndex('scraped_data/outcomes.json')
+    result = update_season(store, season, season_type, outcome_index = outcomes,
+        rate_limiter = RateLimiter(4))
+
+    for player_id, error in result.errors.items():
+        print(f"Failed to update shots of {player_id}: {error}")
+    if result.outcome_error is not None:
+        print(f"Failed to update game outcomes: {result.outcome_error}")
+    print(f"Added {sum(result.new_shots.values())} shots from {len(result.game_ids)} games")
+
+    with ShotAggregates('scraped_data/aggregates.sqlite', store) as aggregates:
+        print(f"Aggregated {aggregates.update([season], [season_type])} shots")
+    reporter.report()
+
+if __name__ == '__main__':
+    main()
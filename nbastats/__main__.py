@@ -0,0 +1,132 @@
+import argparse
+import json
+import sys
+from nbastats.options import Season, SeasonType
+
+EXAMPLES = """examples:
+  python -m nbastats leaders 2018
+  python -m nbastats shots 201939 2018 --query Period=4
+  python -m nbastats game 21800001 --line-score
+  python -m nbastats import-time --max-ms 100
+"""
+
+SEASON_TYPES = [SeasonType.PRE_SEASON, SeasonType.REGULAR_SEASON,
+    SeasonType.PLAYOFFS, SeasonType.ALL_STAR]
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(prog = 'nbastats',
+        description = "Fetches NBA stats as JSON lines, written as soon as "
+            "they're parsed.", epilog = EXAMPLES,
+        formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default = None,
+        help = "scheme and host that replace stats.nba.com, e.g. a stub server")
+    parser.add_argument('--cache', default = None,
+        help = "SQLite file of a response cache to read and fill")
+    parser.add_argument('--timeout', type = float, default = 30,
+        help = "seconds before a request is abandoned")
+    parser.add_argument('--metrics', action = 'store_true',
+        help = "write a summary of the requests to stderr")
+    commands = parser.add_subparsers(dest = 'command')
+    commands.required = True
+
+    leaders = commands.add_parser('leaders', help = "the leaders of a season")
+    leaders.add_argument('season', type = int, help = "year the season begins")
+    leaders.add_argument('--season-type', choices = SEASON_TYPES,
+        default = SeasonType.REGULAR_SEASON)
+
+    shots = commands.add_parser('shots', help = "the shot log of a player")
+    shots.add_argument('player_id', type = int)
+    shots.add_argument('season', type = int, help = "year the season begins")
+    shots.add_argument('--season-type', choices = SEASON_TYPES,
+        default = SeasonType.REGULAR_SEASON)
+    shots.add_argument('--query', action = 'append', default = [],
+        metavar = 'KEY=VALUE', help = "any other shotchartdetail query")
+
+    game = commands.add_parser('game', help = "the summary of a game")
+    game.add_argument('game_id', type = int)
+    game.add_argument('--line-score', action = 'store_true',
+        help = "only the line scores and winner")
+
+    import_time = commands.add_parser('import-time',
+        help = "time importing the core modules in fresh interpreters")
+    import_time.add_argument('modules', nargs = '*', help = "defaults to the "
+        "core modules")
+    import_time.add_argument('--runs', type = int, default = 3)
+    import_time.add_argument('--max-ms', type = float, default = None,
+        help = "fail if a module takes longer to import")
+
+    args = parser.parse_args(argv)
+    if args.command == 'import-time':
+        return _import_time(args)
+
+    # Only commands that make requests pay for importing the fetchers
+    import requests
+    from nbastats.http import Client
+    from nbastats.metrics import SummaryReporter
+
+    cache = None
+    if args.cache is not None:
+        from nbastats.cache import ResponseCache
+        cache = ResponseCache(args.cache)
+    reporter = SummaryReporter()
+    client = Client(timeout = args.timeout, base_url = args.base_url,
+        cache = cache, observers = [reporter] if args.metrics else None)
+
+    try:
+        with client:
+            if args.command == 'leaders':
+                from nbastats.player import iter_leaders
+                _write_lines(iter_leaders(Season(args.season), args.season_type,
+                    client))
+            elif args.command == 'shots':
+                from nbastats.player import iter_shot_log
+                _write_lines(iter_shot_log(args.player_id, Season(args.season),
+                    args.season_type, client, **_parse_queries(args.query)))
+            elif args.command == 'game':
+                from nbastats.game import get_game_info, get_line_score
+                fetch = get_line_score if args.line_score else get_game_info
+                _write_lines([fetch(args.game_id, client)])
+    except (ValueError, requests.RequestException, OSError) as e:
+        # Timeouts and dropped connections are common with stats.nba.com
+        print(f"nbastats: error: {e}", file = sys.stderr)
+        return 1
+    finally:
+        if args.metrics:
+            reporter.report(sys.stderr)
+    return 0
+
+# Helper Functions
+def _import_time(args):
+    """Prints the import time of each module, returns 1 if any is too slow."""
+
+    from nbastats.importtime import CORE_MODULES, measure_import
+
+    status = 0
+    for module in args.modules or CORE_MODULES:
+        result = measure_import(module, args.runs)
+        heavy = f" (loads {', '.join(result.heavy_modules)})" if result.heavy_modules else ''
+        print(f"{module:<24} {result.seconds * 1000:>8.1f} ms{heavy}")
+        if args.max_ms is not None and result.seconds * 1000 > args.max_ms:
+            status = 1
+    return status
+
+def _parse_queries(queries):
+    """Parses KEY=VALUE strings into a dictionary."""
+
+    parsed = dict()
+    for query in queries:
+        key, sep, value = query.partition('=')
+        if not sep:
+            raise SystemExit(f"{query} isn't in the KEY=VALUE format")
+        parsed[key] = value
+    return parsed
+
+def _write_lines(rows):
+    """Writes every row as a line of JSON."""
+
+    for row in rows:
+        sys.stdout.write(json.dumps(row) + '\n')
+    sys.stdout.flush()
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,418 @@
+import sqlite3
+import zlib
+import numpy as np
+import pandas as pd
+from nbastats.court import CourtGrid
+
+AGGREGATE_COLUMNS = ['GAME_ID', 'GAME_EVENT_ID', 'PLAYER_ID', 'TEAM_ID',
+    'SHOT_ZONE_BASIC', 'SHOT_ZONE_AREA', 'SHOT_ZONE_RANGE', 'SHOT_TYPE',
+    'SHOT_MADE_FLAG', 'LOC_X', 'LOC_Y']
+
+# Columns that every rollup is keyed on first
+_CHUNK_KEYS = ['season', 'season_type', 'chunk']
+
+# Columns of each rollup that come before the attempts and made counts
+_ROLLUPS = {
+    'player_zones': ['player_id', 'zone_basic', 'zone_area', 'zone_range'],
+    'team_shot_types': ['team_id', 'game_id', 'shot_type'],
+    'team_cells': ['team_id', 'game_id', 'grid', 'cell']
+}
+
+class ShotAggregates(object):
+    """Rollups of the shots of a nbastats.store.ShotStore persisted in SQLite.
+
+    Attempts and made shots are counted per
+        (player, season, shot zone),
+        (team, game, SHOT_TYPE) and
+        (team, game, grid cell) for every grid size in grids,
+    so common queries are index lookups rather than scans of every shot.
+
+    Counts are kept per store chunk. A chunk whose version in the store is the
+    one seen last time is skipped without reading any of its shots. Since
+    chunks only grow through ShotStore.extend, update only aggregates the rows
+    past the count seen last time; a chunk whose earlier rows changed, e.g.
+    one replaced by ShotStore.append, has its counts rebuilt and a removed
+    chunk has them dropped.
+
+    Attributes:
+        filename: A string for the path of the SQLite database.
+        store: The nbastats.store.ShotStore that's aggregated.
+        grids: A list of (grid width, grid length) pairs in court units that
+            cells are counted for.
+    """
+
+    def __init__(self, filename, store, grids = ((25, 25),)):
+        """Initializes a ShotAggregates.
+
+        Arguments:
+            filename: A string for the path of the SQLite database. It's
+                created if it doesn't exist.
+            store: The nbastats.store.ShotStore that's aggregated.
+            grids: An iterable of (grid width, grid length) pairs in court
+                units that cells are counted for, e.g. ((25, 25), (10, 10)).
+        """
+
+        self.filename = filename
+        self.store = store
+        self.grids = [tuple(grid) for grid in grids]
+
+        self._db = sqlite3.connect(filename)
+        with self._db:
+            self._db.execute('''CREATE TABLE IF NOT EXISTS chunks (
+                season TEXT NOT NULL,
+                season_type TEXT NOT NULL,
+                name TEXT NOT NULL,
+                rows INTEGER NOT NULL,
+                fingerprint INTEGER NOT NULL,
+                grids TEXT NOT NULL,
+                version TEXT,
+                PRIMARY KEY (season, season_type, name)
+            )''')
+            # Databases written before chunk versions were kept
+            if 'version' not in [row[1] for row in
+                self._db.execute('PRAGMA table_info(chunks)')
+            ]:
+                self._db.execute('ALTER TABLE chunks ADD COLUMN version TEXT')
+            self._db.execute('''CREATE TABLE IF NOT EXISTS player_zones (
+                season TEXT NOT NULL,
+                season_type TEXT NOT NULL,
+                chunk TEXT NOT NULL,
+                player_id INTEGER NOT NULL,
+                zone_basic TEXT NOT NULL,
+                zone_area TEXT NOT NULL,
+                zone_range TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                made INTEGER NOT NULL,
+                PRIMARY KEY (season, season_type, chunk, player_id, zone_basic,
+                    zone_area, zone_range)
+            )''')
+            self._db.execute('''CREATE TABLE IF NOT EXISTS team_shot_types (
+                season TEXT NOT NULL,
+                season_type TEXT NOT NULL,
+                chunk TEXT NOT NULL,
+                team_id INTEGER NOT NULL,
+                game_id INTEGER NOT NULL,
+                shot_type TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                made INTEGER NOT NULL,
+                PRIMARY KEY (season, season_type, chunk, team_id, game_id, shot_type)
+            )''')
+            self._db.execute('''CREATE TABLE IF NOT EXISTS team_cells (
+                season TEXT NOT NULL,
+                season_type TEXT NOT NULL,
+                chunk TEXT NOT NULL,
+                team_id INTEGER NOT NULL,
+                game_id INTEGER NOT NULL,
+                grid TEXT NOT NULL,
+                cell INTEGER NOT NULL,
+                attempts INTEGER NOT NULL,
+                made INTEGER NOT NULL,
+                PRIMARY KEY (season, season_type, chunk, team_id, game_id, grid, cell)
+            )''')
+            self._db.execute('CREATE INDEX IF NOT EXISTS player_zones_player '
+                'ON player_zones (player_id, season, season_type)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS team_shot_types_team '
+                'ON team_shot_types (team_id, game_id)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS team_cells_grid '
+                'ON team_cells (grid, season, season_type, game_id, team_id)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS team_cells_team '
+                'ON team_cells (team_id, grid, game_id)')
+
+    def update(self, seasons = None, season_types = None, batch_rows = 1 << 20):
+        """Aggregates the shots added to the store since the last update.
+
+        Arguments:
+            seasons: An optional list of Season objects (or their strings) to
+                restrict the update to.
+            season_types: An optional list of season type strings to restrict
+                the update to.
+            batch_rows: An integer for the number of new shots counted at a
+                time, which bounds the memory used.
+
+        Returns:
+            An integer for the number of shots aggregated.
+        """
+
+        grids = _grids_key(self.grids)
+        chunks = self.store.chunks(seasons, season_types)
+        known = {tuple(row[:3]): row[3:] for row in self._db.execute(
+            'SELECT season, season_type, name, rows, fingerprint, grids, version '
+            'FROM chunks')}
+
+        aggregated = 0
+        batch = list()
+        for chunk in chunks:
+            info = self.store.chunk_info(*chunk)
+            previous = known.get(chunk)
+            if previous is not None:
+                rows, fingerprint, previous_grids, version = previous
+                if (previous_grids == grids and rows == info.rows
+                    and version is not None and version == info.version
+                ):
+                    continue
+
+            # Only the event ids are read to tell how the chunk has changed
+            events = _events(self.store.read_chunk(*chunk,
+                columns = ['GAME_ID', 'GAME_EVENT_ID']))
+
+            start = 0
+            if previous is not None:
+                if (previous_grids == grids and rows <= len(events)
+                    and zlib.crc32(events[:rows].tobytes()) == fingerprint
+                ):
+                    start = rows
+                if start == rows == len(events):
+                    # Only the version changed, e.g. the chunk was rewritten
+                    batch.append((chunk, start,
+                        pd.DataFrame(columns = AGGREGATE_COLUMNS), fingerprint,
+                        info.version))
+                    continue
+
+            shots = self.store.read_chunk(*chunk, columns = AGGREGATE_COLUMNS)
+            batch.append((chunk, start, shots.iloc[start:],
+                zlib.crc32(events.tobytes()), info.version))
+            aggregated += len(events) - start
+            if sum(len(entry[2]) for entry in batch) >= batch_rows:
+                self._add_batch(batch, grids)
+                batch = list()
+        self._add_batch(batch, grids)
+
+        # Drop the counts of chunks that were removed from the store
+        seasons = None if seasons is None else set(str(season) for season in seasons)
+        season_types = None if season_types is None else set(season_types)
+        chunks = set(chunks)
+        with self._db:
+            for chunk in known:
+                if (chunk not in chunks
+                    and (seasons is None or chunk[0] in seasons)
+                    and (season_types is None or chunk[1] in season_types)
+                ):
+                    self._delete(chunk)
+        return aggregated
+
+    def player_zones(self, player_id, seasons = None, season_types = None):
+        """Returns a player's attempts and made shots by shot zone.
+
+        Arguments:
+            player_id: An integer id of a player.
+            seasons: An optional list of Season objects (or their strings).
+            season_types: An optional list of season type strings.
+
+        Returns:
+            A pandas.DataFrame with a row per (season, season_type, zone_basic,
+            zone_area, zone_range) and the attempts and made shots.
+        """
+
+        keys = ['season', 'season_type', 'zone_basic', 'zone_area', 'zone_range']
+        return self._select('player_zones', {'player_id': player_id}, seasons,
+            season_types, keys)
+
+    def team_shot_types(self, team_id, seasons = None, season_types = None):
+        """Returns a team's attempts and made shots by SHOT_TYPE per game.
+
+        The attempts are the counts of shots_to_shot_types in
+        analysis/game_outcome/preprocessing.py.
+
+        Returns:
+            A pandas.DataFrame with a row per (game_id, shot_type) and the
+            attempts and made shots.
+        """
+
+        return self._select('team_shot_types', {'team_id': team_id}, seasons,
+            season_types, ['game_id', 'shot_type'])
+
+    def team_cells(self, team_id, grid = None, seasons = None, season_types = None):
+        """Returns a team's attempts and made shots by grid cell per game.
+
+        Arguments:
+            team_id: An integer id of a team.
+            grid: A (grid width, grid length) pair of grids, defaults to the
+                first one.
+            seasons: An optional list of Season objects (or their strings).
+            season_types: An optional list of season type strings.
+
+        Returns:
+            A pandas.DataFrame with a row per (game_id, cell) with shots and
+            the attempts and made shots. Cells are numbered in row-major order
+            as in shots_to_grid_features_wrapper.
+        """
+
+        return self._select('team_cells', {'team_id': team_id,
+            'grid': _grid_key(self._grid(grid))}, seasons, season_types,
+            ['game_id', 'cell'])
+
+    def grid_features(self, grid = None, seasons = None, season_types = None):
+        """Returns the attempts in every cell of every (game, team).
+
+        The features are identical to those of the function of
+        shots_to_grid_features_wrapper in analysis/game_outcome/preprocessing.py
+        for the same court and grid, without reading a single shot.
+
+        Arguments:
+            grid: A (grid width, grid length) pair of grids, defaults to the
+                first one.
+            seasons: An optional list of Season objects (or their strings).
+            season_types: An optional list of season type strings.
+
+        Returns:
+            A pair of a pandas.MultiIndex of sorted (GAME_ID, TEAM_ID) keys and
+            a 2D numpy.array with the attempts of each key as a row.
+        """
+
+        grid_width, grid_length = self._grid(grid)
+        size = CourtGrid.half_court(grid_width, grid_length).size
+
+        # Teams with shots that are all off the court still get a row of zeros
+        keys = self._select('team_shot_types', {}, seasons, season_types,
+            ['game_id', 'team_id'])
+        cells = self._select('team_cells',
+            {'grid': _grid_key((grid_width, grid_length))}, seasons, season_types,
+            ['game_id', 'team_id', 'cell'])
+
+        keys = pd.MultiIndex.from_frame(keys.drop(columns = ['attempts', 'made']),
+            names = ['GAME_ID', 'TEAM_ID'])
+        features = np.zeros((len(keys), size), dtype = np.int64)
+        if len(cells):
+            rows = keys.get_indexer(pd.MultiIndex.from_arrays([cells.game_id,
+                cells.team_id]))
+            features[rows, cells.cell.to_numpy()] = cells.attempts.to_numpy()
+        return keys, features
+
+    def close(self):
+        """Closes the database."""
+
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _grid(self, grid):
+        if grid is None:
+            return self.grids[0]
+        grid = tuple(grid)
+        if grid not in self.grids:
+            raise ValueError(f"{grid} isn't one of the aggregated grids")
+        return grid
+
+    def _add_batch(self, batch, grids):
+        """Adds the counts of the new shots of chunks to every rollup in one
+        transaction, along with the chunks' new row counts.
+
+        Arguments:
+            batch: A list of (chunk, start, new shots, fingerprint, version)
+                where start is 0 if the chunk's counts are rebuilt.
+            grids: A string for the key of the aggregated grids.
+        """
+
+        if not batch:
+            return
+
+        frames = [shots.assign(SEASON = chunk[0], SEASON_TYPE = chunk[1],
+            CHUNK = chunk[2]) for chunk, _, shots, _, _ in batch if len(shots)]
+        with self._db:
+            for chunk, start, shots, fingerprint, version in batch:
+                if start == 0:
+                    self._delete(chunk)
+                self._db.execute('INSERT OR REPLACE INTO chunks (season, '
+                    'season_type, name, rows, fingerprint, grids, version) VALUES '
+                    '(?, ?, ?, ?, ?, ?, ?)', chunk + (start + len(shots),
+                    fingerprint, grids, version))
+            if frames:
+                self._add(pd.concat(frames, ignore_index = True, sort = False))
+
+    def _add(self, shots):
+        """Adds the counts of shots to every rollup."""
+
+        shots = pd.DataFrame({
+            'season': shots.SEASON.to_numpy(),
+            'season_type': shots.SEASON_TYPE.to_numpy(),
+            'chunk': shots.CHUNK.to_numpy(),
+            'player_id': shots.PLAYER_ID.to_numpy(dtype = np.int64),
+            'team_id': shots.TEAM_ID.to_numpy(dtype = np.int64),
+            'game_id': shots.GAME_ID.to_numpy(dtype = np.int64),
+            'zone_basic': shots.SHOT_ZONE_BASIC.astype(str).to_numpy(),
+            'zone_area': shots.SHOT_ZONE_AREA.astype(str).to_numpy(),
+            'zone_range': shots.SHOT_ZONE_RANGE.astype(str).to_numpy(),
+            'shot_type': shots.SHOT_TYPE.astype(str).to_numpy(),
+            'made': shots.SHOT_MADE_FLAG.to_numpy(dtype = np.int64),
+            'loc_x': shots.LOC_X.to_numpy(dtype = np.int64),
+            'loc_y': shots.LOC_Y.to_numpy(dtype = np.int64)
+        })
+
+        for table in ('player_zones', 'team_shot_types'):
+            self._upsert(table, _count(shots, _CHUNK_KEYS + _ROLLUPS[table]))
+
+        for grid in self.grids:
+            valid, cells = CourtGrid.half_court(*grid).cells(shots.loc_x.to_numpy(),
+                shots.loc_y.to_numpy())
+            frame = shots[valid].assign(grid = _grid_key(grid), cell = cells)
+            self._upsert('team_cells', _count(frame, _CHUNK_KEYS + _ROLLUPS['team_cells']))
+
+    def _upsert(self, table, counts):
+        """Adds counts to the rows of a rollup, inserting missing rows."""
+
+        keys = _CHUNK_KEYS + _ROLLUPS[table]
+        rows = [tuple(_to_python(value) for value in row)
+            for row in counts.itertuples(index = False)]
+        matches = ' AND '.join(f'{key} = ?' for key in keys)
+
+        # Works on versions of SQLite without upserts
+        self._db.executemany(f'INSERT OR IGNORE INTO {table} ({", ".join(keys)}, '
+            f'attempts, made) VALUES ({", ".join("?" * len(keys))}, 0, 0)',
+            [row[:-2] for row in rows])
+        self._db.executemany(f'UPDATE {table} SET attempts = attempts + ?, '
+            f'made = made + ? WHERE {matches}', [row[-2:] + row[:-2] for row in rows])
+
+    def _delete(self, chunk):
+        for table in _ROLLUPS:
+            self._db.execute(f'DELETE FROM {table} WHERE season = ? AND '
+                'season_type = ? AND chunk = ?', chunk)
+        self._db.execute('DELETE FROM chunks WHERE season = ? AND '
+            'season_type = ? AND name = ?', chunk)
+
+    def _select(self, table, filters, seasons, season_types, group_by):
+        """Sums the counts of a rollup over chunks, grouped by group_by."""
+
+        conditions = [f'{key} = ?' for key in filters]
+        values = [_to_python(value) for value in filters.values()]
+        for column, options in (('season', seasons), ('season_type', season_types)):
+            if options is not None:
+                options = [str(option) for option in options]
+                conditions.append(f'{column} IN ({", ".join("?" * len(options))})')
+                values += options
+
+        where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+        rows = self._db.execute(f'SELECT {", ".join(group_by)}, SUM(attempts), '
+            f'SUM(made) FROM {table} {where} GROUP BY {", ".join(group_by)} '
+            f'ORDER BY {", ".join(group_by)}', values).fetchall()
+        return pd.DataFrame(rows, columns = group_by + ['attempts', 'made'])
+
+# Helper Functions
+def _count(frame, keys):
+    """Counts the attempts and sums the made shots of frame by keys."""
+
+    grouped = frame.groupby(keys, sort = False)['made']
+    return pd.DataFrame({'attempts': grouped.size(), 'made': grouped.sum()}
+        ).reset_index()
+
+def _events(shots):
+    """Returns the (GAME_ID, GAME_EVENT_ID) of every shot as a 2D array whose
+    leading rows' bytes fingerprint a prefix of the chunk."""
+
+    return np.ascontiguousarray(np.column_stack((
+        shots.GAME_ID.to_numpy(dtype = np.int64),
+        shots.GAME_EVENT_ID.to_numpy(dtype = np.int64))))
+
+def _grid_key(grid):
+    return f'{grid[0]}x{grid[1]}'
+
+def _grids_key(grids):
+    return ','.join(_grid_key(grid) for grid in sorted(grids))
+
+def _to_python(value):
+    """Converts a numpy scalar to the equivalent python scalar for SQLite."""
+
+    return value.item() if isinstance(value, np.generic) else value
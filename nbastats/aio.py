@@ -0,0 +1,371 @@
+import asyncio
+import time
+from nbastats.game import (GAME_INFO_URL, decode_game_info, decode_line_score,
+    game_query)
+from nbastats.http import DEFAULT_HEADERS, RETRY_STATUSES, BaseClient
+from nbastats.options import canonical_query
+from nbastats.player import (LEADERBOARDS_URL, PLAYER_SHOT_LOG_URL,
+    decode_leaders, decode_shot_log, leaders_query, shot_log_query)
+
+class AsyncClient(BaseClient):
+    """An asyncio HTTP client backed by a pooled aiohttp session.
+
+    aiohttp is optional and only imported once the first request is made. The
+    session is created on the event loop of the first request. If the client
+    is later used on a different loop once the first one is closed, e.g. by
+    another asyncio.run, the old session is closed and a new one is created;
+    using it from two loops that are both open raises RuntimeError. Closing
+    the client before its loop ends releases the connections cleanly.
+
+    Every request shares the session's connection pool and waits on a
+    semaphore, so any number of requests can be awaited at once while only
+    max_concurrency of them are sent at a time. Retries, caching and observers
+    work as they do for nbastats.http.Client. The cache is read and written
+    on the event loop's default executor so SQLite never blocks the loop, and
+    responses are decoded there too, so observers are notified of decoded
+    responses from the executor's threads.
+
+    Attributes:
+        max_concurrency: An integer for the number of requests in flight.
+        headers: A dictionary of the headers sent with every request.
+        timeout: A number of seconds (or a (connect, read) pair) before a
+            request is abandoned.
+        retries: An integer for the number of retries after the first attempt.
+        backoff_factor: A number of seconds that the backoff is scaled by.
+        max_backoff: A number of seconds that a single backoff won't exceed.
+        base_url: An optional string such as 'http://127.0.0.1:8000' that
+            replaces the scheme and host of every requested url.
+        cache: An optional nbastats.cache.ResponseCache that successful
+            responses are served from and stored in.
+        observers: A list of nbastats.metrics.Observer notified of every
+            request, retry and decoded response.
+    """
+
+    def __init__(self, max_concurrency = 10, timeout = 30, retries = 3,
+        backoff_factor = 0.5, max_backoff = 30, base_url = None, headers = None,
+        cache = None, observers = None
+    ):
+        """Initializes an AsyncClient.
+
+        Arguments:
+            max_concurrency: An integer for the number of requests in flight,
+                which is also the size of the connection pool.
+            timeout: A number of seconds (or a (connect, read) pair) before a
+                request is abandoned.
+            retries: An integer for the number of retries after the first
+                attempt.
+            backoff_factor: A number of seconds that the backoff is scaled by.
+                The n-th retry sleeps up to backoff_factor * 2 ** n seconds.
+            max_backoff: A number of seconds that a single backoff won't exceed.
+            base_url: An optional string that replaces the scheme and host of
+                every requested url.
+            headers: An optional dictionary of headers sent with every request
+                in place of nbastats.http.DEFAULT_HEADERS.
+            cache: An optional nbastats.cache.ResponseCache that successful
+                responses are served from and stored in.
+            observers: An optional list of nbastats.metrics.Observer notified
+                of every request, retry and decoded response.
+        """
+
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        super().__init__(timeout, retries, backoff_factor, max_backoff, base_url,
+            cache, observers)
+        self.max_concurrency = max_concurrency
+        self.headers = dict(DEFAULT_HEADERS if headers is None else headers)
+        self._session = None
+        self._semaphore = None
+        self._loop = None
+
+    async def get(self, url, params = None):
+        """Makes a request and returns the string response.
+
+        Arguments:
+            url: A string for the base url.
+            params: A dictionary for any queries.
+
+        Raises:
+            aiohttp.ClientError: If the request still can't be completed after
+                all retries.
+            asyncio.TimeoutError: If the last attempt timed out.
+
+        Returns:
+            A string of the response decoded based on the encoding format in
+            the returned header.
+        """
+
+        body, encoding = await self.get_content(url, params)
+        return body.decode(encoding or 'utf-8')
+
+    async def get_content(self, url, params = None):
+        """Makes a request, or reads it from the cache, and returns the body.
+
+        Arguments:
+            url: A string for the base url.
+            params: A dictionary for any queries.
+
+        Raises:
+            aiohttp.ClientError: If the request still can't be completed after
+                all retries.
+            asyncio.TimeoutError: If the last attempt timed out.
+
+        Returns:
+            A (body bytes, encoding) pair where encoding is the encoding format
+            in the returned header or None if there wasn't one.
+        """
+
+        start = time.perf_counter()
+        url = self._resolve(url)
+        if self.cache is not None:
+            cached = await _in_executor(self.cache.get, url, params)
+            if cached is not None:
+                self._notify_request(url, params, 200, start, len(cached[0]), 0,
+                    True)
+                return cached
+
+        status, body, encoding, retries = await self._request(url, params, start)
+        self._notify_request(url, params, status, start, len(body), retries)
+        if self.cache is not None and status == 200:
+            await _in_executor(self.cache.set, url, params, body, encoding)
+        return body, encoding
+
+    async def close(self):
+        """Closes every pooled connection."""
+
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _request(self, url, params, start):
+        """Sends a GET request, retrying throttled and failed attempts.
+
+        Returns:
+            A (status code, body bytes, encoding, number of retries) tuple.
+        """
+
+        import aiohttp
+        from yarl import URL
+
+        session, semaphore = await self._connect()
+        query = canonical_query(params)
+        request_url = URL(f'{url}?{query}' if query else url, encoded = True)
+
+        for attempt in range(self.retries + 1):
+            try:
+                async with semaphore:
+                    async with session.get(request_url) as response:
+                        body = await response.read()
+                        status = response.status
+                        encoding = response.charset
+                        retry_after = response.headers.get('Retry-After')
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    self._notify_request(url, params, None, start, 0, attempt,
+                        error = e)
+                    raise
+                await self._retry(url, attempt, None, e)
+                continue
+
+            if status not in RETRY_STATUSES or attempt == self.retries:
+                return status, body, encoding, attempt
+            await self._retry(url, attempt, status, None, retry_after)
+
+    async def _retry(self, url, attempt, status, error, retry_after = None):
+        """Notifies the observers of a failed attempt and sleeps before the
+        next one."""
+
+        delay = self._backoff(attempt, retry_after)
+        self._notify_retry(url, attempt, status, error, delay)
+        await asyncio.sleep(delay)
+
+    async def _connect(self):
+        """Returns the session and the semaphore of the running event loop,
+        creating them if needed and closing the session of a closed loop."""
+
+        import aiohttp
+
+        loop = asyncio.get_event_loop()
+        stale = None
+        if self._session is not None and self._loop is not loop:
+            if not self._loop.is_closed():
+                raise RuntimeError("the AsyncClient's session belongs to another "
+                    "event loop that's still open, close the client first")
+            stale = self._session
+            self._session = None
+
+        if self._session is None:
+            if isinstance(self.timeout, tuple):
+                connect, read = self.timeout
+                timeout = aiohttp.ClientTimeout(sock_connect = connect,
+                    sock_read = read)
+            else:
+                timeout = aiohttp.ClientTimeout(total = self.timeout)
+            self._session = aiohttp.ClientSession(headers = self.headers,
+                timeout = timeout, connector = aiohttp.TCPConnector(
+                    limit = self.max_concurrency))
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+
+        # Only closed once the new session is set, so no other request opens one
+        if stale is not None:
+            await stale.close()
+        return self._session, self._semaphore
+
+_default_client = None
+
+def get_default_client():
+    """Returns the AsyncClient shared by every async fetcher, creating it if
+    needed."""
+
+    global _default_client
+    if _default_client is None:
+        _default_client = AsyncClient()
+    return _default_client
+
+def set_default_client(client):
+    """Replaces the AsyncClient shared by every async fetcher.
+
+    Arguments:
+        client: An AsyncClient, or None to create a new default AsyncClient on
+            next use.
+    """
+
+    global _default_client
+    _default_client = client
+
+async def get_response(url, params, client = None):
+    """Makes a request and returns the string response.
+
+    Arguments:
+        url: A string for the base url.
+        params: A dictionary for any queries.
+        client: An optional AsyncClient, the default AsyncClient is used
+            otherwise.
+
+    Returns:
+        A string of the response decoded based on the encoding format in the
+        returned header.
+    """
+
+    if client is None:
+        client = get_default_client()
+    return await client.get(url, params)
+
+async def get_shot_log(player_id, season, season_type, client = None,
+    as_frame = False, **kwargs
+):
+    """Gets the shot log for a player from NBA stats.
+
+    The response is decoded exactly as by nbastats.player.get_shot_log once
+    the whole response is received, on the event loop's default executor so
+    other requests keep going meanwhile.
+
+    Arguments:
+        player_id: An integer id of a player.
+        season: A Season object for the season.
+        season_type: A string for the season type.
+        client: An optional AsyncClient used for the request.
+        as_frame: A boolean for whether to return a pandas.DataFrame instead.
+        kwargs: Any other queries supported by the NBA stats api.
+
+    Raises:
+        ValueError: If the arguments provided aren't valid queries or the query
+            doesn't conform to the NBA stats api.
+
+    Returns:
+        A list of dictionaries where each describes a shot, as returned by
+        nbastats.player.get_shot_log.
+    """
+
+    params = shot_log_query(player_id, season, season_type, **kwargs)
+    if client is None:
+        client = get_default_client()
+    body, encoding = await client.get_content(PLAYER_SHOT_LOG_URL, params)
+    return await _in_executor(decode_shot_log, body, encoding, as_frame, client)
+
+async def get_leaders(season, season_type, client = None, as_frame = False):
+    """Gets the leaders of a season in descending sorted order.
+
+    The response is decoded on the event loop's default executor.
+
+    Arguments:
+        season: A Season object for the season.
+        season_type: A string for the season type.
+        client: An optional AsyncClient used for the request.
+        as_frame: A boolean for whether to return a pandas.DataFrame instead.
+
+    Raises:
+        ValueError: If the query doesn't conform to the NBA stats api.
+
+    Returns:
+        A list of players sorted by descending order, as returned by
+        nbastats.player.get_leaders.
+    """
+
+    params = leaders_query(season, season_type)
+    if client is None:
+        client = get_default_client()
+    body, encoding = await client.get_content(LEADERBOARDS_URL, params)
+    return await _in_executor(decode_leaders, body, encoding, as_frame, client)
+
+async def get_game_info(game_id, client = None):
+    """Gets the summary of a game from NBA stats.
+
+    The response is decoded on the event loop's default executor.
+
+    Arguments:
+        game_id: An integer id of a game.
+        client: An optional AsyncClient used for the request.
+
+    Raises:
+        ValueError: If game_id isn't an int or the response doesn't conform to
+            the NBA stats api.
+
+    Returns:
+        A dictionary of the game's summary, as returned by
+        nbastats.game.get_game_info.
+    """
+
+    params = game_query(game_id)
+    if client is None:
+        client = get_default_client()
+    body, encoding = await client.get_content(GAME_INFO_URL, params)
+    return await _in_executor(decode_game_info, body, encoding, client)
+
+async def get_line_score(game_id, client = None):
+    """Gets the line score and winner of a game from NBA stats.
+
+    The response is decoded on the event loop's default executor.
+
+    Arguments:
+        game_id: An integer id of a game.
+        client: An optional AsyncClient used for the request.
+
+    Raises:
+        ValueError: If game_id isn't an int or the response doesn't conform to
+            the NBA stats api.
+
+    Returns:
+        A dictionary with the 'home' and 'visiting' line scores and the
+        'winner' team info, as returned by nbastats.game.get_line_score.
+    """
+
+    params = game_query(game_id)
+    if client is None:
+        client = get_default_client()
+    body, encoding = await client.get_content(GAME_INFO_URL, params)
+    return await _in_executor(decode_line_score, body, encoding, client)
+
+# Helper Functions
+def _in_executor(function, *args):
+    """Returns a future of function(*args) run on the default executor of the
+    running event loop."""
+
+    return asyncio.get_event_loop().run_in_executor(None, function, *args)
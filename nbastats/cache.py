@@ -0,0 +1,218 @@
+import sqlite3
+import threading
+import time
+import zlib
+# canonical_query moved to nbastats.options and is still importable from here
+from nbastats.options import Season, canonical_query, request_key
+
+# The number of least recently used responses read at a time while evicting
+EVICTION_BATCH = 64
+
+def season_ttl(current_ttl = 60 * 60):
+    """A wrapper that expires responses of the current season only.
+
+    The season of a request is read from its 'Season' query or from the season
+    encoded in its 'GameID' query, e.g. '0021800001' is a game of 2018-19.
+    Responses of past seasons never change so they never expire.
+
+    Arguments:
+        current_ttl: A number of seconds that responses of the current season
+            and requests without a season stay cached for.
+    """
+
+    def ttl(url, params):
+        season_year = _season_year(params or {})
+        if season_year is not None and season_year < Season.current().season_year:
+            return None
+        return current_ttl
+
+    return ttl
+
+class ResponseCache(object):
+    """A persistent, size-capped cache of response bodies stored in SQLite.
+
+    Bodies are keyed on the url and the canonicalized queries, stored zlib
+    compressed and evicted in least recently used order once the compressed
+    bodies exceed max_size bytes. The cache is safe to share between threads,
+    but not between processes since it keeps a running total of the size of
+    the stored bodies.
+
+    Attributes:
+        filename: A string for the path of the SQLite database.
+        max_size: An integer for the maximum number of bytes of stored bodies.
+        ttl: A function that takes the url and the params of a request and
+            returns the number of seconds its response stays fresh, or None if
+            it never expires.
+        hits: An integer for the number of requests served from the cache.
+        misses: An integer for the number of requests not in the cache.
+        evictions: An integer for the number of bodies evicted by size.
+    """
+
+    def __init__(self, filename, max_size = 1 << 30, ttl = None):
+        """Initializes a ResponseCache.
+
+        Arguments:
+            filename: A string for the path of the SQLite database. It's
+                created if it doesn't exist.
+            max_size: An integer for the maximum number of bytes of stored
+                bodies, 1 GiB by default.
+            ttl: An optional function that takes the url and the params of a
+                request and returns the number of seconds its response stays
+                fresh, or None if it never expires. Defaults to season_ttl().
+        """
+
+        self.filename = filename
+        self.max_size = max_size
+        self.ttl = season_ttl() if ttl is None else ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(filename, check_same_thread = False)
+        with self._db:
+            self._db.execute('''CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                encoding TEXT,
+                size INTEGER NOT NULL,
+                expires REAL,
+                accessed REAL NOT NULL
+            )''')
+            self._db.execute('CREATE INDEX IF NOT EXISTS responses_accessed '
+                'ON responses (accessed)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS responses_expires '
+                'ON responses (expires)')
+        self._size = self._db.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def get(self, url, params):
+        """Returns the cached response of a request.
+
+        Arguments:
+            url: A string for the base url.
+            params: A dictionary for any queries.
+
+        Returns:
+            A (body bytes, encoding) pair, or None if the response isn't
+            cached or has expired.
+        """
+
+        key = self.key(url, params)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute('SELECT body, encoding, expires FROM responses '
+                'WHERE key = ?', (key,)).fetchone()
+            if row is None or (row[2] is not None and row[2] <= now):
+                self.misses += 1
+                return None
+
+            with self._db:
+                self._db.execute('UPDATE responses SET accessed = ? WHERE key = ?',
+                    (now, key))
+            self.hits += 1
+        return zlib.decompress(row[0]), row[1]
+
+    def set(self, url, params, body, encoding):
+        """Caches the response of a request.
+
+        Arguments:
+            url: A string for the base url.
+            params: A dictionary for any queries.
+            body: The bytes of the response body.
+            encoding: A string for the encoding of body, or None.
+        """
+
+        key = self.key(url, params)
+        compressed = zlib.compress(body)
+        now = time.time()
+        ttl = self.ttl(url, params)
+        expires = None if ttl is None else now + ttl
+
+        with self._lock, self._db:
+            replaced = self._db.execute('SELECT size FROM responses WHERE key = ?',
+                (key,)).fetchone()
+            self._db.execute('INSERT OR REPLACE INTO responses '
+                '(key, body, encoding, size, expires, accessed) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (key, compressed, encoding, len(compressed), expires, now))
+            self._size += len(compressed) - (replaced[0] if replaced else 0)
+            self._evict(now)
+
+    def clear(self):
+        """Removes every cached response."""
+
+        with self._lock, self._db:
+            self._db.execute('DELETE FROM responses')
+            self._size = 0
+
+    def stats(self):
+        """Returns a dictionary of the hits, misses, evictions, number of
+        cached responses and their compressed size in bytes."""
+
+        with self._lock:
+            count = self._db.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+            size = self._size
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': count,
+            'size': size
+        }
+
+    def close(self):
+        """Closes the database."""
+
+        self._db.close()
+
+    @staticmethod
+    def key(url, params):
+        """Returns the cache key of a request."""
+
+        return request_key(url, params)
+
+    def _evict(self, now):
+        """Removes expired responses then least recently used responses until
+        the stored bodies fit in max_size.
+
+        Both are read through an index, so an insert that doesn't evict costs
+        the same however many responses are cached.
+        """
+
+        expired = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM responses '
+            'WHERE expires <= ?', (now,)).fetchone()[0]
+        if expired:
+            self._db.execute('DELETE FROM responses WHERE expires <= ?', (now,))
+            self._size -= expired
+
+        while self._size > self.max_size:
+            rows = self._db.execute('SELECT key, size FROM responses '
+                'ORDER BY accessed LIMIT ?', (EVICTION_BATCH,)).fetchall()
+            if not rows:
+                break
+            evicted = list()
+            for key, entry_size in rows:
+                if self._size <= self.max_size:
+                    break
+                evicted.append((key,))
+                self._size -= entry_size
+            self._db.executemany('DELETE FROM responses WHERE key = ?', evicted)
+            self.evictions += len(evicted)
+
+# Helper Functions
+def _season_year(params):
+    """Returns the year a request's season begins, or None if it's unknown."""
+
+    season = params.get('Season')
+    if season:
+        try:
+            return int(str(season)[:4])
+        except ValueError:
+            return None
+
+    game_id = str(params.get('GameID', ''))
+    if len(game_id) == 10 and game_id.isdigit():
+        year = int(game_id[3:5])
+        return year + (1900 if year >= 46 else 2000)
+    return None
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import CategoricalDtype, union_categoricals
+
+# Explicit dtypes of the shotchartdetail 'Shot_Chart_Detail' columns. Strings
+# repeated across shots are stored as categoricals.
+SHOT_LOG_DTYPES = {
+    'GRID_TYPE': 'category',
+    'GAME_ID': np.int64,
+    'GAME_EVENT_ID': np.int32,
+    'PLAYER_ID': np.int64,
+    'PLAYER_NAME': 'category',
+    'TEAM_ID': np.int64,
+    'TEAM_NAME': 'category',
+    'PERIOD': np.int8,
+    'MINUTES_REMAINING': np.int8,
+    'SECONDS_REMAINING': np.int8,
+    'EVENT_TYPE': 'category',
+    'ACTION_TYPE': 'category',
+    'SHOT_TYPE': 'category',
+    'SHOT_ZONE_BASIC': 'category',
+    'SHOT_ZONE_AREA': 'category',
+    'SHOT_ZONE_RANGE': 'category',
+    'SHOT_DISTANCE': np.int16,
+    'LOC_X': np.int16,
+    'LOC_Y': np.int16,
+    'SHOT_ATTEMPTED_FLAG': np.int8,
+    'SHOT_MADE_FLAG': np.int8,
+    'GAME_DATE': 'category',
+    'HTM': 'category',
+    'VTM': 'category'
+}
+
+# The 'Shot_Chart_Detail' columns in response order, e.g. of an empty shot log
+SHOT_LOG_HEADERS = list(SHOT_LOG_DTYPES)
+
+# Explicit dtypes of the leaguedashplayerstats columns that aren't floats.
+LEADERS_DTYPES = {
+    'PLAYER_ID': np.int64,
+    'PLAYER_NAME': object,
+    'TEAM_ID': np.int64,
+    'TEAM_ABBREVIATION': 'category'
+}
+
+def result_set_to_frame(headers, rows, dtypes = None):
+    """Builds a pandas.DataFrame column by column from a NBA stats result set.
+
+    Unlike a list of dictionaries, every value is stored once in a typed column
+    and the headers aren't repeated per row.
+
+    Arguments:
+        headers: A list of strings for the column names.
+        rows: A list of lists where each is a row of values in header order.
+        dtypes: An optional dictionary of column names to numpy dtypes or
+            'category'. Other columns have their dtypes inferred.
+
+    Returns:
+        A pandas.DataFrame with a column per header.
+    """
+
+    if dtypes is None:
+        dtypes = {}
+
+    columns = zip(*rows) if rows else [()] * len(headers)
+    data = dict()
+    for header, column in zip(headers, columns):
+        dtype = dtypes.get(header)
+        if dtype is None:
+            data[header] = pd.Series(column, dtype = None if column else object)
+        elif dtype == 'category':
+            data[header] = pd.Categorical(column)
+        else:
+            data[header] = np.array(column, dtype = dtype)
+    return pd.DataFrame(data, columns = headers)
+
+def concat_frames(frames, headers = None):
+    """Concatenates frames built from result sets, keeping categoricals.
+
+    Arguments:
+        frames: A list of pandas.DataFrame.
+        headers: An optional list of column names used when frames is empty.
+    """
+
+    if not frames:
+        return pd.DataFrame(columns = headers)
+    if len(frames) == 1:
+        return frames[0]
+
+    combined = pd.concat(frames, ignore_index = True)
+    for header in frames[0].columns:
+        columns = [frame[header] for frame in frames if header in frame]
+        if len(columns) == len(frames) and all(
+            isinstance(column.dtype, CategoricalDtype) for column in columns
+        ):
+            combined[header] = union_categoricals(columns)
+    return combined
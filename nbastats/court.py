@@ -0,0 +1,59 @@
+from math import ceil
+import numpy as np
+
+# The half court that shot coordinates are binned on
+COURT_WIDTH = 500 # X axis or bounding width of a basketball court
+COURT_LENGTH = 375 # Y axis or bounding length of half a basketball court
+WIDTH_SHIFT = 250 # X axis values start from -250
+LENGTH_SHIFT = 50 # Y axis values start from -50
+
+class CourtGrid(object):
+    """Maps shot coordinates to the grids of a court.
+
+    Coordinates are shifted by (width_shift, length_shift) and shots outside of
+    the width x length court are dropped. The court is padded evenly on both
+    sides to a multiple of the grid size and grids are numbered in row-major
+    order.
+
+    Attributes:
+        size: An integer for the number of grids of the court.
+    """
+
+    def __init__(self, width, length, width_shift = 0, length_shift = 0,
+        grid_width = 1, grid_length = 1
+    ):
+        self.width = width
+        self.length = length
+        self.width_shift = width_shift
+        self.length_shift = length_shift
+        self.grid_width = grid_width
+        self.grid_length = grid_length
+
+        self.width_chunks = ceil(width / grid_width)
+        self.length_chunks = ceil(length / grid_length)
+        self.width_pad = (self.width_chunks * grid_width - width) // 2
+        self.length_pad = (self.length_chunks * grid_length - length) // 2
+        self.size = self.width_chunks * self.length_chunks
+
+    @classmethod
+    def half_court(cls, grid_width = 1, grid_length = 1):
+        """Returns the CourtGrid of the half court of the NBA stats api's shot
+        coordinates, e.g. LOC_X and LOC_Y of a shot log."""
+
+        return cls(COURT_WIDTH, COURT_LENGTH, WIDTH_SHIFT, LENGTH_SHIFT,
+            grid_width, grid_length)
+
+    def cells(self, loc_x, loc_y):
+        """Locates shots on the grids.
+
+        Returns:
+            A pair of a boolean mask of the shots that are on the court and the
+            grid numbers of those shots.
+        """
+
+        x = np.asarray(loc_x, dtype = np.int64) + self.width_shift
+        y = np.asarray(loc_y, dtype = np.int64) + self.length_shift
+        valid = (x >= 0) & (x < self.width) & (y >= 0) & (y < self.length)
+        rows = (y[valid] + self.length_pad) // self.grid_length
+        cols = (x[valid] + self.width_pad) // self.grid_width
+        return valid, rows * self.width_chunks + cols
@@ -0,0 +1,182 @@
+import codecs
+import json
+import re
+
+RESULT_SETS_TOKEN = '"resultSets"'
+
+# The JSON backends that load_result_sets can use, fastest first
+BACKENDS = ('orjson', 'json')
+
+_DECODER = json.JSONDecoder()
+
+# A result set whose name comes first, as in every NBA stats api response
+_NAMED_SET = re.compile(r'\{\s*"name"\s*:\s*("(?:[^"\\]|\\.)*")')
+
+# The strings and brackets of a JSON value, enough to find where it ends
+_TOKENS = re.compile(r'"(?:[^"\\]|\\.)*"|[\[\]{}]')
+
+_SEPARATORS = re.compile(r'[\s,]*')
+_WHITESPACE = re.compile(r'\s*')
+
+_backend = None
+
+def get_backend():
+    """Returns the name of the fastest installed backend in BACKENDS."""
+
+    global _backend
+    if _backend is None:
+        try:
+            import orjson
+            _backend = 'orjson'
+        except ImportError:
+            _backend = 'json'
+    return _backend
+
+def load_result_sets(body, encoding = None, names = None, count = None,
+    backend = None
+):
+    """Decodes the result sets of a NBA stats api response from its bytes.
+
+    With the json backend only the result sets that are needed are decoded:
+    the others are skipped over without building their rows, and the rest of
+    the response is never read once every set in names, or count sets, are
+    found. orjson decodes a whole response faster than json skips parts of
+    it, so its results are trimmed the same way after decoding.
+
+    Arguments:
+        body: The bytes (or string) of the response body.
+        encoding: An optional string for the encoding of body, defaults to
+            'utf-8'.
+        names: An optional collection of the names of the result sets to
+            decode, e.g. ['LineScore']. Every set is decoded if it's None.
+        count: An optional integer for the number of result sets to return.
+        backend: An optional string in BACKENDS, defaults to get_backend().
+
+    Raises:
+        ValueError: If body isn't a JSON object with 'resultSets', e.g. an
+            error message of the NBA stats api.
+
+    Returns:
+        A list of the result set dictionaries in response order, up to count
+        of them and up to the last set in names. Sets that aren't in names are
+        None so every set keeps its position.
+    """
+
+    if backend is None:
+        backend = get_backend()
+    if backend not in BACKENDS:
+        raise ValueError(f"{backend} is not a JSON backend, use one of {BACKENDS}")
+
+    if backend == 'orjson':
+        import orjson
+
+        # orjson reads utf-8 bytes or a string
+        if (isinstance(body, bytes) and encoding is not None
+            and _codec_name(encoding) != 'utf-8'
+        ):
+            body = body.decode(encoding)
+        decoded = orjson.loads(body)
+        if not isinstance(decoded, dict) or 'resultSets' not in decoded:
+            raise ValueError("response has no resultSets")
+        return _trim(decoded['resultSets'], names, count)
+
+    if isinstance(body, bytes):
+        body = body.decode(encoding or 'utf-8')
+    return _scan(body, names, count)
+
+def api_error(body, encoding = None):
+    """Returns the ValueError of a response that isn't a NBA stats api result,
+    with the response's text as the message."""
+
+    if isinstance(body, bytes):
+        body = body.decode(encoding or 'utf-8', 'replace')
+    return ValueError(f"API error - {body}")
+
+# Helper Functions
+def _trim(result_sets, names, count):
+    """Trims decoded result sets as load_result_sets does while scanning."""
+
+    remaining = None if names is None else set(names)
+    trimmed = list()
+    for result_set in result_sets:
+        if count is not None and len(trimmed) == count:
+            break
+        if remaining is not None and not remaining:
+            break
+
+        name = result_set.get('name')
+        if names is not None and name is not None and name not in names:
+            trimmed.append(None)
+            continue
+        trimmed.append(result_set)
+        if remaining is not None:
+            remaining.discard(name)
+    return trimmed
+
+def _scan(text, names, count):
+    """Decodes the result sets of a response string with json, skipping the
+    sets that aren't needed."""
+
+    index = text.find(RESULT_SETS_TOKEN)
+    if index < 0:
+        raise ValueError("response has no resultSets")
+    index = _expect(text, index + len(RESULT_SETS_TOKEN), ':')
+    index = _expect(text, index, '[')
+
+    remaining = None if names is None else set(names)
+    result_sets = list()
+    while count is None or len(result_sets) < count:
+        if remaining is not None and not remaining:
+            break
+        index = _SEPARATORS.match(text, index).end()
+        if index >= len(text):
+            raise ValueError("response ends inside resultSets")
+        if text[index] == ']':
+            break
+
+        named = _NAMED_SET.match(text, index)
+        if (names is not None and named is not None
+            and json.loads(named.group(1)) not in names
+        ):
+            index = _skip(text, index)
+            result_sets.append(None)
+            continue
+
+        result_set, index = _DECODER.raw_decode(text, index)
+        name = result_set.get('name')
+        if names is not None and name is not None and name not in names:
+            result_set = None
+        result_sets.append(result_set)
+        if remaining is not None:
+            remaining.discard(name)
+    return result_sets
+
+def _codec_name(encoding):
+    """Returns the canonical name of an encoding, e.g. 'utf-8' for 'UTF8'."""
+
+    try:
+        return codecs.lookup(encoding).name
+    except LookupError:
+        return encoding
+
+def _expect(text, index, char):
+    """Returns the index past char, the next character that isn't whitespace."""
+
+    index = _WHITESPACE.match(text, index).end()
+    if text[index: index + 1] != char:
+        raise ValueError(f"expected {char!r} at {index}")
+    return index + 1
+
+def _skip(text, index):
+    """Returns the index past the object or array that starts at index."""
+
+    depth = 0
+    for token in _TOKENS.finditer(text, index):
+        char = token.group()
+        if char in '[{':
+            depth += 1
+        elif char in ']}':
+            depth -= 1
+            if not depth:
+                return token.end()
+    raise ValueError("response ends inside a result set")
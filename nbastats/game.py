@@ -1,25 +1,260 @@
 import json
-import requests
-from nbastats.http import get_response
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from nbastats.decode import api_error, load_result_sets
+from nbastats.http import get_content, get_default_client, record_decode
+from nbastats.options import GAME_SUMMARY
 
-GAME_INFO_URL = 'https://stats.nba.com/stats/boxscoresummaryv2'
+GAME_INFO_URL = GAME_SUMMARY.url
+
+def get_game_info(game_id, client = None):
+    """Gets the summary of a game from NBA stats.
+
+    Only the first 8 result sets of the response are decoded.
+
+    Arguments:
+        game_id: An integer id of a game.
+        client: An optional nbastats.http.Client used for the request.
+
+    Raises:
+        ValueError: If game_id isn't an int or the response doesn't conform to
+            the NBA stats api.
+
+    Returns:
+        A dictionary with the game's 'summary', 'other_stats', 'officials',
+        'inactive' players, 'game_info', 'line_score', 'last_meeting',
+        'season_series' and the 'winner' team info. 'other_stats' and
+        'line_score' are dictionaries of the 'home' and 'visiting' teams'
+        rows, e.g. {'home': {'TEAM_ID': 1610612744, 'PTS': 108, ...},
+        'visiting': {...}}.
+    """
+
+    params = game_query(game_id)
+    body, encoding = get_content(GAME_INFO_URL, params, client)
+    return decode_game_info(body, encoding, client)
+
+def get_line_score(game_id, client = None):
+    """Gets the line score and winner of a game from NBA stats.
+
+    Only the 'LineScore' result set of the response is decoded.
+
+    Arguments:
+        game_id: An integer id of a game.
+        client: An optional nbastats.http.Client used for the request.
+
+    Raises:
+        ValueError: If game_id isn't an int or the response doesn't conform to
+            the NBA stats api.
+
+    Returns:
+        A dictionary with the 'home' and 'visiting' line scores and the
+        'winner' team info, as in get_game_info.
+    """
+
+    params = game_query(game_id)
+    body, encoding = get_content(GAME_INFO_URL, params, client)
+    return decode_line_score(body, encoding, client)
+
+class OutcomeIndex(object):
+    """A persistent, league-wide index of game outcomes stored as JSON.
+
+    An outcome is a dictionary in the following format:
+    {
+        'winner': 1610612744,
+        'home': {'TEAM_ID': 1610612744, 'TEAM_ABBREVIATION': 'GSW', 'PTS': 108},
+        'visiting': {'TEAM_ID': 1610612760, 'TEAM_ABBREVIATION': 'OKC', 'PTS': 100}
+    }
+
+    Outcomes added with add_winner, e.g. imported from an older file that only
+    kept who won, have a 'winner' but no 'home' or 'visiting'.
+
+    Attributes:
+        filename: An optional string for the path of the JSON file.
+    """
+
+    def __init__(self, filename = None):
+        """Initializes an OutcomeIndex, loading the file if it exists.
+
+        Arguments:
+            filename: An optional string for the path of the JSON file. The
+                index is kept in memory only if it's None.
+        """
+
+        self.filename = filename
+        self._outcomes = dict()
+
+        if filename is not None and os.path.exists(filename):
+            with open(filename, 'r') as in_f:
+                # Changing keys back to int (json format doesn't allow keys to be ints)
+                self._outcomes = {int(game_id): outcome
+                    for game_id, outcome in json.load(in_f).items()}
+
+    def __contains__(self, game_id):
+        return game_id in self._outcomes
+
+    def __getitem__(self, game_id):
+        return self._outcomes[game_id]
+
+    def __len__(self):
+        return len(self._outcomes)
+
+    def add(self, game_id, line_score):
+        """Adds the outcome of a game from its line score.
+
+        Arguments:
+            game_id: An integer id of a game.
+            line_score: A dictionary returned by get_line_score.
+        """
+
+        def clean_line(line):
+            keys = ['TEAM_ID', 'TEAM_ABBREVIATION', 'PTS']
+            return {key: line[key] for key in keys}
+
+        self._outcomes[game_id] = {
+            'winner': line_score['winner']['TEAM_ID'],
+            'home': clean_line(line_score['home']),
+            'visiting': clean_line(line_score['visiting'])
+        }
+
+    def add_winner(self, game_id, team_id):
+        """Adds the outcome of a game from the id of its winner only.
+
+        Arguments:
+            game_id: An integer id of a game.
+            team_id: An integer id of the winning team.
+        """
+
+        self._outcomes[game_id] = {'winner': team_id}
+
+    def discard(self, game_id):
+        """Removes the outcome of a game so it's fetched again."""
+
+        self._outcomes.pop(game_id, None)
+
+    def winners(self):
+        """Returns a dictionary of game ids to the id of the winning team."""
+
+        return {game_id: outcome['winner']
+            for game_id, outcome in self._outcomes.items()}
+
+    def save(self):
+        """Writes the index to its file, if it has one."""
+
+        if self.filename is None:
+            return
+
+        temp_filename = f'{self.filename}.tmp'
+        with open(temp_filename, 'w') as out:
+            json.dump(self._outcomes, out)
+        os.replace(temp_filename, self.filename)
+
+def get_game_outcomes(game_ids, max_concurrency = 4, rate_limiter = None,
+    client = None, index = None, errors = None, raise_errors = False
+):
+    """Gets the outcomes of many games, fetching line scores concurrently.
+
+    Only games missing from the index are fetched, and they're added to it.
+    Games whose outcome couldn't be fetched are left out of the result, so
+    one failing game doesn't stop the others from being used.
+
+    Arguments:
+        game_ids: An iterable of integer game ids.
+        max_concurrency: An integer for the number of requests in flight.
+        rate_limiter: An optional nbastats.http.RateLimiter shared by every
+            request.
+        client: An optional nbastats.http.Client used for the requests.
+        index: An optional OutcomeIndex that's read from, updated and saved.
+        errors: An optional dictionary that the ids of the games that failed
+            are added to, with the exception of each.
+        raise_errors: A boolean for whether to raise if any game failed
+            rather than leave it out.
+
+    Raises:
+        ValueError: If raise_errors is True and the outcome of any game
+            couldn't be fetched. The outcomes of the other games are still
+            added to the index.
+
+    Returns:
+        A dictionary of game ids to outcomes as described by OutcomeIndex,
+        without the games that failed.
+    """
+
+    if client is None:
+        client = get_default_client()
+    if index is None:
+        index = OutcomeIndex()
+
+    game_ids = list(game_ids)
+    missing = sorted(set(game_id for game_id in game_ids if game_id not in index))
+
+    def fetch(game_id):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        return get_line_score(game_id, client)
+
+    failed = dict()
+    if missing:
+        with ThreadPoolExecutor(max_workers = max_concurrency) as executor:
+            futures = {executor.submit(fetch, game_id): game_id for game_id in missing}
+            for future in as_completed(futures):
+                game_id = futures[future]
+                try:
+                    index.add(game_id, future.result())
+                except Exception as e:
+                    failed[game_id] = e
+        index.save()
+
+    if errors is not None:
+        errors.update(failed)
+    if failed and raise_errors:
+        raise ValueError(f"Failed to get outcomes of games {sorted(failed)} - "
+            f"{next(iter(failed.values()))}")
+
+    return {game_id: index[game_id] for game_id in game_ids if game_id in index}
+
+def game_query(game_id):
+    """Returns the queries of a boxscoresummaryv2 request, as sent by
+    get_game_info and get_line_score.
+
+    Arguments:
+        game_id: An integer id of a game.
+
+    Raises:
+        ValueError: If game_id isn't an int.
+
+    Returns:
+        A nbastats.options.Query.
+    """
 
-def get_game_info(game_id):
     if not isinstance(game_id, int):
         raise ValueError("game_id must be an int")
+    return GAME_SUMMARY.query(GameID = str(game_id).rjust(10, '0'))
 
-    params = {
-        'GameID': str(game_id).rjust(10, '0')
-    }
+def decode_game_info(body, encoding = None, client = None):
+    """Decodes the body of a boxscoresummaryv2 response as get_game_info does.
 
-    response_str = get_response(GAME_INFO_URL, params)
+    Arguments:
+        body: The bytes (or string) of the response body.
+        encoding: An optional string for the encoding of body, defaults to
+            'utf-8'.
+        client: An optional client whose observers are notified of the
+            decoded response, the default nbastats.http.Client otherwise.
 
-    try:
-        raw_game_info = json.loads(response_str)
-    except Exception as e:
-        raise ValueError(f"API error - {response_str}")
+    Raises:
+        ValueError: If the response doesn't conform to the NBA stats api.
+
+    Returns:
+        A dictionary of the game's summary as returned by get_game_info.
+    """
+
+    start = time.perf_counter()
 
-    raw_game_info = raw_game_info['resultSets']
+    # Only the first 8 result sets are used
+    try:
+        raw_game_info = load_result_sets(body, encoding, count = 8)
+    except ValueError:
+        raise api_error(body, encoding)
 
     # Game summary
     summary = _nba_to_listdict(raw_game_info[0])[0]
@@ -46,14 +281,10 @@ def get_game_info(game_id):
     season_series = _nba_to_listdict(raw_game_info[7])[0]
 
     # Set winning team
-    def clean_team_info(line):
-        keys = ['TEAM_ID', 'TEAM_ABBREVIATION', 'TEAM_CITY_NAME', 'TEAM_NICKNAME']
-        return {key: line[key] for key in keys}
+    winner = _get_winner(home_line, visiting_line)
 
-    if home_line['PTS'] > visiting_line['PTS']:
-        winner = clean_team_info(home_line) 
-    else:
-        winner = clean_team_info(visiting_line)
+    record_decode(GAME_INFO_URL, time.perf_counter() - start,
+        sum(len(result['rowSet']) for result in raw_game_info[:8]), client)
 
     return {
         'summary': summary,
@@ -73,6 +304,63 @@ def get_game_info(game_id):
         'winner': winner
     }
 
+def decode_line_score(body, encoding = None, client = None):
+    """Decodes the body of a boxscoresummaryv2 response as get_line_score does.
+
+    Arguments:
+        body: The bytes (or string) of the response body.
+        encoding: An optional string for the encoding of body, defaults to
+            'utf-8'.
+        client: An optional client whose observers are notified of the
+            decoded response, the default nbastats.http.Client otherwise.
+
+    Raises:
+        ValueError: If the response doesn't conform to the NBA stats api.
+
+    Returns:
+        A dictionary with the 'home' and 'visiting' line scores and the
+        'winner' team info as returned by get_line_score.
+    """
+
+    start = time.perf_counter()
+
+    # The other result sets are skipped rather than decoded
+    try:
+        result_sets = load_result_sets(body, encoding, ['LineScore'], 6)
+    except ValueError:
+        raise api_error(body, encoding)
+
+    line_score = _get_result_set(result_sets, 'LineScore', 5)
+    home_line, visiting_line = _nba_to_listdict(line_score)
+    record_decode(GAME_INFO_URL, time.perf_counter() - start, 2, client)
+
+    return {
+        'home': home_line,
+        'visiting': visiting_line,
+        'winner': _get_winner(home_line, visiting_line)
+    }
+
+# Helper Functions
+def _get_result_set(result_sets, name, position):
+    """Returns the result set with the given name, or the one at position if
+    none of them are named."""
+
+    for result_set in result_sets:
+        if result_set is not None and result_set.get('name') == name:
+            return result_set
+    return result_sets[position]
+
+def _get_winner(home_line, visiting_line):
+    """Returns the team info of the team with the most points."""
+
+    def clean_team_info(line):
+        keys = ['TEAM_ID', 'TEAM_ABBREVIATION', 'TEAM_CITY_NAME', 'TEAM_NICKNAME']
+        return {key: line[key] for key in keys}
+
+    if home_line['PTS'] > visiting_line['PTS']:
+        return clean_team_info(home_line) 
+    return clean_team_info(visiting_line)
+
 def _nba_to_listdict(nba_dict):
     header = nba_dict['headers']
-    return [dict(zip(header, item)) for item in nba_dict['rowSet']]
\ No newline at end of file
+    return [dict(zip(header, item)) for item in nba_dict['rowSet']]
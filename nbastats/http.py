@@ -1,23 +1,415 @@
-import requests
+import random
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+from nbastats.metrics import DecodeEvent, RequestEvent, RetryEvent, endpoint_name
 
-def get_response(url, params):
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/68.0.3440.106 Safari/537.36'
+}
+
+# Status codes worth retrying: throttling and transient server errors
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+class BaseClient(object):
+    """The parts of a client that don't depend on how requests are sent,
+    shared by Client and nbastats.aio.AsyncClient.
+
+    Attributes:
+        timeout: A number of seconds before a request is abandoned.
+        retries: An integer for the number of retries after the first attempt.
+        backoff_factor: A number of seconds that the backoff is scaled by.
+        max_backoff: A number of seconds that a single backoff won't exceed.
+        base_url: An optional string such as 'http://127.0.0.1:8000' that
+            replaces the scheme and host of every requested url.
+        cache: An optional nbastats.cache.ResponseCache that successful
+            responses are served from and stored in.
+        observers: A list of nbastats.metrics.Observer notified of every
+            request, retry and decoded response.
+    """
+
+    def __init__(self, timeout = 30, retries = 3, backoff_factor = 0.5,
+        max_backoff = 30, base_url = None, cache = None, observers = None
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.base_url = base_url
+        self.cache = cache
+        self.observers = list() if observers is None else list(observers)
+
+    def record_decode(self, url, seconds, rows):
+        """Notifies the observers that a fetcher decoded a response.
+
+        Arguments:
+            url: A string for the requested url.
+            seconds: A float for the seconds spent decoding.
+            rows: An integer for the number of rows returned to the caller.
+        """
+
+        if not self.observers:
+            return
+        event = DecodeEvent(endpoint_name(url), seconds, rows)
+        for observer in self.observers:
+            observer.on_decode(event)
+
+    def _resolve(self, url):
+        """Replaces the scheme and host of url with base_url if it's set."""
+
+        if self.base_url is None:
+            return url
+        base = urlsplit(self.base_url)
+        parts = urlsplit(url)
+        return urlunsplit((base.scheme, base.netloc, parts.path, parts.query,
+            parts.fragment))
+
+    def _backoff(self, attempt, retry_after = None):
+        """Returns the seconds to sleep before the next attempt.
+
+        A numeric Retry-After header from the server takes precedence over the
+        exponential backoff.
+        """
+
+        if retry_after is not None and retry_after.isdigit():
+            return min(int(retry_after), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff,
+            self.backoff_factor * 2 ** attempt))
+
+    def _notify_request(self, url, params, status, start, size, retries,
+        cached = False, error = None
+    ):
+        if not self.observers:
+            return
+        event = RequestEvent(endpoint_name(url), url, params, status,
+            time.perf_counter() - start, size, retries, cached, error)
+        for observer in self.observers:
+            observer.on_request(event)
+
+    def _notify_retry(self, url, attempt, status, error, delay):
+        if not self.observers:
+            return
+        event = RetryEvent(endpoint_name(url), url, attempt, status, error, delay)
+        for observer in self.observers:
+            observer.on_retry(event)
+
+class Client(BaseClient):
+    """A reusable HTTP client backed by a pooled, keep-alive session.
+
+    requests is only imported once the first Client is created, so importing
+    the fetchers stays cheap for scripts that never make a request.
+
+    Connections to a host are reused between requests so only the first
+    request to stats.nba.com pays for the TCP and TLS handshakes. Throttled
+    (429) and failed (5xx) requests as well as dropped connections are retried
+    with exponential backoff and full jitter.
+
+    Attributes:
+        session: The requests.Session used for every request.
+        timeout: A number of seconds (or a (connect, read) pair) before a
+            request is abandoned.
+        retries: An integer for the number of retries after the first attempt.
+        backoff_factor: A number of seconds that the backoff is scaled by.
+        max_backoff: A number of seconds that a single backoff won't exceed.
+        base_url: An optional string such as 'http://127.0.0.1:8000' that
+            replaces the scheme and host of every requested url, e.g. to point
+            the fetchers at a local stub server.
+        cache: An optional nbastats.cache.ResponseCache that successful
+            responses are served from and stored in.
+        observers: A list of nbastats.metrics.Observer notified of every
+            request, retry and decoded response.
+    """
+
+    def __init__(self, pool_connections = 4, pool_maxsize = 10, timeout = 30,
+        retries = 3, backoff_factor = 0.5, max_backoff = 30, base_url = None,
+        headers = None, cache = None, observers = None
+    ):
+        """Initializes a Client.
+
+        Arguments:
+            pool_connections: An integer for the number of hosts to keep
+                connection pools for.
+            pool_maxsize: An integer for the maximum number of connections
+                kept open to a single host. Requests beyond the limit wait for
+                a free connection.
+            timeout: A number of seconds (or a (connect, read) pair) before a
+                request is abandoned.
+            retries: An integer for the number of retries after the first
+                attempt.
+            backoff_factor: A number of seconds that the backoff is scaled by.
+                The n-th retry sleeps up to backoff_factor * 2 ** n seconds.
+            max_backoff: A number of seconds that a single backoff won't exceed.
+            base_url: An optional string that replaces the scheme and host of
+                every requested url.
+            headers: An optional dictionary of headers sent with every request
+                in place of DEFAULT_HEADERS.
+            cache: An optional nbastats.cache.ResponseCache that successful
+                responses are served from and stored in.
+            observers: An optional list of nbastats.metrics.Observer notified
+                of every request, retry and decoded response.
+        """
+
+        super().__init__(timeout, retries, backoff_factor, max_backoff, base_url,
+            cache, observers)
+
+        # Deferred since requests takes longer to import than the rest of nbastats
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        adapter = HTTPAdapter(pool_connections = pool_connections,
+            pool_maxsize = pool_maxsize, pool_block = True)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update(DEFAULT_HEADERS if headers is None else headers)
+
+    def get(self, url, params = None):
+        """Makes a request and returns the string response.
+
+        Arguments:
+            url: A string for the base url.
+            params: A dictionary for any queries.
+
+        Raises:
+            requests.RequestException: If the request still can't be completed
+                after all retries.
+
+        Returns:
+            A string of the response decoded based on the encoding format in
+            the returned header.
+        """
+
+        body, encoding = self.get_content(url, params)
+        return body.decode(encoding or 'utf-8')
+
+    def get_content(self, url, params = None):
+        """Makes a request, or reads it from the cache, and returns the body.
+
+        Arguments:
+            url: A string for the base url.
+            params: A dictionary for any queries.
+
+        Raises:
+            requests.RequestException: If the request still can't be completed
+                after all retries.
+
+        Returns:
+            A (body bytes, encoding) pair where encoding is the encoding format
+            in the returned header or None if there wasn't one.
+        """
+
+        start = time.perf_counter()
+        url = self._resolve(url)
+        if self.cache is not None:
+            cached = self.cache.get(url, params)
+            if cached is not None:
+                self._notify_request(url, params, 200, start, len(cached[0]), 0,
+                    True)
+                return cached
+
+        response, retries = self._request(url, params, start = start)
+        self._notify_request(url, params, response.status_code, start,
+            len(response.content), retries)
+        if self.cache is not None and response.status_code == 200:
+            self.cache.set(url, params, response.content, response.encoding)
+        return response.content, response.encoding
+
+    def stream(self, url, params = None, chunk_size = 1 << 16):
+        """Makes a request, or reads it from the cache, and yields the body in
+        chunks as it's received.
+
+        Streamed responses aren't added to the cache since that would need
+        the whole body in memory.
+
+        Arguments:
+            url: A string for the base url.
+            params: A dictionary for any queries.
+            chunk_size: An integer for the maximum number of bytes per chunk.
+
+        Raises:
+            requests.RequestException: If the request still can't be completed
+                after all retries.
+
+        Yields:
+            The bytes of the response body.
+        """
+
+        start = time.perf_counter()
+        url = self._resolve(url)
+        if self.cache is not None:
+            cached = self.cache.get(url, params)
+            if cached is not None:
+                body = cached[0]
+                self._notify_request(url, params, 200, start, len(body), 0, True)
+                for offset in range(0, len(body), chunk_size):
+                    yield body[offset: offset + chunk_size]
+                return
+
+        response, retries = self._request(url, params, stream = True,
+            start = start)
+        size = 0
+        error = None
+        try:
+            for chunk in response.iter_content(chunk_size):
+                size += len(chunk)
+                yield chunk
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            response.close()
+            self._notify_request(url, params, response.status_code, start, size,
+                retries, error = error)
+
+    def close(self):
+        """Closes every pooled connection."""
+
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _request(self, url, params, stream = False, start = None):
+        """Sends a GET request, retrying throttled and failed attempts.
+
+        Returns:
+            A (requests.Response, number of retries) pair.
+        """
+
+        import requests
+
+        if start is None:
+            start = time.perf_counter()
+
+        # The precompiled string of a nbastats.options.Query isn't re-encoded
+        query = getattr(params, 'encoded', params)
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.get(url, params = query,
+                    timeout = self.timeout, stream = stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.retries:
+                    self._notify_request(url, params, None, start, 0, attempt,
+                        error = e)
+                    raise
+                self._retry(url, attempt, None, e)
+                continue
+
+            if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                return response, attempt
+            response.close()
+            self._retry(url, attempt, response.status_code, None,
+                response.headers.get('Retry-After'))
+
+    def _retry(self, url, attempt, status, error, retry_after = None):
+        """Notifies the observers of a failed attempt and sleeps before the
+        next one."""
+
+        delay = self._backoff(attempt, retry_after)
+        self._notify_retry(url, attempt, status, error, delay)
+        time.sleep(delay)
+
+class RateLimiter(object):
+    """A thread-safe limiter that spaces out requests to a fixed rate.
+
+    A single RateLimiter can be shared by every worker of a scrape so the
+    combined request rate stays below what the NBA stats api tolerates.
+    """
+
+    def __init__(self, requests_per_second):
+        """Initializes a RateLimiter.
+
+        Arguments:
+            requests_per_second: A positive number for the allowed rate.
+        """
+
+        if requests_per_second <= 0:
+            raise ValueError("requests_per_second must be positive")
+
+        self.interval = 1 / requests_per_second
+        self._next_time = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until the next request is allowed to be made."""
+
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+def get_default_client():
+    """Returns the Client shared by every fetcher, creating it if needed."""
+
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = Client()
+        return _default_client
+
+def set_default_client(client):
+    """Replaces the Client shared by every fetcher.
+
+    Arguments:
+        client: A Client, or None to create a new default Client on next use.
+    """
+
+    global _default_client
+    with _default_client_lock:
+        _default_client = client
+
+def get_response(url, params, client = None):
     """makes a request and returns the string response
 
     arguments:
         url: a string for the base url.
         params: a dictionary for any queries.
+        client: an optional Client, the default Client is used otherwise.
 
     returns:
-        a string of the response decoded based on the encoding format in the 
+        a string of the response decoded based on the encoding format in the
         returned header.
     """
 
-    response = requests.get(
-        url = url,
-        params = params,
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/68.0.3440.106 Safari/537.36'
-        }
-    )
+    if client is None:
+        client = get_default_client()
+    return client.get(url, params)
+
+def get_content(url, params, client = None):
+    """Makes a request and returns the body.
+
+    Arguments:
+        url: A string for the base url.
+        params: A dictionary for any queries.
+        client: An optional Client, the default Client is used otherwise.
+
+    Returns:
+        A (body bytes, encoding) pair where encoding is the encoding format in
+        the returned header or None if there wasn't one.
+    """
+
+    if client is None:
+        client = get_default_client()
+    return client.get_content(url, params)
+
+def record_decode(url, seconds, rows, client = None):
+    """Notifies the observers of a client that a fetcher decoded a response.
+
+    Arguments:
+        url: A string for the requested url.
+        seconds: A float for the seconds spent decoding.
+        rows: An integer for the number of rows returned to the caller.
+        client: An optional Client, the default Client is used otherwise.
+    """
 
-    return response.content.decode(response.encoding)
\ No newline at end of file
+    if client is None:
+        client = get_default_client()
+    client.record_decode(url, seconds, rows)
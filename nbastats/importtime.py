@@ -0,0 +1,57 @@
+import subprocess
+import sys
+from collections import namedtuple
+
+# The modules a short-lived fetch needs
+CORE_MODULES = ('nbastats.http', 'nbastats.options', 'nbastats.player',
+    'nbastats.game')
+
+# Dependencies that only the columnar, DataFrame and analysis code should load
+HEAVY_MODULES = ('requests', 'numpy', 'pandas', 'scipy', 'sklearn')
+
+ImportTime = namedtuple('ImportTime', ['module', 'seconds', 'heavy_modules'])
+ImportTime.__doc__ = """The cost of importing a module in a fresh interpreter.
+
+Attributes:
+    module: A string for the name of the module.
+    seconds: A float for the fastest time to import the module, not counting
+        the interpreter's own startup.
+    heavy_modules: A list of the names in HEAVY_MODULES that the import loaded.
+"""
+
+_SCRIPT = '''
+import sys, time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+print(','.join(name for name in {heavy!r} if name in sys.modules))
+'''
+
+def measure_import(module, runs = 3):
+    """Measures the time to import a module in fresh interpreters.
+
+    Arguments:
+        module: A string for the name of the module, e.g. 'nbastats.player'.
+        runs: An integer for the number of interpreters, the fastest is kept.
+
+    Raises:
+        ValueError: If the module can't be imported.
+
+    Returns:
+        An ImportTime.
+    """
+
+    timings = list()
+    heavy_modules = []
+    for _ in range(max(runs, 1)):
+        process = subprocess.run([sys.executable, '-c',
+            _SCRIPT.format(module = module, heavy = HEAVY_MODULES)],
+            stdout = subprocess.PIPE, stderr = subprocess.PIPE,
+            universal_newlines = True)
+        if process.returncode:
+            raise ValueError(f"Can't import {module} - {process.stderr.strip()}")
+
+        seconds, loaded = process.stdout.splitlines()[-2:]
+        timings.append(float(seconds))
+        heavy_modules = [name for name in loaded.split(',') if name]
+    return ImportTime(module, min(timings), heavy_modules)
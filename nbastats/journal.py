@@ -0,0 +1,88 @@
+import json
+import os
+
+class ScrapeJournal(object):
+    """An append-only, resumable record of a scrape stored as JSON lines.
+
+    Every line records one finished player along with all of their shots:
+    {"player_id": 201939, "shots": [{...}, ...]}
+
+    Only the new player's line is written when progress is saved, so saving is
+    linear in the size of the scrape. A line is only complete once it's been
+    flushed, so a crash in the middle of a write loses at most that player,
+    who is scraped again on restart.
+
+    Attributes:
+        filename: A string for the path of the journal file.
+        completed: A set of integer ids of the players already in the journal.
+    """
+
+    def __init__(self, filename):
+        """Initializes a ScrapeJournal, loading the progress of any earlier run.
+
+        Arguments:
+            filename: A string for the path of the journal file. The file is
+                created if it doesn't exist.
+        """
+
+        self.filename = filename
+        self.completed = set()
+        self._valid_size = 0
+
+        if os.path.exists(filename):
+            for player_id, _ in self._read():
+                self.completed.add(player_id)
+
+    def append(self, player_id, shots):
+        """Records the shots of a finished player.
+
+        Arguments:
+            player_id: An integer id of a player.
+            shots: A list of dictionaries where each describes a shot.
+        """
+
+        line = json.dumps({'player_id': player_id, 'shots': shots}) + '\n'
+        with open(self.filename, 'ab') as out:
+            # Drop a partial line left behind by a crash
+            out.truncate(self._valid_size)
+            out.write(line.encode('utf-8'))
+            out.flush()
+            os.fsync(out.fileno())
+            self._valid_size = out.tell()
+        self.completed.add(player_id)
+
+    def __contains__(self, player_id):
+        return player_id in self.completed
+
+    def __len__(self):
+        return len(self.completed)
+
+    def iter_players(self):
+        """Yields (player id, shots) pairs in the order they were recorded."""
+
+        yield from self._read()
+
+    def iter_shots(self):
+        """Yields every recorded shot in the order the players were recorded."""
+
+        for _, shots in self._read():
+            yield from shots
+
+    def _read(self):
+        """Yields (player id, shots) pairs of every complete line."""
+
+        if not os.path.exists(self.filename):
+            return
+
+        with open(self.filename, 'rb') as in_f:
+            offset = 0
+            for line in in_f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                offset += len(line)
+                self._valid_size = offset
+                yield entry['player_id'], entry['shots']
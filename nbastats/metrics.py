@@ -0,0 +1,236 @@
+import sys
+import threading
+from bisect import bisect_left
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+# Upper bounds in seconds of the latency histogram buckets, the last bucket
+# holds everything slower
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+RequestEvent = namedtuple('RequestEvent', ['endpoint', 'url', 'params', 'status',
+    'seconds', 'bytes', 'retries', 'cached', 'error'])
+RequestEvent.__doc__ = """A finished request of a nbastats.http.Client.
+
+Attributes:
+    endpoint: A string for the last segment of the url path, e.g.
+        'shotchartdetail'.
+    url: A string for the requested url.
+    params: A dictionary of the queries, None if there weren't any.
+    status: An integer for the HTTP status code, None if no response was
+        received.
+    seconds: A float for the seconds from the first attempt until the response
+        was received, including any backoff. For streamed responses it lasts
+        until the whole body is read.
+    bytes: An integer for the size of the response body.
+    retries: An integer for the number of attempts after the first one.
+    cached: A boolean for whether the response was served from the cache.
+    error: The exception that ended the request, None if it succeeded.
+"""
+
+RetryEvent = namedtuple('RetryEvent', ['endpoint', 'url', 'attempt', 'status',
+    'error', 'delay'])
+RetryEvent.__doc__ = """A failed attempt of a request that's about to be retried.
+
+Attributes:
+    endpoint: A string for the last segment of the url path.
+    url: A string for the requested url.
+    attempt: An integer for the index of the failed attempt, starting from 0.
+    status: An integer for the retryable HTTP status code, None if the
+        connection failed.
+    error: The exception raised by the attempt, None if it got a response.
+    delay: A float for the seconds slept before the next attempt.
+"""
+
+DecodeEvent = namedtuple('DecodeEvent', ['endpoint', 'seconds', 'rows'])
+DecodeEvent.__doc__ = """A response decoded by a fetcher.
+
+Attributes:
+    endpoint: A string for the last segment of the url path.
+    seconds: A float for the seconds spent decoding. For the streaming
+        iterators it also includes the time waiting on the response.
+    rows: An integer for the number of rows returned to the caller.
+"""
+
+class Observer(object):
+    """The interface of the observers of a nbastats.http.Client.
+
+    Every method does nothing, subclasses override the events they need.
+    Observers are called from the thread that made the request, so they need
+    to be thread-safe when a client is shared by concurrent fetchers. With a
+    nbastats.aio.AsyncClient, on_request and on_retry are called on the event
+    loop's thread but on_decode is called from a thread of the loop's default
+    executor, where the response is decoded.
+    """
+
+    def on_request(self, event):
+        """Called with a RequestEvent after every request."""
+
+    def on_retry(self, event):
+        """Called with a RetryEvent before sleeping for a retry."""
+
+    def on_decode(self, event):
+        """Called with a DecodeEvent after a fetcher decodes a response."""
+
+class SummaryReporter(Observer):
+    """An observer that aggregates events per endpoint.
+
+    The summary is a plain dictionary so it can be exported to a monitoring
+    system as is, e.g. as JSON or as Prometheus style histograms.
+    """
+
+    def __init__(self, buckets = LATENCY_BUCKETS):
+        """Initializes a SummaryReporter.
+
+        Arguments:
+            buckets: A sorted sequence of the upper bounds in seconds of the
+                latency histogram buckets.
+        """
+
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._endpoints = dict()
+
+    def on_request(self, event):
+        with self._lock:
+            stats = self._stats(event.endpoint)
+            stats['requests'] += 1
+            stats['errors'] += event.error is not None
+            stats['cache_hits'] += event.cached
+            stats['retries'] += event.retries
+            stats['bytes'] += event.bytes
+
+            latency = stats['latency']
+            latency['count'] += 1
+            latency['sum'] += event.seconds
+            latency['max'] = max(latency['max'], event.seconds)
+            latency['counts'][bisect_left(self.buckets, event.seconds)] += 1
+
+    def on_retry(self, event):
+        with self._lock:
+            stats = self._stats(event.endpoint)
+            key = 'connection' if event.status is None else str(event.status)
+            stats['retry_reasons'][key] = stats['retry_reasons'].get(key, 0) + 1
+
+    def on_decode(self, event):
+        with self._lock:
+            stats = self._stats(event.endpoint)
+            stats['rows'] += event.rows
+            stats['decode']['count'] += 1
+            stats['decode']['seconds'] += event.seconds
+
+    def summary(self):
+        """Returns the aggregated numbers of every endpoint.
+
+        Returns:
+            A dictionary of endpoints to dictionaries with the counts of
+            'requests', 'errors', 'cache_hits', 'retries', 'bytes' and 'rows',
+            the 'retry_reasons' by status code, the 'decode' count and seconds,
+            and the 'latency' count, sum, max and cumulative 'buckets' as a
+            list of [upper bound in seconds, count] pairs ending with infinity.
+        """
+
+        with self._lock:
+            summary = dict()
+            for endpoint, stats in self._endpoints.items():
+                latency = stats['latency']
+                cumulative = 0
+                buckets = list()
+                for bound, count in zip(self.buckets + (float('inf'),),
+                    latency['counts']
+                ):
+                    cumulative += count
+                    buckets.append([bound, cumulative])
+
+                summary[endpoint] = dict(stats,
+                    retry_reasons = dict(stats['retry_reasons']),
+                    decode = dict(stats['decode']),
+                    latency = {
+                        'count': latency['count'],
+                        'sum': latency['sum'],
+                        'max': latency['max'],
+                        'buckets': buckets
+                    })
+            return summary
+
+    def percentile(self, endpoint, q):
+        """Estimates a latency percentile of an endpoint from its histogram.
+
+        Arguments:
+            endpoint: A string for the endpoint.
+            q: A number between 0 and 100.
+
+        Returns:
+            A float for the upper bound in seconds of the bucket holding the
+            percentile, the slowest latency for the last bucket, or None if
+            there weren't any requests.
+        """
+
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None or not stats['latency']['count']:
+                return None
+
+            latency = stats['latency']
+            rank = q / 100 * latency['count']
+            cumulative = 0
+            for bound, count in zip(self.buckets, latency['counts']):
+                cumulative += count
+                if cumulative >= rank:
+                    return min(bound, latency['max'])
+            return latency['max']
+
+    def report(self, out = None):
+        """Writes a table of the summary of every endpoint.
+
+        Arguments:
+            out: An optional file object, defaults to sys.stdout.
+        """
+
+        if out is None:
+            out = sys.stdout
+
+        out.write(f"{'endpoint':<28} {'requests':>8} {'errors':>6} {'cached':>6} "
+            f"{'retries':>7} {'MB':>8} {'rows':>9} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'max ms':>8} {'decode ms':>10}\n")
+        for endpoint, stats in sorted(self.summary().items()):
+            p50 = self.percentile(endpoint, 50)
+            p95 = self.percentile(endpoint, 95)
+            out.write(f"{endpoint:<28} {stats['requests']:>8} {stats['errors']:>6} "
+                f"{stats['cache_hits']:>6} {stats['retries']:>7} "
+                f"{stats['bytes'] / 2 ** 20:>8.2f} {stats['rows']:>9} "
+                f"{_milliseconds(p50):>8} {_milliseconds(p95):>8} "
+                f"{_milliseconds(stats['latency']['max']):>8} "
+                f"{stats['decode']['seconds'] * 1000:>10.1f}\n")
+
+    def reset(self):
+        """Clears every aggregated number."""
+
+        with self._lock:
+            self._endpoints.clear()
+
+    def _stats(self, endpoint):
+        stats = self._endpoints.get(endpoint)
+        if stats is None:
+            stats = self._endpoints[endpoint] = {
+                'requests': 0,
+                'errors': 0,
+                'cache_hits': 0,
+                'retries': 0,
+                'retry_reasons': dict(),
+                'bytes': 0,
+                'rows': 0,
+                'decode': {'count': 0, 'seconds': 0.0},
+                'latency': {'count': 0, 'sum': 0.0, 'max': 0.0,
+                    'counts': [0] * (len(self.buckets) + 1)}
+            }
+        return stats
+
+def endpoint_name(url):
+    """Returns the last segment of the path of url, e.g. 'shotchartdetail'."""
+
+    return urlsplit(url).path.rstrip('/').rsplit('/', 1)[-1]
+
+# Helper Functions
+def _milliseconds(seconds):
+    return '-' if seconds is None else f'{seconds * 1000:.1f}'
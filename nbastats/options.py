@@ -1,3 +1,6 @@
+from datetime import date
+from urllib.parse import urlencode
+
 class Season(object):
     """A representation of a NBA season"""
 
@@ -9,14 +12,30 @@ class Season(object):
         """
         self.season_year = season_year
 
+    @classmethod
+    def current(cls, today = None):
+        """Returns the latest season that has started.
+
+        A season is considered started from July onwards, after the previous
+        season's finals are over.
+
+        Arguments:
+            today: An optional datetime.date, defaults to today's date.
+        """
+
+        if today is None:
+            today = date.today()
+        return cls(today.year if today.month >= 7 else today.year - 1)
+
     def __str__(self):
         """Returns a string representation of the season.
 
         Returns:
             A string in the format 'AABB-CC' where a year is represented
-            by 'AABB' and CC is BB + 1 
+            by 'AABB' and CC is the last two digits of the next year, e.g.
+            '1999-00' or '2008-09'.
         """
-        return f'{self.season_year}-{self.season_year % 100 + 1}'
+        return f'{self.season_year}-{(self.season_year + 1) % 100:02d}'
 
 class SeasonType():
     """The string representation for each stage of a NBA season used by the NBA stats api."""
@@ -38,4 +57,210 @@ class LeaderboardSortCategory():
     BLOCKS = 'BLK'
     TURNOVERS = 'TOV'
     EFFICIENCY = 'EFF'
-    POINTS = 'PTS'
\ No newline at end of file
+    POINTS = 'PTS'
+
+def canonical_query(params):
+    """Returns a query string that's identical for equivalent params.
+
+    Arguments:
+        params: A dictionary for the queries, or None. The precompiled string of
+            a Query is returned as is.
+    """
+
+    if not params:
+        return ''
+    encoded = getattr(params, 'encoded', None)
+    if encoded is not None:
+        return encoded
+    return urlencode(sorted((key, str(val)) for key, val in params.items()))
+
+def request_key(url, params):
+    """Returns a key that's identical for equivalent requests, e.g. to cache,
+    deduplicate or retry them.
+
+    Arguments:
+        url: A string for the base url.
+        params: A dictionary for the queries, or None.
+    """
+
+    query = canonical_query(params)
+    return f'{url}?{query}' if query else url
+
+class Query(dict):
+    """The queries of a request to an Endpoint.
+
+    A Query is a dictionary of every query so it can be inspected like any
+    other params, along with its canonical query string so it's only encoded
+    once. It's read-only so the two can't disagree, copy it with dict() or
+    get a new Query from its Endpoint to change a query.
+
+    Attributes:
+        encoded: A string for the url encoded queries sorted by key, as
+            returned by canonical_query.
+    """
+
+    __slots__ = ('encoded',)
+
+    def __init__(self, queries, encoded):
+        """Initializes a Query.
+
+        Arguments:
+            queries: A dictionary of every query.
+            encoded: A string for the url encoded queries sorted by key.
+        """
+
+        super(Query, self).__init__(queries)
+        self.encoded = encoded
+
+    def __reduce__(self):
+        return (Query, (dict(self), self.encoded))
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("a Query can't be modified, copy it with dict() first")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+class Endpoint(object):
+    """An endpoint of the NBA stats api along with its default queries.
+
+    The defaults are validated and encoded once when the endpoint is declared
+    so a request only copies them and encodes the queries it overrides.
+
+    Attributes:
+        url: A string for the url of the endpoint.
+        defaults: A dictionary of every allowed query to its default value.
+    """
+
+    def __init__(self, url, defaults):
+        """Initializes an Endpoint.
+
+        Arguments:
+            url: A string for the url of the endpoint.
+            defaults: A dictionary of every allowed query to its default value,
+                queries without a sensible default such as a player id are
+                None and must be given for every request.
+        """
+
+        self.url = url
+        self.defaults = dict(defaults)
+        self._required = frozenset(key for key, val in self.defaults.items()
+            if val is None)
+        self._encoded = {key: self._encode(key, val)
+            for key, val in self.defaults.items() if val is not None}
+        self._order = sorted(self.defaults)
+
+    def query(self, **queries):
+        """Returns the Query of a request.
+
+        Arguments:
+            queries: The queries that replace their defaults.
+
+        Raises:
+            ValueError: If a query isn't allowed or a required query is missing.
+
+        Returns:
+            A Query of every allowed query.
+        """
+
+        encoded = self._encoded.copy()
+        for key, val in queries.items():
+            if key not in self.defaults:
+                raise ValueError(f"{key} is not a valid argument")
+            encoded[key] = self._encode(key, val)
+        for key in self._required:
+            if key not in queries:
+                raise ValueError(f"{key} is required")
+
+        return Query(dict(self.defaults, **queries),
+            '&'.join([encoded[key] for key in self._order]))
+
+    def key(self, query):
+        """Returns the request_key of a Query of this endpoint."""
+
+        return request_key(self.url, query)
+
+    def extend(self, url, **defaults):
+        """Returns a new Endpoint with this endpoint's defaults, e.g. for a
+        similar endpoint of the NBA stats api.
+
+        Arguments:
+            url: A string for the url of the new endpoint.
+            defaults: Queries to add or whose defaults are replaced.
+        """
+
+        return Endpoint(url, dict(self.defaults, **defaults))
+
+    @staticmethod
+    def _encode(key, val):
+        """Returns the url encoded key=value pair of a query."""
+
+        return urlencode(((key, str(val)),))
+
+SHOT_LOG = Endpoint('https://stats.nba.com/stats/shotchartdetail', {
+    'PlayerID': None,
+    'Season': None,
+    'SeasonType': None,
+    'PlayerPosition': "",
+    'ContextMeasure': "FGA",
+    'DateFrom': "",
+    'DateTo': "",
+    'GameID': "",
+    'GameSegment': "",
+    'LastNGames': 0,
+    'LeagueID': "00",
+    'Location': "",
+    'Month': 0,
+    'OpponentTeamID': 0,
+    'Outcome': "",
+    'Period': 0,
+    'Position': "",
+    'RookieYear': "",
+    'SeasonSegment': "",
+    'TeamID': 0,
+    'VsConference': "",
+    'VsDivision': ""
+})
+
+LEADERS = Endpoint('https://stats.nba.com/stats/leaguedashplayerstats', {
+    "Season": None,
+    "SeasonType": None,
+    "College": "",
+    "Conference": "",
+    "Country": "",
+    "DateFrom": "",
+    "DateTo": "",
+    "Division": "",
+    "DraftPick": "",
+    "DraftYear": "",
+    "GameScope": "",
+    "GameSegment": "",
+    "Height": "",
+    "LastNGames": "0",
+    "LeagueID": "00",
+    "Location": "",
+    "MeasureType": "Base",
+    "Month": "0",
+    "OpponentTeamID": "0",
+    "Outcome": "",
+    "PORound": "0",
+    "PaceAdjust": "N",
+    "PerMode": "PerGame",
+    "Period": "0",
+    "PlayerExperience": "",
+    "PlayerPosition": "",
+    "PlusMinus": "N",
+    "Rank": "N",
+    "SeasonSegment": "",
+    "ShotClockRange": "",
+    "StarterBench": "",
+    "TeamID": "0",
+    "TwoWay": "0",
+    "VsConference": "",
+    "VsDivision": "",
+    "Weight": ""
+})
+
+GAME_SUMMARY = Endpoint('https://stats.nba.com/stats/boxscoresummaryv2', {
+    'GameID': None
+})
@@ -0,0 +1,422 @@
+import sqlite3
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from nbastats.game import OutcomeIndex, get_line_score
+from nbastats.http import RateLimiter, get_default_client
+from nbastats.options import Season
+from nbastats.player import get_leaders, get_shot_log
+
+# The endpoints a scrape can cover. Leaders are always scraped since they
+# list the players whose shots are scraped.
+LEADERS = 'leaders'
+SHOTS = 'shots'
+OUTCOMES = 'outcomes'
+ENDPOINTS = (LEADERS, SHOTS, OUTCOMES)
+
+# A request rate the NBA stats api tolerates for the hours a scrape takes,
+# used when no rate limiter is given
+REQUESTS_PER_SECOND = 1
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+ScrapeJob = namedtuple('ScrapeJob', ['endpoint', 'season', 'season_type', 'subject'])
+ScrapeJob.__doc__ = """A unit of work of a ScrapeOrchestrator.
+
+Attributes:
+    endpoint: A string for the endpoint, one of ENDPOINTS.
+    season: An integer for the year the season begins.
+    season_type: A string for the season type.
+    subject: An integer for the player id of a shots job, the game id of an
+        outcomes job or 0 for a leaders job.
+"""
+
+JobResult = namedtuple('JobResult', ['job', 'rows', 'error'])
+JobResult.__doc__ = """The outcome of running a ScrapeJob.
+
+Attributes:
+    job: The ScrapeJob.
+    rows: An integer for the number of players, shots or games fetched, None
+        if it failed.
+    error: The exception raised by the job, None if it succeeded.
+"""
+
+class ScrapeOrchestrator(object):
+    """Scrapes a matrix of seasons x season types x endpoints as a resumable
+    queue of jobs.
+
+    Planning a season and season type queues a leaders job. Once it's done a
+    shots job is queued for every player on the leaderboard, and once a shots
+    job is done an outcomes job is queued for every new game in the shots.
+    Jobs are keyed on (endpoint, season, season type, subject) so every job is
+    only ever queued once, however often it's planned.
+
+    Every job's state is kept in a SQLite database and committed together with
+    the jobs it queues as soon as it finishes, so an interrupted run resumes
+    from where it stopped. Jobs run in a pool of max_concurrency threads that
+    share one client and one rate limiter. A failed job waits out an
+    exponential backoff before it's attempted again, so a throttled or
+    failing endpoint isn't hammered.
+
+    Attributes:
+        filename: A string for the path of the SQLite state database.
+        store: A nbastats.store.ShotStore that every player's shots are written
+            to as a 'player-<id>' chunk.
+        outcome_index: A nbastats.game.OutcomeIndex that game outcomes are
+            added to.
+        max_concurrency: An integer for the number of requests in flight.
+        rate_limiter: A nbastats.http.RateLimiter shared by every request.
+        client: A nbastats.http.Client used for the requests.
+        max_attempts: An integer for the number of times a job is attempted
+            before it's marked as failed.
+        backoff_factor: A number of seconds a job waits after its first
+            failure, doubled after every other failure.
+        max_backoff: A number of seconds that a job's wait won't exceed.
+        flush_every: An integer for the number of outcomes that are added to
+            the outcome index between saves.
+    """
+
+    def __init__(self, filename, store, outcome_index = None, max_concurrency = 4,
+        rate_limiter = None, client = None, max_attempts = 3, backoff_factor = 30,
+        max_backoff = 600, flush_every = 100
+    ):
+        """Initializes a ScrapeOrchestrator.
+
+        Arguments:
+            filename: A string for the path of the SQLite state database. It's
+                created if it doesn't exist.
+            store: A nbastats.store.ShotStore that shots are written to.
+            outcome_index: An optional nbastats.game.OutcomeIndex that game
+                outcomes are added to, an in-memory index by default.
+            max_concurrency: An integer for the number of requests in flight.
+            rate_limiter: An optional nbastats.http.RateLimiter shared by every
+                request, defaults to REQUESTS_PER_SECOND.
+            client: An optional nbastats.http.Client used for the requests.
+            max_attempts: An integer for the number of times a job is attempted
+                before it's marked as failed.
+            backoff_factor: A number of seconds a job waits after its first
+                failure, doubled after every other failure.
+            max_backoff: A number of seconds that a job's wait won't exceed.
+            flush_every: An integer for the number of outcomes that are added
+                to the outcome index between saves.
+        """
+
+        self.filename = filename
+        self.store = store
+        self.outcome_index = OutcomeIndex() if outcome_index is None else outcome_index
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = (RateLimiter(REQUESTS_PER_SECOND)
+            if rate_limiter is None else rate_limiter)
+        self.client = get_default_client() if client is None else client
+        self.max_attempts = max_attempts
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.flush_every = flush_every
+
+        self._db = sqlite3.connect(filename)
+        with self._db:
+            self._db.execute('''CREATE TABLE IF NOT EXISTS jobs (
+                endpoint TEXT NOT NULL,
+                season INTEGER NOT NULL,
+                season_type TEXT NOT NULL,
+                subject INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                rows INTEGER,
+                error TEXT,
+                updated REAL NOT NULL,
+                not_before REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (endpoint, season, season_type, subject)
+            )''')
+            # Databases written before failed jobs backed off
+            if 'not_before' not in [row[1] for row in
+                self._db.execute('PRAGMA table_info(jobs)')
+            ]:
+                self._db.execute('ALTER TABLE jobs ADD COLUMN not_before REAL '
+                    'NOT NULL DEFAULT 0')
+            self._db.execute('CREATE INDEX IF NOT EXISTS jobs_status '
+                'ON jobs (status)')
+            self._db.execute('''CREATE TABLE IF NOT EXISTS players (
+                season INTEGER NOT NULL,
+                season_type TEXT NOT NULL,
+                player_id INTEGER NOT NULL,
+                PRIMARY KEY (season, season_type, player_id)
+            )''')
+            self._db.execute('''CREATE TABLE IF NOT EXISTS plans (
+                season INTEGER NOT NULL,
+                season_type TEXT NOT NULL,
+                endpoint TEXT NOT NULL,
+                PRIMARY KEY (season, season_type, endpoint)
+            )''')
+
+    def plan(self, seasons, season_types, endpoints = ENDPOINTS):
+        """Queues the jobs of every combination of seasons and season types.
+
+        Arguments:
+            seasons: An iterable of Season objects or integer season years.
+            season_types: An iterable of season type strings, e.g. the
+                attributes of nbastats.options.SeasonType.
+            endpoints: An iterable of the endpoints to scrape, a subset of
+                ENDPOINTS.
+
+        Raises:
+            ValueError: If an endpoint isn't one of ENDPOINTS.
+
+        Returns:
+            An integer for the number of jobs that weren't queued already.
+        """
+
+        endpoints = set(endpoints) | {LEADERS}
+        for endpoint in endpoints:
+            if endpoint not in ENDPOINTS:
+                raise ValueError(f"{endpoint} is not a valid endpoint")
+
+        seasons = sorted(set(_season_year(season) for season in seasons))
+        season_types = sorted(set(season_types))
+        jobs = list()
+        with self._db:
+            for season in seasons:
+                for season_type in season_types:
+                    self._db.executemany('INSERT OR IGNORE INTO plans '
+                        '(season, season_type, endpoint) VALUES (?, ?, ?)',
+                        [(season, season_type, endpoint) for endpoint in endpoints])
+                    jobs.append(ScrapeJob(LEADERS, season, season_type, 0))
+
+                    # Outcomes of shots scraped before outcomes were planned
+                    if OUTCOMES in endpoints:
+                        jobs += [ScrapeJob(OUTCOMES, season, season_type, game_id)
+                            for game_id in self._stored_games(season, season_type)]
+
+                    # Players of leaderboards scraped before shots were planned
+                    if SHOTS in endpoints:
+                        jobs += [ScrapeJob(SHOTS, season, season_type, row[0])
+                            for row in self._db.execute('SELECT player_id FROM '
+                                'players WHERE season = ? AND season_type = ?',
+                                (season, season_type))]
+            return self._queue(jobs)
+
+    def run(self):
+        """Runs every pending job, including the jobs queued while running.
+
+        Jobs that failed fewer than max_attempts times are retried once their
+        backoff is over, and the run waits for them. Stopping early, e.g. with
+        KeyboardInterrupt, keeps every finished job so the next run picks up
+        the remaining ones.
+
+        Yields:
+            A JobResult for each job in the order they finish.
+        """
+
+        executor = ThreadPoolExecutor(max_workers = self.max_concurrency)
+        futures = dict()
+        unsaved = list()
+        try:
+            while True:
+                # Keep a few more jobs queued than there are threads
+                limit = 2 * self.max_concurrency - len(futures)
+                if limit > 0:
+                    for job in self._pending(limit,
+                        list(futures.values()) + unsaved
+                    ):
+                        futures[executor.submit(self._run_job, job)] = job
+                if not futures:
+                    # Every pending job is backing off after a failure
+                    delay = self._next_retry()
+                    if delay is None:
+                        return
+                    time.sleep(delay)
+                    continue
+
+                done, _ = wait(futures, timeout = self._next_retry(),
+                    return_when = FIRST_COMPLETED)
+                for future in done:
+                    job = futures.pop(future)
+                    try:
+                        rows, children = future.result()
+                    except Exception as e:
+                        self._fail(job, e)
+                        result = JobResult(job, None, e)
+                    else:
+                        if job.endpoint == OUTCOMES:
+                            self.outcome_index.add(job.subject, children)
+                            unsaved.append(job)
+                            if len(unsaved) >= self.flush_every:
+                                self._flush(unsaved)
+                        else:
+                            self._finish(job, rows, children)
+                        result = JobResult(job, rows, None)
+                    yield result
+        finally:
+            # Don't start the remaining jobs if the caller stops early
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait = True)
+            self._flush(unsaved)
+
+    def progress(self):
+        """Returns a dictionary of (endpoint, status) to the number of jobs."""
+
+        rows = self._db.execute('SELECT endpoint, status, COUNT(*) FROM jobs '
+            'GROUP BY endpoint, status').fetchall()
+        return {(endpoint, status): count for endpoint, status, count in rows}
+
+    def failed(self):
+        """Returns a list of (ScrapeJob, error string) of the failed jobs."""
+
+        rows = self._db.execute('SELECT endpoint, season, season_type, subject, '
+            'error FROM jobs WHERE status = ? ORDER BY endpoint, season, '
+            'season_type, subject', (FAILED,)).fetchall()
+        return [(ScrapeJob(*row[:4]), row[4]) for row in rows]
+
+    def retry_failed(self):
+        """Queues the failed jobs again with a fresh number of attempts.
+
+        Returns:
+            An integer for the number of jobs queued.
+        """
+
+        with self._db:
+            return self._db.execute('UPDATE jobs SET status = ?, attempts = 0, '
+                'not_before = 0 WHERE status = ?', (PENDING, FAILED)).rowcount
+
+    def close(self):
+        """Closes the state database."""
+
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _run_job(self, job):
+        """Fetches a job in a worker thread.
+
+        Returns:
+            A (rows, children) pair where children are the subjects of the
+            jobs to queue once it's done, or the line score of an outcomes job.
+        """
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+        season = Season(job.season)
+        if job.endpoint == LEADERS:
+            players = get_leaders(season, job.season_type, self.client)
+            return len(players), [player['PLAYER_ID'] for player in players]
+
+        if job.endpoint == SHOTS:
+            from nbastats.store import player_chunk_name
+
+            shots = get_shot_log(job.subject, season, job.season_type, self.client)
+            self.store.append(shots, season, job.season_type,
+                player_chunk_name(job.subject))
+            return len(shots), sorted(set(int(shot['GAME_ID']) for shot in shots))
+
+        return 1, get_line_score(job.subject, self.client)
+
+    def _finish(self, job, rows, children):
+        """Marks a leaders or shots job as done and queues its children in the
+        same transaction."""
+
+        child_endpoint = SHOTS if job.endpoint == LEADERS else OUTCOMES
+        planned = self._db.execute('SELECT 1 FROM plans WHERE season = ? AND '
+            'season_type = ? AND endpoint = ?',
+            (job.season, job.season_type, child_endpoint)).fetchone()
+        if child_endpoint == OUTCOMES:
+            children = [game_id for game_id in children
+                if game_id not in self.outcome_index]
+
+        with self._db:
+            self._db.execute('UPDATE jobs SET status = ?, rows = ?, error = NULL, '
+                'updated = ? WHERE endpoint = ? AND season = ? AND '
+                'season_type = ? AND subject = ?', (DONE, rows, time.time()) + job)
+            if job.endpoint == LEADERS:
+                self._db.executemany('INSERT OR IGNORE INTO players '
+                    '(season, season_type, player_id) VALUES (?, ?, ?)',
+                    [(job.season, job.season_type, player_id)
+                        for player_id in children])
+            if planned is not None:
+                self._queue([ScrapeJob(child_endpoint, job.season, job.season_type,
+                    subject) for subject in children])
+
+    def _flush(self, jobs):
+        """Saves the outcome index and only then marks its jobs as done."""
+
+        if not jobs:
+            return
+
+        self.outcome_index.save()
+        now = time.time()
+        with self._db:
+            self._db.executemany('UPDATE jobs SET status = ?, rows = 1, '
+                'error = NULL, updated = ? WHERE endpoint = ? AND season = ? AND '
+                'season_type = ? AND subject = ?',
+                [(DONE, now) + job for job in jobs])
+        del jobs[:]
+
+    def _fail(self, job, error):
+        """Counts a failed attempt, marking the job as failed after the last
+        and backing it off otherwise."""
+
+        now = time.time()
+        with self._db:
+            # The expressions are evaluated with the attempts before this one
+            self._db.execute('UPDATE jobs SET attempts = attempts + 1, '
+                'status = CASE WHEN attempts + 1 >= ? THEN ? ELSE ? END, '
+                'error = ?, updated = ?, '
+                'not_before = ? + MIN(?, ? * (1 << MIN(attempts, 30))) '
+                'WHERE endpoint = ? AND season = ? AND season_type = ? AND '
+                'subject = ?', (self.max_attempts, FAILED, PENDING, repr(error),
+                now, now, self.max_backoff, self.backoff_factor) + job)
+
+    def _queue(self, jobs):
+        """Inserts jobs that aren't queued yet, returns how many were new."""
+
+        now = time.time()
+        cursor = self._db.executemany('INSERT OR IGNORE INTO jobs '
+            '(endpoint, season, season_type, subject, status, updated) '
+            'VALUES (?, ?, ?, ?, ?, ?)', [job + (PENDING, now) for job in jobs])
+        return max(cursor.rowcount, 0)
+
+    def _pending(self, limit, running):
+        """Returns up to limit pending jobs that aren't running or waiting to
+        be saved, leaders first since they queue the other jobs."""
+
+        rows = self._db.execute('SELECT endpoint, season, season_type, subject '
+            'FROM jobs WHERE status = ? AND not_before <= ? ORDER BY CASE '
+            'endpoint WHEN ? THEN 0 WHEN ? THEN 1 ELSE 2 END, season, '
+            'season_type, subject LIMIT ?', (PENDING, time.time(), LEADERS, SHOTS,
+            limit + len(running))).fetchall()
+        running = set(running)
+        jobs = [job for job in (ScrapeJob(*row) for row in rows) if job not in running]
+        return jobs[:limit]
+
+    def _next_retry(self):
+        """Returns the seconds until the backoff of the next pending job is
+        over, or None if no pending job is backing off."""
+
+        now = time.time()
+        not_before, = self._db.execute('SELECT MIN(not_before) FROM jobs '
+            'WHERE status = ? AND not_before > ?', (PENDING, now)).fetchone()
+        return None if not_before is None else not_before - now
+
+    def _stored_games(self, season, season_type):
+        """Returns the ids of the stored games without an outcome."""
+
+        chunks = self.store.chunks([Season(season)], [season_type])
+        if not chunks:
+            return []
+        game_ids = self.store.read(['GAME_ID'], [Season(season)],
+            [season_type]).GAME_ID.astype(int).unique()
+        return sorted(int(game_id) for game_id in game_ids
+            if int(game_id) not in self.outcome_index)
+
+# Helper Functions
+def _season_year(season):
+    """Returns the integer year of a Season object or an integer."""
+
+    return season.season_year if isinstance(season, Season) else int(season)
@@ -1,11 +1,20 @@
-import json
-from nbastats.http import get_response
-from nbastats.options import LeaderboardSortCategory
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from nbastats.decode import api_error, load_result_sets
+from nbastats.http import get_content, get_default_client, record_decode
+from nbastats.options import LEADERS, SHOT_LOG, LeaderboardSortCategory
+from nbastats.stream import iter_result_sets
 
-PLAYER_SHOT_LOG_URL = 'https://stats.nba.com/stats/shotchartdetail'
-LEADERBOARDS_URL = 'https://stats.nba.com/stats/leaguedashplayerstats'
+PLAYER_SHOT_LOG_URL = SHOT_LOG.url
+LEADERBOARDS_URL = LEADERS.url
 
-def get_shot_log(player_id, season, season_type, **kwargs):
+# The name of the result set of the shots in shotchartdetail responses
+SHOT_CHART_DETAIL = 'Shot_Chart_Detail'
+
+def get_shot_log(player_id, season, season_type, client = None, as_frame = False,
+    **kwargs
+):
     """Gets the shot log for a player from NBA stats.
 
     The NBA stats api returns a dictionary in the following format:
@@ -34,6 +43,9 @@ def get_shot_log(player_id, season, season_type, **kwargs):
         player_id: An integer id of a player.
         season: A Season object for the season.
         season_type: A string for the season type.
+        client: An optional nbastats.http.Client used for the request.
+        as_frame: A boolean for whether to return a pandas.DataFrame instead.
+        kwargs: Any other queries supported by the NBA stats api.
 
     Raises:
         ValueError: If the arguments provided aren't valid queries or the query
@@ -45,57 +57,109 @@ def get_shot_log(player_id, season, season_type, **kwargs):
         For each set in 'resultSets', a shot will be described by a dictionary 
         where the keys are the 'headers' and the values are the corresponding 
         statistics in the shot list.        
+
+        If as_frame is True, a pandas.DataFrame with a row per shot built
+        straight from the columns of 'rowSet' using the dtypes in
+        nbastats.columnar.SHOT_LOG_DTYPES instead.
     """
 
-    params = {
-        'PlayerID': player_id,
-        'Season': str(season),
-        'SeasonType': season_type,
-        'PlayerPosition': "",
-        'ContextMeasure': "FGA",
-        'DateFrom': "",
-        'DateTo': "",
-        'GameID': "",
-        'GameSegment': "",
-        'LastNGames': 0,
-        'LeagueID': "00",
-        'Location': "",
-        'Month': 0,
-        'OpponentTeamID': 0,
-        'Outcome': "",
-        'Period': 0,
-        'Position': "",
-        'RookieYear': "",
-        'SeasonSegment': "",
-        'TeamID': 0,
-        'VsConference': "",
-        'VsDivision': "" 
-    }
+    params = shot_log_query(player_id, season, season_type, **kwargs)
+    body, encoding = get_content(PLAYER_SHOT_LOG_URL, params, client)
+    return decode_shot_log(body, encoding, as_frame, client)
 
-    for key, val in kwargs.items():
-        if key in params:
-            params[key] = val
-        else:
-            raise ValueError(f"{key} is not a valid argument")
+def iter_shot_log(player_id, season, season_type, client = None,
+    batch_size = None, **kwargs
+):
+    """Streams the shot log for a player from NBA stats.
 
-    response_str = get_response(PLAYER_SHOT_LOG_URL, params)
+    Unlike get_shot_log the response is parsed incrementally as it's received
+    and league averages are dropped while parsing, so only the shots not yet
+    consumed are ever held in memory.
 
-    # If the parameters given aren't valid
-    try:
-        player_shots = json.loads(response_str)
-    except:
-        raise ValueError(f"API error - {response_str}")
+    Arguments:
+        player_id: An integer id of a player.
+        season: A Season object for the season.
+        season_type: A string for the season type.
+        client: An optional nbastats.http.Client used for the request.
+        batch_size: An optional integer for the number of shots per batch.
+        kwargs: Any other queries supported by the NBA stats api.
 
-    shots = list()
-    for result in player_shots['resultSets']:
-        header = result['headers']
-        shots += [dict(zip(header, shot)) for shot in result['rowSet']]
+    Raises:
+        ValueError: If the arguments provided aren't valid queries, batch_size
+            is less than 1 or the query doesn't conform to the NBA stats api.
 
-    # Only keep shot data, not league averages
-    shots = [shot for shot in shots if shot['GRID_TYPE'] == 'Shot Chart Detail']
-    return shots
+    Yields:
+        A dictionary for each shot as returned by get_shot_log, or a list of up
+        to batch_size of them if batch_size is given.
+    """
+
+    params = shot_log_query(player_id, season, season_type, **kwargs)
+    shots = _recorded(PLAYER_SHOT_LOG_URL,
+        _iter_shots(_iter_rows(PLAYER_SHOT_LOG_URL, params, client)), client)
+    return shots if batch_size is None else _batched(shots, batch_size)
+
+ShotLogResult = namedtuple('ShotLogResult', ['player_id', 'shots', 'error'])
+ShotLogResult.__doc__ = """The outcome of fetching one player's shot log.
+
+Attributes:
+    player_id: The integer id of the player.
+    shots: A list of shots as returned by get_shot_log, None if it failed.
+    error: The exception raised while fetching the shot log, None otherwise.
+"""
+
+def get_shot_logs(player_ids, season, season_type, max_concurrency = 4,
+    rate_limiter = None, client = None, player_kwargs = None, **kwargs
+):
+    """Gets the shot logs for many players concurrently.
+
+    Shot logs are fetched by a pool of max_concurrency threads sharing one
+    pooled client. A failed player doesn't abort the others, its error is
+    reported in its result instead.
+
+    Arguments:
+        player_ids: An iterable of integer player ids.
+        season: A Season object for the season.
+        season_type: A string for the season type.
+        max_concurrency: An integer for the number of requests in flight.
+        rate_limiter: An optional nbastats.http.RateLimiter shared by every
+            request, e.g. to stay below the rate the NBA stats api tolerates.
+        client: An optional nbastats.http.Client used for the requests.
+        player_kwargs: An optional dictionary of player ids to dictionaries of
+            queries that override kwargs for that player, e.g. a DateFrom.
+        kwargs: Any other queries supported by get_shot_log.
+
+    Yields:
+        A ShotLogResult for each player in the order they finish.
+    """
+
+    if client is None:
+        client = get_default_client()
+    if player_kwargs is None:
+        player_kwargs = dict()
+
+    def fetch(player_id):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        queries = dict(kwargs, **player_kwargs.get(player_id, {}))
+        return get_shot_log(player_id, season, season_type, client, **queries)
+
+    with ThreadPoolExecutor(max_workers = max_concurrency) as executor:
+        futures = {executor.submit(fetch, player_id): player_id
+            for player_id in player_ids}
+        try:
+            for future in as_completed(futures):
+                player_id = futures[future]
+                try:
+                    result = ShotLogResult(player_id, future.result(), None)
+                except Exception as e:
+                    result = ShotLogResult(player_id, None, e)
+                yield result
+        finally:
+            # Don't start the remaining requests if the caller stops early
+            for future in futures:
+                future.cancel()
 
-def get_leaders(season, season_type):
+def get_leaders(season, season_type, client = None, as_frame = False):
     """Gets the leaders of a season in descending sorted order.
 
     The NBA stats api returns a dictionary in the following format:
@@ -122,6 +186,8 @@ def get_leaders(season, season_type):
         season: A Season object for the season.
         season_type: A string for the season type.
         sort_category: An optional string for the category to be sorted by.
+        client: An optional nbastats.http.Client used for the request.
+        as_frame: A boolean for whether to return a pandas.DataFrame instead.
 
     Raises:
         ValueError: If the arguments provided aren't valid queries or the query
@@ -132,58 +198,249 @@ def get_leaders(season, season_type):
 
         Each player is represented by a dictionary where the keys are "headers"
         and the values are the corresponding statistics of each player list.
+
+        If as_frame is True, a pandas.DataFrame with a row per player built
+        straight from the columns of 'rowSet' instead.
     """
 
-    params = { 
-        "Season": str(season),
-        "SeasonType": season_type,
-        "College": "",
-        "Conference": "",
-        "Country": "",
-        "DateFrom": "",
-        "DateTo": "",
-        "Division": "",
-        "DraftPick": "",
-        "DraftYear": "",
-        "GameScope": "",
-        "GameSegment": "",
-        "Height": "",
-        "LastNGames": "0",
-        "LeagueID": "00",
-        "Location": "",
-        "MeasureType": "Base",
-        "Month": "0",
-        "OpponentTeamID": "0",
-        "Outcome": "",
-        "PORound": "0",
-        "PaceAdjust": "N",
-        "PerMode": "PerGame",
-        "Period": "0",
-        "PlayerExperience": "",
-        "PlayerPosition": "",
-        "PlusMinus": "N",
-        "Rank": "N",
-        "SeasonSegment": "",
-        "ShotClockRange": "",
-        "StarterBench": "",
-        "TeamID": "0",
-        "TwoWay": "0",
-        "VsConference": "",
-        "VsDivision": "",
-        "Weight": ""
-    }
+    params = leaders_query(season, season_type)
+    body, encoding = get_content(LEADERBOARDS_URL, params, client)
+    return decode_leaders(body, encoding, as_frame, client)
+
+def iter_leaders(season, season_type, client = None, batch_size = None):
+    """Streams the leaders of a season in descending sorted order.
+
+    Unlike get_leaders the response is parsed incrementally as it's received.
+
+    Arguments:
+        season: A Season object for the season.
+        season_type: A string for the season type.
+        client: An optional nbastats.http.Client used for the request.
+        batch_size: An optional integer for the number of players per batch.
+
+    Raises:
+        ValueError: If batch_size is less than 1 or the query doesn't conform
+            to the NBA stats api.
 
-    response_str = get_response(LEADERBOARDS_URL, params)
+    Yields:
+        A dictionary for each player as returned by get_leaders, or a list of up
+        to batch_size of them if batch_size is given.
+    """
+
+    params = leaders_query(season, season_type)
+    players = _recorded(LEADERBOARDS_URL, (dict(zip(headers, row))
+        for _, headers, row in _iter_rows(LEADERBOARDS_URL, params, client)), client)
+    return players if batch_size is None else _batched(players, batch_size)
+
+def shot_log_query(player_id, season, season_type, **kwargs):
+    """Returns the queries of a shotchartdetail request, as sent by
+    get_shot_log.
+
+    Arguments:
+        player_id: An integer id of a player.
+        season: A Season object for the season.
+        season_type: A string for the season type.
+        kwargs: Any other queries supported by the NBA stats api.
+
+    Raises:
+        ValueError: If the arguments provided aren't valid queries.
+
+    Returns:
+        A nbastats.options.Query.
+    """
+
+    return SHOT_LOG.query(**dict(kwargs, PlayerID = player_id,
+        Season = str(season), SeasonType = season_type))
+
+def leaders_query(season, season_type):
+    """Returns the queries of a leaguedashplayerstats request, as sent by
+    get_leaders.
+
+    Arguments:
+        season: A Season object for the season.
+        season_type: A string for the season type.
+
+    Raises:
+        ValueError: If the arguments provided aren't valid queries.
+
+    Returns:
+        A nbastats.options.Query.
+    """
+
+    return LEADERS.query(Season = str(season), SeasonType = season_type)
+
+def decode_shot_log(body, encoding = None, as_frame = False, client = None):
+    """Decodes the body of a shotchartdetail response as get_shot_log does.
+
+    Arguments:
+        body: The bytes (or string) of the response body.
+        encoding: An optional string for the encoding of body, defaults to
+            'utf-8'.
+        as_frame: A boolean for whether to return a pandas.DataFrame instead.
+        client: An optional client whose observers are notified of the
+            decoded response, the default nbastats.http.Client otherwise.
+
+    Raises:
+        ValueError: If the response doesn't conform to the NBA stats api.
+
+    Returns:
+        The shots as returned by get_shot_log.
+    """
+
+    start = time.perf_counter()
 
     # If the parameters given aren't valid
     try:
-        leaderboard_results = json.loads(response_str)
-    except:
-        raise ValueError(f"API error - {response_str}")
+        # League averages aren't decoded
+        result_sets = [result for result in load_result_sets(body, encoding,
+            [SHOT_CHART_DETAIL]) if result is not None]
+    except ValueError:
+        raise api_error(body, encoding)
+
+    if as_frame:
+        shots = _shot_log_frame(result_sets)
+    else:
+        shots = list()
+        for result in result_sets:
+            header = result['headers']
+            shots += [dict(zip(header, shot)) for shot in result['rowSet']]
+
+        # Only keep shot data, not league averages
+        shots = [shot for shot in shots if shot['GRID_TYPE'] == 'Shot Chart Detail']
+
+    record_decode(PLAYER_SHOT_LOG_URL, time.perf_counter() - start, len(shots),
+        client)
+    return shots
 
-    leaderboards = list()
-    for result in leaderboard_results['resultSets']: 
+def decode_leaders(body, encoding = None, as_frame = False, client = None):
+    """Decodes the body of a leaguedashplayerstats response as get_leaders
+    does.
+
+    Arguments:
+        body: The bytes (or string) of the response body.
+        encoding: An optional string for the encoding of body, defaults to
+            'utf-8'.
+        as_frame: A boolean for whether to return a pandas.DataFrame instead.
+        client: An optional client whose observers are notified of the
+            decoded response, the default nbastats.http.Client otherwise.
+
+    Raises:
+        ValueError: If the response doesn't conform to the NBA stats api.
+
+    Returns:
+        The players as returned by get_leaders.
+    """
+
+    start = time.perf_counter()
+
+    # If the parameters given aren't valid
+    try:
+        result_sets = load_result_sets(body, encoding)
+    except ValueError:
+        raise api_error(body, encoding)
+
+    if as_frame:
+        from nbastats.columnar import LEADERS_DTYPES, concat_frames, result_set_to_frame
+        leaderboards = concat_frames([result_set_to_frame(result['headers'],
+            result['rowSet'], LEADERS_DTYPES)
+            for result in result_sets])
+    else:
+        leaderboards = list()
+        for result in result_sets: 
+            header = result['headers']
+            leaderboards += [dict(zip(header, player)) 
+                for player in result['rowSet']]
+
+    record_decode(LEADERBOARDS_URL, time.perf_counter() - start,
+        len(leaderboards), client)
+    return leaderboards
+
+# Helper Functions
+def _iter_rows(url, params, client):
+    """Streams the (name, headers, row) of every result set of a request."""
+
+    if client is None:
+        client = get_default_client()
+    return iter_result_sets(client.stream(url, params))
+
+def _iter_shots(rows):
+    """Turns the shot chart detail rows of result sets into dictionaries."""
+
+    set_headers = None
+    grid_type = None
+    for _, headers, row in rows:
+        # Look up the GRID_TYPE column once per result set
+        if headers is not set_headers:
+            set_headers = headers
+            grid_type = (headers.index('GRID_TYPE')
+                if 'GRID_TYPE' in headers else None)
+
+        # Only keep shot data, not league averages
+        if grid_type is not None and row[grid_type] == 'Shot Chart Detail':
+            yield dict(zip(headers, row))
+
+def _recorded(url, items, client):
+    """Yields items and records the rows and the time spent producing them
+    once the stream is finished or closed."""
+
+    rows = 0
+    seconds = 0.0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            finally:
+                seconds += time.perf_counter() - start
+            rows += 1
+            yield item
+    finally:
+        record_decode(url, seconds, rows, client)
+
+def _batched(iterable, batch_size):
+    """Returns a generator of lists of up to batch_size items of iterable.
+
+    batch_size is checked here rather than in the generator so a bad value
+    raises when the iterator is created, not when it's first consumed.
+    """
+
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    return _iter_batches(iterable, batch_size)
+
+def _iter_batches(iterable, batch_size):
+    """Yields lists of up to batch_size items of iterable."""
+
+    batch = list()
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = list()
+    if batch:
+        yield batch
+
+def _shot_log_frame(result_sets):
+    """Builds a pandas.DataFrame of the shot chart detail rows of result_sets."""
+
+    from nbastats.columnar import (SHOT_LOG_DTYPES, SHOT_LOG_HEADERS, concat_frames,
+        result_set_to_frame)
+
+    frames = list()
+    for result in result_sets:
         header = result['headers']
-        leaderboards += [dict(zip(header, player)) 
-            for player in result['rowSet']]
-    return leaderboards
\ No newline at end of file
+        if 'GRID_TYPE' not in header:
+            continue
+
+        # Only keep shot data, not league averages
+        grid_type = header.index('GRID_TYPE')
+        rows = [shot for shot in result['rowSet']
+            if shot[grid_type] == 'Shot Chart Detail']
+        frames.append(result_set_to_frame(header, rows, SHOT_LOG_DTYPES))
+
+    # Keep the columns of an empty shot log, even without a shot chart set
+    if not frames:
+        return result_set_to_frame(SHOT_LOG_HEADERS, [], SHOT_LOG_DTYPES)
+    return concat_frames([frame for frame in frames if len(frame)] or frames[:1])
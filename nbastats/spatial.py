@@ -0,0 +1,263 @@
+import numpy as np
+import pandas as pd
+from nbastats.court import COURT_LENGTH, COURT_WIDTH, LENGTH_SHIFT, WIDTH_SHIFT
+
+SPATIAL_COLUMNS = ['GAME_ID', 'PLAYER_ID', 'TEAM_ID', 'GAME_DATE', 'SHOT_TYPE',
+    'SHOT_ZONE_BASIC', 'SHOT_ZONE_AREA', 'SHOT_ZONE_RANGE', 'SHOT_MADE_FLAG',
+    'LOC_X', 'LOC_Y']
+
+# Columns that zone queries can match on
+ZONE_COLUMNS = {
+    'zone_basic': 'SHOT_ZONE_BASIC',
+    'zone_area': 'SHOT_ZONE_AREA',
+    'zone_range': 'SHOT_ZONE_RANGE',
+    'shot_type': 'SHOT_TYPE'
+}
+
+class ShotIndex(object):
+    """A grid bucket index of shot locations for fast court region queries.
+
+    The half court is split into square cells of cell_size court units and
+    the shots are sorted by cell, so a region query only checks the shots of
+    the cells it overlaps instead of every shot. Cells are numbered row by row
+    so the cells of a rectangle's row are one contiguous slice. Shots beyond
+    the half court are kept in the cells on its edge.
+
+    Every query can be filtered by player, team, game or date range and
+    returns the matching shots in their original order.
+
+    Attributes:
+        shots: The pandas.DataFrame of the indexed shots.
+        cell_size: An integer for the width and length of a cell in court
+            units.
+    """
+
+    def __init__(self, shots, cell_size = 10):
+        """Initializes a ShotIndex.
+
+        Arguments:
+            shots: A pandas.DataFrame of shots with at least the 'LOC_X' and
+                'LOC_Y' columns. Filters and zone queries need the columns
+                they match on, e.g. 'PLAYER_ID' or 'SHOT_ZONE_BASIC'.
+            cell_size: An integer for the width and length of a cell in court
+                units.
+        """
+
+        if cell_size < 1:
+            raise ValueError("cell_size must be at least 1")
+
+        self.shots = shots.reset_index(drop = True)
+        self.cell_size = cell_size
+        self._x = self.shots.LOC_X.to_numpy(dtype = np.int64)
+        self._y = self.shots.LOC_Y.to_numpy(dtype = np.int64)
+        self._columns = -(-COURT_WIDTH // cell_size)
+        self._rows = -(-COURT_LENGTH // cell_size)
+
+        cells = (self._cell_index(self._y, LENGTH_SHIFT, self._rows) * self._columns
+            + self._cell_index(self._x, WIDTH_SHIFT, self._columns))
+        self._order = np.argsort(cells, kind = 'stable')
+        self._starts = np.zeros(self._rows * self._columns + 1, dtype = np.int64)
+        np.cumsum(np.bincount(cells, minlength = self._rows * self._columns),
+            out = self._starts[1:])
+
+        # Filter and zone columns are only converted once they're queried
+        self._filter_values = dict()
+        self._zone_positions = dict()
+
+    @classmethod
+    def from_store(cls, store, seasons = None, season_types = None,
+        cell_size = 10, columns = None
+    ):
+        """Builds a ShotIndex of the shots of a store.
+
+        Arguments:
+            store: A nbastats.store.ShotStore.
+            seasons: An optional list of Season objects (or their strings) to
+                index, e.g. several seasons to explore together.
+            season_types: An optional list of season type strings to index.
+            cell_size: An integer for the width and length of a cell in court
+                units.
+            columns: An optional list of the column names to read, defaults to
+                SPATIAL_COLUMNS.
+        """
+
+        shots = store.read(columns if columns is not None else SPATIAL_COLUMNS,
+            seasons, season_types)
+        return cls(shots, cell_size)
+
+    def rectangle(self, x_min, x_max, y_min, y_max, **filters):
+        """Gets the shots in a rectangle of the court, bounds included.
+
+        Arguments:
+            x_min: A number for the left bound of LOC_X.
+            x_max: A number for the right bound of LOC_X.
+            y_min: A number for the bottom bound of LOC_Y.
+            y_max: A number for the top bound of LOC_Y.
+            filters: Any of the filters of positions.
+
+        Returns:
+            A pandas.DataFrame of the matching shots.
+        """
+
+        return self.shots.iloc[self.positions(x_min, x_max, y_min, y_max, **filters)]
+
+    def radius(self, x, y, radius, **filters):
+        """Gets the shots within a distance of a point of the court.
+
+        Arguments:
+            x: A number for the LOC_X of the center, e.g. 0 for the basket.
+            y: A number for the LOC_Y of the center.
+            radius: A number of court units, e.g. 80 for 8 feet.
+            filters: Any of the filters of positions.
+
+        Returns:
+            A pandas.DataFrame of the matching shots.
+        """
+
+        positions = self.positions(x - radius, x + radius, y - radius, y + radius,
+            **filters)
+        distances = (self._x[positions] - x) ** 2 + (self._y[positions] - y) ** 2
+        return self.shots.iloc[positions[distances <= radius ** 2]]
+
+    def zone(self, zone_basic = None, zone_area = None, zone_range = None,
+        shot_type = None, **filters
+    ):
+        """Gets the shots of a shot zone.
+
+        Every zone value is the string of the NBA stats api, e.g.
+        zone_basic = 'Mid-Range' and zone_area = 'Left Side(L)'. Values that
+        aren't given match every shot.
+
+        Arguments:
+            zone_basic: An optional string of SHOT_ZONE_BASIC.
+            zone_area: An optional string of SHOT_ZONE_AREA.
+            zone_range: An optional string of SHOT_ZONE_RANGE.
+            shot_type: An optional string of SHOT_TYPE.
+            filters: Any of the filters of positions.
+
+        Returns:
+            A pandas.DataFrame of the matching shots.
+        """
+
+        positions = None
+        zones = {'zone_basic': zone_basic, 'zone_area': zone_area,
+            'zone_range': zone_range, 'shot_type': shot_type}
+        for name, value in zones.items():
+            if value is None:
+                continue
+            matches = self._zone(ZONE_COLUMNS[name]).get(str(value),
+                np.zeros(0, dtype = np.int64))
+            positions = matches if positions is None else np.intersect1d(
+                positions, matches, assume_unique = True)
+
+        if positions is None:
+            positions = np.arange(len(self.shots))
+        return self.shots.iloc[self._filter(positions, **filters)]
+
+    def positions(self, x_min, x_max, y_min, y_max, player_ids = None,
+        team_ids = None, game_ids = None, date_from = None, date_to = None
+    ):
+        """Returns the sorted positions in shots of the shots in a rectangle.
+
+        Arguments:
+            x_min: A number for the left bound of LOC_X.
+            x_max: A number for the right bound of LOC_X.
+            y_min: A number for the bottom bound of LOC_Y.
+            y_max: A number for the top bound of LOC_Y.
+            player_ids: An optional integer or iterable of PLAYER_ID to keep.
+            team_ids: An optional integer or iterable of TEAM_ID to keep.
+            game_ids: An optional integer or iterable of GAME_ID to keep.
+            date_from: An optional datetime.date or 'YYYYMMDD' string for the
+                first GAME_DATE to keep.
+            date_to: An optional datetime.date or 'YYYYMMDD' string for the
+                last GAME_DATE to keep.
+
+        Returns:
+            A numpy.array of integer positions.
+        """
+
+        if x_min > x_max or y_min > y_max:
+            return np.zeros(0, dtype = np.int64)
+
+        first_column = self._cell_index(np.floor(x_min), WIDTH_SHIFT, self._columns)
+        last_column = self._cell_index(np.floor(x_max), WIDTH_SHIFT, self._columns)
+        first_row = self._cell_index(np.floor(y_min), LENGTH_SHIFT, self._rows)
+        last_row = self._cell_index(np.floor(y_max), LENGTH_SHIFT, self._rows)
+
+        # The cells of a row of the rectangle are contiguous
+        slices = list()
+        for row in range(int(first_row), int(last_row) + 1):
+            start = self._starts[row * self._columns + first_column]
+            stop = self._starts[row * self._columns + last_column + 1]
+            slices.append(self._order[start: stop])
+        positions = np.concatenate(slices)
+
+        x = self._x[positions]
+        y = self._y[positions]
+        positions = positions[(x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)]
+        positions.sort()
+        return self._filter(positions, player_ids, team_ids, game_ids, date_from,
+            date_to)
+
+    def _filter(self, positions, player_ids = None, team_ids = None,
+        game_ids = None, date_from = None, date_to = None
+    ):
+        """Returns the positions whose shots match every given filter."""
+
+        for column, ids in (('PLAYER_ID', player_ids), ('TEAM_ID', team_ids),
+            ('GAME_ID', game_ids)
+        ):
+            if ids is None:
+                continue
+            ids = np.array([ids] if np.isscalar(ids) else list(ids), dtype = np.int64)
+            positions = positions[np.isin(self._values(column)[positions], ids)]
+
+        if date_from is not None or date_to is not None:
+            dates = self._values('GAME_DATE')[positions]
+            keep = np.ones(len(positions), dtype = bool)
+            if date_from is not None:
+                keep &= dates >= _date_number(date_from)
+            if date_to is not None:
+                keep &= dates <= _date_number(date_to)
+            positions = positions[keep]
+        return positions
+
+    def _values(self, column):
+        """Returns a column as integers, e.g. GAME_DATE as YYYYMMDD."""
+
+        values = self._filter_values.get(column)
+        if values is None:
+            if column not in self.shots:
+                raise ValueError(f"{column} isn't an indexed column")
+            values = self.shots[column]
+            if column == 'GAME_DATE':
+                values = values.astype(str).str.replace('-', '', regex = False)
+            values = self._filter_values[column] = values.to_numpy(dtype = np.int64)
+        return values
+
+    def _zone(self, column):
+        """Returns a dictionary of the values of a column to their sorted
+        positions."""
+
+        positions = self._zone_positions.get(column)
+        if positions is None:
+            if column not in self.shots:
+                raise ValueError(f"{column} isn't an indexed column")
+            values = self.shots[column].astype(str).to_numpy()
+            positions = self._zone_positions[column] = {value: np.flatnonzero(
+                values == value) for value in pd.unique(values)}
+        return positions
+
+    def _cell_index(self, values, shift, cells):
+        """Returns the cells along an axis of coordinates, clipped to the
+        court."""
+
+        return np.clip((values + shift) // self.cell_size, 0, cells - 1).astype(np.int64)
+
+# Helper Functions
+def _date_number(value):
+    """Returns a date as an integer in the YYYYMMDD format."""
+
+    if hasattr(value, 'strftime'):
+        return int(value.strftime('%Y%m%d'))
+    return int(str(value).replace('-', ''))
@@ -0,0 +1,329 @@
+import json
+import os
+import shutil
+import uuid
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from pandas.api.types import CategoricalDtype, is_numeric_dtype
+from nbastats.columnar import SHOT_LOG_DTYPES, concat_frames
+
+META_FILENAME = '_meta.json'
+
+# The number of segments extend adds to a chunk before rewriting it as one
+MAX_SEGMENTS = 32
+
+ChunkInfo = namedtuple('ChunkInfo', ['rows', 'version'])
+ChunkInfo.__doc__ = """The size and version of a chunk, read from its metadata only.
+
+Attributes:
+    rows: An integer for the number of shots in the chunk.
+    version: A string that changes every time the chunk is written or
+        extended, None for chunks written before versions were kept.
+"""
+
+class ShotStore(object):
+    """A typed, columnar on-disk store of shots partitioned by season.
+
+    Shots are appended in chunks, e.g. one per player, under
+    <root>/<season>/<season type>/<chunk>/ where every column is a .npy file:
+    numeric columns are stored with the narrow dtypes of
+    nbastats.columnar.SHOT_LOG_DTYPES and strings are dictionary encoded into
+    integer codes plus a list of categories in the chunk's metadata. Columns
+    are read individually and memory-mapped, so only the requested columns are
+    ever paged in. Shots added to a chunk by extend are written as segments of
+    their own rather than rewriting the chunk.
+
+    Attributes:
+        root: A string for the directory of the store.
+    """
+
+    def __init__(self, root):
+        """Initializes a ShotStore, creating the directory if needed.
+
+        Arguments:
+            root: A string for the directory of the store.
+        """
+
+        self.root = root
+        os.makedirs(root, exist_ok = True)
+
+    def append(self, shots, season, season_type, name):
+        """Writes a chunk of shots, replacing any chunk with the same name.
+
+        Arguments:
+            shots: A pandas.DataFrame of shots or a list of dictionaries where
+                each describes a shot as returned by get_shot_log.
+            season: A Season object (or its string) for the season.
+            season_type: A string for the season type.
+            name: A string for the chunk, e.g. 'player-201939'.
+        """
+
+        if not isinstance(shots, pd.DataFrame):
+            shots = pd.DataFrame(shots)
+
+        chunk_dir = self._chunk_dir(season, season_type, name)
+        temp_dir = f'{chunk_dir}.tmp'
+        if os.path.exists(temp_dir):
+            shutil.rmtree(temp_dir)
+        os.makedirs(temp_dir)
+
+        meta = {'rows': len(shots), 'columns': dict()}
+        for column_name in shots.columns:
+            values, column_meta = _encode_column(shots[column_name],
+                SHOT_LOG_DTYPES.get(column_name))
+            np.save(os.path.join(temp_dir, f'{column_name}.npy'), values)
+            meta['columns'][column_name] = column_meta
+
+        _write_meta(temp_dir, meta)
+
+        # Swap the chunk in only once it's completely written
+        if os.path.exists(chunk_dir):
+            shutil.rmtree(chunk_dir)
+        os.replace(temp_dir, chunk_dir)
+
+    def extend(self, shots, season, season_type, name):
+        """Appends shots to the end of a chunk, creating it if needed.
+
+        The rows already in the chunk keep their positions so readers can pick
+        up only the rows past a count they've seen before. The shots are
+        written as a new segment of .npy files, so extending costs as much as
+        the shots added until the chunk has MAX_SEGMENTS segments, when it's
+        rewritten as one.
+
+        Arguments:
+            shots: A pandas.DataFrame of shots or a list of dictionaries where
+                each describes a shot as returned by get_shot_log.
+            season: A Season object (or its string) for the season.
+            season_type: A string for the season type.
+            name: A string for the chunk, e.g. 'player-201939'.
+        """
+
+        if not isinstance(shots, pd.DataFrame):
+            shots = pd.DataFrame(shots)
+
+        if not len(shots):
+            if not self.has_chunk(season, season_type, name):
+                self.append(shots, season, season_type, name)
+            return
+        if not self.has_chunk(season, season_type, name):
+            self.append(shots, season, season_type, name)
+            return
+
+        chunk_dir = self._chunk_dir(season, season_type, name)
+        meta = _read_meta(chunk_dir)
+        segments = meta.get('segments', [])
+        if (not meta['rows'] or list(shots.columns) != list(meta['columns'])
+            or len(segments) + 1 >= MAX_SEGMENTS
+        ):
+            existing = self.read_chunk(season, season_type, name, mmap = False)
+            self.append(concat_frames([frame for frame in (existing, shots)
+                if len(frame)]), season, season_type, name)
+            return
+
+        # The segment's files are only read once the metadata lists them
+        segment = len(segments) + 1
+        segment_meta = {'rows': len(shots), 'columns': dict()}
+        for column_name in shots.columns:
+            values, column_meta = _encode_column(shots[column_name],
+                SHOT_LOG_DTYPES.get(column_name))
+            np.save(os.path.join(chunk_dir, f'{column_name}.{segment}.npy'), values)
+            segment_meta['columns'][column_name] = column_meta
+
+        meta['rows'] += len(shots)
+        meta['segments'] = segments + [segment_meta]
+        _write_meta(chunk_dir, meta)
+
+    def chunk_info(self, season, season_type, name):
+        """Returns the ChunkInfo of a chunk without reading its columns."""
+
+        meta = _read_meta(self._chunk_dir(season, season_type, name))
+        return ChunkInfo(meta['rows'], meta.get('version'))
+
+    def has_chunk(self, season, season_type, name):
+        """Returns whether a chunk exists."""
+
+        return os.path.exists(os.path.join(
+            self._chunk_dir(season, season_type, name), META_FILENAME))
+
+    def chunks(self, seasons = None, season_types = None):
+        """Returns a sorted list of (season, season type, name) of every chunk.
+
+        Arguments:
+            seasons: An optional list of Season objects (or their strings) to
+                restrict the chunks to.
+            season_types: An optional list of season type strings to restrict
+                the chunks to.
+        """
+
+        seasons = None if seasons is None else set(str(season) for season in seasons)
+        season_types = None if season_types is None else set(season_types)
+
+        chunks = list()
+        for season in _list_dirs(self.root):
+            if seasons is not None and season not in seasons:
+                continue
+            for season_type in _list_dirs(os.path.join(self.root, season)):
+                if season_types is not None and season_type not in season_types:
+                    continue
+                for name in _list_dirs(os.path.join(self.root, season, season_type)):
+                    chunk_dir = os.path.join(self.root, season, season_type, name)
+                    if os.path.exists(os.path.join(chunk_dir, META_FILENAME)):
+                        chunks.append((season, season_type, name))
+        return chunks
+
+    def read(self, columns = None, seasons = None, season_types = None, mmap = True):
+        """Reads shots into a pandas.DataFrame.
+
+        Arguments:
+            columns: An optional list of the column names to read, e.g.
+                ['GAME_ID', 'TEAM_ID', 'LOC_X', 'LOC_Y', 'SHOT_TYPE'].
+            seasons: An optional list of Season objects (or their strings) to
+                read.
+            season_types: An optional list of season type strings to read.
+            mmap: A boolean for whether to memory-map the column files.
+
+        Returns:
+            A pandas.DataFrame of the shots of every matching chunk.
+        """
+
+        frames = [self.read_chunk(season, season_type, name, columns, mmap)
+            for season, season_type, name in self.chunks(seasons, season_types)]
+        return concat_frames([frame for frame in frames if len(frame)]
+            or frames[:1], columns)
+
+    def read_chunk(self, season, season_type, name, columns = None, mmap = True):
+        """Reads a single chunk into a pandas.DataFrame.
+
+        Arguments:
+            season: A Season object (or its string) for the season.
+            season_type: A string for the season type.
+            name: A string for the chunk.
+            columns: An optional list of the column names to read.
+            mmap: A boolean for whether to memory-map the column files.
+        """
+
+        chunk_dir = self._chunk_dir(season, season_type, name)
+        meta = _read_meta(chunk_dir)
+
+        if columns is None:
+            columns = list(meta['columns'])
+        if not meta['rows']:
+            return pd.DataFrame(columns = columns)
+        for column_name in columns:
+            if column_name not in meta['columns']:
+                raise ValueError(f"{column_name} is not a stored column")
+
+        # The first segment's files have no number, as before chunks had segments
+        segments = [('', meta)] + [(f'.{segment}', segment_meta)
+            for segment, segment_meta in enumerate(meta.get('segments', []), 1)]
+        frames = list()
+        for suffix, segment_meta in segments:
+            data = dict()
+            for column_name in columns:
+                values = np.load(os.path.join(chunk_dir,
+                    f'{column_name}{suffix}.npy'), mmap_mode = 'r' if mmap else None)
+                data[column_name] = _decode_column(values,
+                    segment_meta['columns'][column_name])
+            frames.append(pd.DataFrame(data, columns = columns))
+        return concat_frames(frames)
+
+    def remove_chunk(self, season, season_type, name):
+        """Removes a chunk if it exists."""
+
+        chunk_dir = self._chunk_dir(season, season_type, name)
+        if os.path.exists(chunk_dir):
+            shutil.rmtree(chunk_dir)
+
+    def _chunk_dir(self, season, season_type, name):
+        return os.path.join(self.root, str(season), season_type, name)
+
+def player_chunk_name(player_id):
+    """Returns the name of the chunk of a player's shots."""
+
+    return f'player-{player_id}'
+
+def convert_csv(csv_filename, store, season, season_type, by_player = True):
+    """Converts a CSV file of shots, as examples/all_shots used to write, to a
+    store.
+
+    Arguments:
+        csv_filename: A string for the CSV file with the first column as the
+            index.
+        store: A ShotStore the shots are appended to.
+        season: A Season object (or its string) for the season of the shots.
+        season_type: A string for the season type of the shots.
+        by_player: A boolean for whether to write a chunk per player rather
+            than a single chunk.
+    """
+
+    shots = pd.read_csv(csv_filename, index_col = 0)
+    if not by_player:
+        store.append(shots, season, season_type, 'csv')
+        return
+
+    for player_id, player_shots in shots.groupby('PLAYER_ID', sort = True):
+        store.append(player_shots, season, season_type, player_chunk_name(player_id))
+
+# Helper Functions
+def _list_dirs(path):
+    """Returns the sorted names of the finished directories in path."""
+
+    if not os.path.isdir(path):
+        return []
+    return sorted(name for name in os.listdir(path)
+        if not name.endswith('.tmp') and os.path.isdir(os.path.join(path, name)))
+
+def _read_meta(chunk_dir):
+    """Returns the metadata of a chunk."""
+
+    with open(os.path.join(chunk_dir, META_FILENAME), 'r') as in_f:
+        return json.load(in_f)
+
+def _write_meta(chunk_dir, meta):
+    """Replaces the metadata of a chunk in one step, with a new version."""
+
+    meta['version'] = uuid.uuid4().hex
+    filename = os.path.join(chunk_dir, META_FILENAME)
+    with open(f'{filename}.tmp', 'w') as out:
+        json.dump(meta, out)
+    os.replace(f'{filename}.tmp', filename)
+
+def _encode_column(column, dtype):
+    """Encodes a pandas.Series as a numpy.array and its metadata."""
+
+    if dtype is None:
+        if is_numeric_dtype(column.dtype):
+            dtype = column.dtype
+        else:
+            dtype = 'category'
+
+    # Integers can't be missing, e.g. a SHOT_MADE_FLAG of None, so the column
+    # is stored as the smallest float that holds every integer of the dtype
+    if (dtype != 'category' and np.issubdtype(np.dtype(dtype), np.integer)
+        and column.isna().any()
+    ):
+        dtype = np.result_type(dtype, np.float32)
+
+    if dtype != 'category':
+        values = column.to_numpy(dtype = dtype)
+        return values, {'dtype': values.dtype.str}
+
+    if not isinstance(column.dtype, CategoricalDtype):
+        column = column.astype(str).astype('category')
+    categories = column.cat.categories
+    codes = column.cat.codes.to_numpy()
+    codes = codes.astype(np.int8 if len(categories) < 128
+        else np.int16 if len(categories) < 32768 else np.int32)
+    return codes, {
+        'dtype': 'category',
+        'codes': codes.dtype.str,
+        'categories': [str(category) for category in categories]
+    }
+
+def _decode_column(values, column_meta):
+    """Decodes a numpy.array of a column into an array for a pandas.DataFrame."""
+
+    if column_meta['dtype'] != 'category':
+        return values
+    return pd.Categorical.from_codes(values, column_meta['categories'])
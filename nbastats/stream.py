@@ -0,0 +1,179 @@
+import codecs
+import json
+from nbastats.decode import RESULT_SETS_TOKEN
+
+# A value cut off by the end of the buffer fails to parse within this many
+# characters of it, e.g. at 'tru' of true, '\u00' of an escape or '-Infinit'
+_TRUNCATED_TAIL = 10
+
+def iter_result_sets(chunks, encoding = 'utf-8'):
+    """Incrementally parses the result sets of a NBA stats api response.
+
+    Only the rows of one chunk, rather than the whole response, are held in
+    memory at a time. Every key of a result set other than 'rowSet' is small
+    and decoded whole, the rows of 'rowSet' are decoded and yielded one by one
+    as soon as they're received.
+
+    Arguments:
+        chunks: An iterable of bytes of the response body, e.g. from
+            nbastats.http.Client.stream.
+        encoding: A string for the encoding of the response body.
+
+    Raises:
+        ValueError: If the response doesn't conform to the NBA stats api.
+
+    Yields:
+        A (name, headers, row) tuple for each row of every result set, where
+        name is the string of the set's 'name', headers is the list of the
+        set's 'headers' (the same list for every row of a set) and row is the
+        list of values.
+    """
+
+    reader = _Reader(chunks, encoding)
+    reader.find(RESULT_SETS_TOKEN)
+    reader.expect(':')
+    reader.expect('[')
+
+    while True:
+        char = reader.peek()
+        if char == ']':
+            return
+        if char == ',':
+            reader.advance()
+            continue
+
+        reader.expect('{')
+        name = None
+        headers = None
+        pending = list()
+        while True:
+            char = reader.peek()
+            if char == '}':
+                reader.advance()
+                break
+            if char == ',':
+                reader.advance()
+                continue
+
+            key = reader.value()
+            reader.expect(':')
+            if key != 'rowSet':
+                value = reader.value()
+                if key == 'name':
+                    name = value
+                elif key == 'headers':
+                    headers = value
+                continue
+
+            reader.expect('[')
+            while True:
+                char = reader.peek()
+                if char == ']':
+                    reader.advance()
+                    break
+                if char == ',':
+                    reader.advance()
+                    continue
+
+                row = reader.value()
+                # Rows can only be yielded once the set's headers are known
+                if headers is None:
+                    pending.append(row)
+                else:
+                    yield name, headers, row
+
+        for row in pending:
+            yield name, headers, row
+
+# Helper Functions
+class _Reader(object):
+    """A buffer of the decoded text of a stream of bytes that JSON values are
+    read from one at a time."""
+
+    def __init__(self, chunks, encoding):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder(encoding)()
+        self.json_decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.prefix = ''
+        self.eof = False
+
+    def fill(self):
+        """Reads the next chunk into the buffer, returns False at the end."""
+
+        if self.eof:
+            return False
+
+        # Drop what's been consumed so the buffer stays around a chunk long
+        if self.pos:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.eof = True
+            text = self.decoder.decode(b'', final = True)
+        else:
+            text = self.decoder.decode(chunk)
+        self.buffer += text
+
+        # The start of the response is the error message if it isn't JSON
+        if len(self.prefix) < 1000:
+            self.prefix = (self.prefix + text)[:1000]
+        return True
+
+    def find(self, token):
+        """Advances past the first occurrence of token."""
+
+        while True:
+            index = self.buffer.find(token, self.pos)
+            if index != -1:
+                self.pos = index + len(token)
+                return
+
+            # Keep the tail in case the token is split across chunks
+            self.pos = max(self.pos, len(self.buffer) - len(token))
+            if not self.fill():
+                raise ValueError(f"API error - {self.prefix}")
+
+    def peek(self):
+        """Returns the next non-whitespace character without consuming it."""
+
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                raise ValueError("API error - the response ended unexpectedly")
+
+    def advance(self):
+        self.pos += 1
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"API error - expected {char!r} but got "
+                f"{self.buffer[self.pos: self.pos + 20]!r}")
+        self.advance()
+
+    def value(self):
+        """Decodes the next JSON value, reading more chunks until it's whole."""
+
+        self.peek()
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                # Only read on if the value may continue in the next chunk
+                truncated = (e.msg.startswith('Unterminated string')
+                    or len(self.buffer) - e.pos < _TRUNCATED_TAIL)
+                if not truncated or not self.fill():
+                    raise ValueError(f"API error - {e}")
+                continue
+
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and self.fill():
+                continue
+            self.pos = end
+            return value
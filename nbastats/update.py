@@ -0,0 +1,105 @@
+from collections import namedtuple
+from datetime import datetime
+import pandas as pd
+from nbastats.game import get_game_outcomes
+from nbastats.player import get_leaders, get_shot_logs
+from nbastats.store import player_chunk_name
+
+UpdateResult = namedtuple('UpdateResult', ['new_shots', 'game_ids', 'errors',
+    'outcome_error'])
+UpdateResult.__doc__ = """The outcome of an incremental update.
+
+Attributes:
+    new_shots: A dictionary of player ids to the number of shots added.
+    game_ids: A sorted list of the ids of the games that had shots added.
+    errors: A dictionary of player ids to the exception raised while fetching
+        their shots.
+    outcome_error: The ValueError raised while refreshing the outcomes of
+        game_ids, None if they were refreshed. The new shots are stored
+        either way, and the outcomes that were fetched are in the index.
+"""
+
+def update_season(store, season, season_type, player_ids = None,
+    outcome_index = None, max_concurrency = 4, rate_limiter = None, client = None
+):
+    """Fetches only the shots that aren't in a store yet and appends them.
+
+    A player's shots are stored in the 'player-<id>' chunk of the store. For a
+    player already in the store only shots from the latest GAME_DATE onwards
+    are requested through DateFrom, and shots whose (GAME_ID, GAME_EVENT_ID)
+    is already stored are dropped. Players without a chunk are fetched in full.
+
+    Arguments:
+        store: A nbastats.store.ShotStore of the shots.
+        season: A Season object for the season.
+        season_type: A string for the season type.
+        player_ids: An optional iterable of integer player ids, defaults to
+            every player on the season's leaderboard.
+        outcome_index: An optional nbastats.game.OutcomeIndex whose outcomes of
+            the games with new shots are refreshed. Games whose outcome
+            couldn't be fetched are reported in the result's outcome_error
+            and left out of the index, so they're fetched again the next time
+            the index is asked for them.
+        max_concurrency: An integer for the number of requests in flight.
+        rate_limiter: An optional nbastats.http.RateLimiter shared by every
+            request.
+        client: An optional nbastats.http.Client used for the requests.
+
+    Returns:
+        An UpdateResult.
+    """
+
+    if player_ids is None:
+        player_ids = [player['PLAYER_ID']
+            for player in get_leaders(season, season_type, client)]
+
+    stored_events = dict()
+    player_kwargs = dict()
+    for player_id in player_ids:
+        name = player_chunk_name(player_id)
+        if not store.has_chunk(season, season_type, name):
+            continue
+
+        stored = store.read_chunk(season, season_type, name,
+            ['GAME_ID', 'GAME_EVENT_ID', 'GAME_DATE'])
+        if not len(stored):
+            continue
+        stored_events[player_id] = set(zip(stored.GAME_ID.astype(int),
+            stored.GAME_EVENT_ID.astype(int)))
+        latest_date = datetime.strptime(str(stored.GAME_DATE.astype(str).max()), '%Y%m%d')
+        player_kwargs[player_id] = {'DateFrom': latest_date.strftime('%m/%d/%Y')}
+
+    new_shots = dict()
+    game_ids = set()
+    errors = dict()
+    results = get_shot_logs(player_ids, season, season_type, max_concurrency,
+        rate_limiter, client, player_kwargs)
+    for result in results:
+        if result.error is not None:
+            errors[result.player_id] = result.error
+            continue
+
+        events = stored_events.get(result.player_id, set())
+        shots = [shot for shot in result.shots
+            if (int(shot['GAME_ID']), int(shot['GAME_EVENT_ID'])) not in events]
+        new_shots[result.player_id] = len(shots)
+        if not shots:
+            continue
+
+        store.extend(pd.DataFrame(shots), season, season_type,
+            player_chunk_name(result.player_id))
+        game_ids.update(int(shot['GAME_ID']) for shot in shots)
+
+    game_ids = sorted(game_ids)
+    outcome_error = None
+    if outcome_index is not None and game_ids:
+        for game_id in game_ids:
+            outcome_index.discard(game_id)
+        # The shots are already stored, so a failure is reported, not raised
+        try:
+            get_game_outcomes(game_ids, max_concurrency, rate_limiter, client,
+                outcome_index, raise_errors = True)
+        except ValueError as e:
+            outcome_error = e
+
+    return UpdateResult(new_shots, game_ids, errors, outcome_error)
@@ -0,0 +1,41 @@
+import pytest
+from benchmarks.stub_server import StubServer
+from nbastats.http import Client
+from nbastats.metrics import Observer
+
+class RecordingObserver(Observer):
+    """An observer that keeps every event it's notified of."""
+
+    def __init__(self):
+        self.requests = list()
+        self.retries = list()
+        self.decodes = list()
+
+    def on_request(self, event):
+        self.requests.append(event)
+
+    def on_retry(self, event):
+        self.retries.append(event)
+
+    def on_decode(self, event):
+        self.decodes.append(event)
+
+@pytest.fixture
+def stub():
+    """A started StubServer without payloads, tests add the ones they need."""
+
+    with StubServer(dict()) as server:
+        yield server
+
+@pytest.fixture
+def observer():
+    return RecordingObserver()
+
+@pytest.fixture
+def client(stub, observer):
+    """A Client of the stub server that retries without sleeping."""
+
+    with Client(base_url = stub.base_url, retries = 2, backoff_factor = 0,
+        timeout = 5, observers = [observer]
+    ) as client:
+        yield client
@@ -0,0 +1,98 @@
+import pandas as pd
+import pytest
+from benchmarks.fixtures import shot_log_payload
+from nbastats.aggregates import ShotAggregates
+from nbastats.columnar import SHOT_LOG_DTYPES, result_set_to_frame
+from nbastats.court import COURT_LENGTH, COURT_WIDTH, LENGTH_SHIFT, WIDTH_SHIFT
+from nbastats.options import Season, SeasonType
+from nbastats.store import ShotStore, player_chunk_name
+from analysis.game_outcome.preprocessing import shots_to_grid_features_wrapper
+
+SEASON = Season(2015)
+SEASON_TYPE = SeasonType.REGULAR_SEASON
+GRIDS = ((25, 25), (10, 10), (7, 30))
+
+@pytest.fixture
+def shots():
+    result_set = shot_log_payload(rows = 600, games = 4)['resultSets'][0]
+    return result_set_to_frame(result_set['headers'], result_set['rowSet'],
+        SHOT_LOG_DTYPES)
+
+def append_players(store, shots, extend = False):
+    for player_id, player_shots in shots.groupby('PLAYER_ID'):
+        write = store.extend if extend else store.append
+        write(player_shots, SEASON, SEASON_TYPE, player_chunk_name(player_id))
+
+def assert_same_features(aggregates, shots):
+    for grid in GRIDS:
+        expected_keys, expected = shots_to_grid_features_wrapper(COURT_WIDTH,
+            COURT_LENGTH, WIDTH_SHIFT, LENGTH_SHIFT, *grid)(shots)
+        keys, features = aggregates.grid_features(grid)
+        assert list(keys) == list(expected_keys)
+        assert (features == expected).all()
+
+def test_grid_features_match_preprocessing(tmp_path, shots):
+    store = ShotStore(str(tmp_path / 'shots'))
+    append_players(store, shots[:400])
+    with ShotAggregates(str(tmp_path / 'aggregates.sqlite'), store, GRIDS) as aggregates:
+        assert aggregates.update() == 400
+        assert aggregates.update() == 0
+        assert_same_features(aggregates, shots[:400])
+
+        # Only the rows past the ones aggregated before are added
+        append_players(store, shots[400:], extend = True)
+        assert aggregates.update() == 200
+        assert_same_features(aggregates, shots)
+
+def test_replaced_and_removed_chunks(tmp_path, shots):
+    store = ShotStore(str(tmp_path / 'shots'))
+    append_players(store, shots)
+    player_ids = shots.PLAYER_ID.value_counts().index[:3]
+    with ShotAggregates(str(tmp_path / 'aggregates.sqlite'), store, GRIDS) as aggregates:
+        aggregates.update()
+
+        # A replaced chunk is counted again from scratch
+        replaced = shots[shots.PLAYER_ID == player_ids[0]][1:4]
+        store.append(replaced, SEASON, SEASON_TYPE, player_chunk_name(player_ids[0]))
+        store.remove_chunk(SEASON, SEASON_TYPE, player_chunk_name(player_ids[1]))
+        assert aggregates.update() == 3
+
+        player_zones = aggregates.player_zones(player_ids[0])
+        assert player_zones.attempts.sum() == 3
+        assert player_zones.made.sum() == replaced.SHOT_MADE_FLAG.sum()
+        assert aggregates.player_zones(player_ids[1]).empty
+        assert aggregates.player_zones(player_ids[2]).attempts.sum() == \
+            (shots.PLAYER_ID == player_ids[2]).sum()
+        assert_same_features(aggregates, pd.concat([replaced,
+            shots[~shots.PLAYER_ID.isin(player_ids[:2])]]))
+
+def test_unchanged_chunks_are_not_read(tmp_path, shots, monkeypatch):
+    store = ShotStore(str(tmp_path / 'shots'))
+    append_players(store, shots)
+    with ShotAggregates(str(tmp_path / 'aggregates.sqlite'), store, GRIDS) as aggregates:
+        aggregates.update()
+
+        reads = list()
+        read_chunk = store.read_chunk
+        monkeypatch.setattr(store, 'read_chunk', lambda *args, **kwargs:
+            reads.append(args) or read_chunk(*args, **kwargs))
+        assert aggregates.update() == 0
+        assert reads == []
+
+        # A chunk rewritten with the same shots is read but not counted again
+        player_id = shots.PLAYER_ID.iloc[0]
+        store.append(shots[shots.PLAYER_ID == player_id], SEASON, SEASON_TYPE,
+            player_chunk_name(player_id))
+        assert aggregates.update() == 0
+        assert len(reads) == 1
+        assert aggregates.update() == 0
+        assert len(reads) == 1
+        assert_same_features(aggregates, shots)
+
+def test_team_queries_use_a_team_index(tmp_path, shots):
+    store = ShotStore(str(tmp_path / 'shots'))
+    with ShotAggregates(str(tmp_path / 'aggregates.sqlite'), store, GRIDS) as aggregates:
+        plan = ' '.join(row[-1] for row in aggregates._db.execute(
+            'EXPLAIN QUERY PLAN SELECT game_id, cell, SUM(attempts) FROM team_cells '
+            'WHERE team_id = ? AND grid = ? GROUP BY game_id, cell', (1, '25x25')))
+        assert 'team_cells_team' in plan
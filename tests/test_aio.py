@@ -0,0 +1,58 @@
+import asyncio
+import pytest
+from benchmarks.fixtures import encode, shot_log_payload
+from nbastats import aio, player
+from nbastats.cache import ResponseCache
+from nbastats.options import Season, SeasonType
+
+# aiohttp is only imported once the first request is made
+pytest.importorskip('aiohttp')
+
+SEASON = Season(2018)
+
+def test_get_shot_log_matches_the_sync_fetcher(stub, client, tmp_path):
+    stub.payloads['shotchartdetail'] = encode(shot_log_payload(rows = 500,
+        games = 10))
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'))
+
+    async def fetch_twice():
+        async with aio.AsyncClient(base_url = stub.base_url, timeout = 5,
+            cache = cache
+        ) as async_client:
+            first = await aio.get_shot_log(0, SEASON,
+                SeasonType.REGULAR_SEASON, async_client)
+            second = await aio.get_shot_log(0, SEASON,
+                SeasonType.REGULAR_SEASON, async_client)
+        return first, second
+
+    first, second = asyncio.run(fetch_twice())
+    expected = player.get_shot_log(0, SEASON, SeasonType.REGULAR_SEASON, client)
+    assert first == second == expected
+    # The second fetch was served from the cache
+    assert stub.requests == 2
+
+def test_session_of_a_closed_loop_is_closed(stub):
+    stub.payloads['endpoint'] = b'ok'
+    client = aio.AsyncClient(base_url = stub.base_url, timeout = 5)
+    url = 'https://stats.nba.com/stats/endpoint'
+
+    assert asyncio.run(client.get(url)) == 'ok'
+    first = client._session
+    assert asyncio.run(client.get(url)) == 'ok'
+    assert first.closed
+    assert client._session is not first
+    asyncio.run(client.close())
+
+def test_session_of_an_open_loop_is_not_shared(stub):
+    stub.payloads['endpoint'] = b'ok'
+    client = aio.AsyncClient(base_url = stub.base_url, timeout = 5)
+    url = 'https://stats.nba.com/stats/endpoint'
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(client.get(url)) == 'ok'
+        with pytest.raises(RuntimeError):
+            asyncio.run(client.get(url))
+        loop.run_until_complete(client.close())
+    finally:
+        loop.close()
@@ -0,0 +1,79 @@
+import pytest
+from benchmarks import run
+from benchmarks.fixtures import encode, shot_log_payload
+from benchmarks.run import Measurement, compare, format_measurement, measure
+from nbastats.http import set_default_client
+
+SMALL = ['--rows', '200', '--games', '8', '--box-scores', '4', '--repeat', '1']
+
+@pytest.fixture
+def baseline_dir(tmp_path, monkeypatch):
+    """Saves baselines to a temporary directory."""
+
+    monkeypatch.setattr(run, 'BASELINE_DIR', str(tmp_path))
+    yield tmp_path
+    # The harness makes its stub client the default one
+    set_default_client(None)
+
+def test_every_stage_runs_and_is_saved(baseline_dir, capsys):
+    assert run.main(SMALL + ['--no-memory', '--save', 'small']) == 0
+
+    lines = capsys.readouterr().out.splitlines()
+    for stage in ['startup.import_core', 'scrape.get_shot_log',
+        'decode.result_sets_json', 'featurize.league_preprocessor', 'train.svc'
+    ]:
+        assert any(line.startswith(stage) for line in lines)
+
+    baseline = run.load_baseline('small')
+    assert baseline['options']['rows'] == 200
+    assert baseline['results']['train.svc']['items'] > 0
+    assert run.load_baseline('missing') is None
+
+def test_compare_against_a_saved_baseline(baseline_dir, capsys):
+    stage = ['--stage', 'decode.', '--no-memory']
+    assert run.main(SMALL + stage + ['--save', 'small']) == 0
+    assert run.main(SMALL + stage + ['--compare', 'small',
+        '--tolerance', '1000']) == 0
+    assert 'No regressions against baseline small' in capsys.readouterr().out
+
+def test_fixtures_replace_synthetic_payloads(baseline_dir, tmp_path):
+    fixtures = tmp_path / 'fixtures'
+    fixtures.mkdir()
+    (fixtures / 'shotchartdetail.json').write_bytes(encode(shot_log_payload(
+        rows = 30, games = 2)))
+
+    assert run.main(SMALL + ['--stage', 'decode.result_sets_json', '--no-memory',
+        '--fixtures', str(fixtures), '--save', 'recorded']) == 0
+
+    # The recorded 30 shots are decoded rather than the 200 of --rows
+    results = run.load_baseline('recorded')['results']
+    assert list(results) == ['decode.result_sets_json']
+    assert results['decode.result_sets_json']['items'] == 30
+
+def test_compare_reports_slower_and_larger_stages():
+    baseline = {'results': {
+        'fast': {'items': 100, 'seconds': 1.0, 'peak_memory': 1000},
+        'slow': {'items': 100, 'seconds': 1.0, 'peak_memory': 1000}
+    }}
+    measurements = [
+        # Twice the items in twice the time and memory is no regression
+        Measurement('fast', 2.0, 200, 0, 2000),
+        Measurement('slow', 2.0, 100, 0, 2000),
+        Measurement('new', 1.0, 100, 0, None)
+    ]
+
+    regressions = compare(measurements, baseline, tolerance = 0.25)
+    assert len(regressions) == 2
+    assert all(regression.startswith('slow:') for regression in regressions)
+
+def test_measure_keeps_the_fastest_run():
+    calls = list()
+
+    measurement = measure('stage', lambda: calls.append(bytearray(2 ** 20)),
+        10, repeat = 3)
+
+    assert len(calls) == 4
+    assert measurement.stage == 'stage'
+    assert measurement.items == 10
+    assert measurement.peak_memory >= 2 ** 20
+    assert format_measurement(measurement).startswith('stage')
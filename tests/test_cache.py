@@ -0,0 +1,155 @@
+import os
+from types import SimpleNamespace
+import pytest
+import nbastats.cache
+from nbastats.cache import ResponseCache, season_ttl
+from nbastats.http import Client
+from nbastats.options import Season
+
+URL = 'https://stats.nba.com/stats/endpoint'
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the time of the cache module with a clock tests move by hand."""
+
+    clock = SimpleNamespace(now = 1000.0)
+    monkeypatch.setattr(nbastats.cache, 'time', SimpleNamespace(
+        time = lambda: clock.now))
+    return clock
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite'), ttl = lambda url, params: 60)
+    yield cache
+    cache.close()
+
+def test_round_trip(cache):
+    cache.set(URL, {'Season': '2018-19'}, b'body', 'utf-8')
+
+    assert cache.get(URL, {'Season': '2018-19'}) == (b'body', 'utf-8')
+    assert cache.get(URL, {'Season': '2017-18'}) is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+def test_key_ignores_query_order(cache):
+    cache.set(URL, {'a': 1, 'b': 2}, b'body', None)
+
+    assert cache.get(URL, {'b': 2, 'a': 1}) == (b'body', None)
+
+def test_responses_expire(cache, clock):
+    cache.set(URL, None, b'body', None)
+
+    clock.now += 59
+    assert cache.get(URL, None) is not None
+    clock.now += 1
+    assert cache.get(URL, None) is None
+
+def test_responses_without_ttl_never_expire(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite'),
+        ttl = lambda url, params: None)
+    cache.set(URL, None, b'body', None)
+
+    clock.now += 10 ** 9
+    assert cache.get(URL, None) == (b'body', None)
+
+def test_evicts_least_recently_used(tmp_path, clock):
+    # Random bodies don't compress, so each takes about 1000 bytes
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite'), max_size = 2500,
+        ttl = lambda url, params: None)
+    for name in ('a', 'b'):
+        cache.set(URL, {'name': name}, os.urandom(1000), None)
+        clock.now += 1
+
+    # a is now more recently used than b, so b is evicted to make room for c
+    assert cache.get(URL, {'name': 'a'}) is not None
+    clock.now += 1
+    cache.set(URL, {'name': 'c'}, os.urandom(1000), None)
+
+    assert cache.get(URL, {'name': 'b'}) is None
+    assert cache.get(URL, {'name': 'a'}) is not None
+    assert cache.get(URL, {'name': 'c'}) is not None
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert stats['entries'] == 2
+    assert stats['size'] <= 2500
+
+def test_season_ttl():
+    ttl = season_ttl(current_ttl = 60)
+    current = Season.current()
+
+    assert ttl(URL, {'Season': str(current)}) == 60
+    assert ttl(URL, {'Season': '2015-16'}) is None
+    assert ttl(URL, {'GameID': '0021800001'}) is None
+    assert ttl(URL, {'PlayerID': 201939}) == 60
+
+def test_client_serves_cached_responses(stub, cache, observer):
+    stub.payloads['endpoint'] = b'ok'
+
+    with Client(base_url = stub.base_url, cache = cache,
+        observers = [observer]
+    ) as client:
+        assert client.get(URL, {'Season': '2018-19'}) == 'ok'
+        assert client.get(URL, {'Season': '2018-19'}) == 'ok'
+
+    assert stub.requests == 1
+    assert [event.cached for event in observer.requests] == [False, True]
+
+def test_client_does_not_cache_errors(stub, cache):
+    stub.payloads['endpoint'] = lambda params: (404, b'missing')
+
+    with Client(base_url = stub.base_url, cache = cache) as client:
+        client.get(URL)
+        client.get(URL)
+
+    assert stub.requests == 2
+    assert cache.stats()['entries'] == 0
+
+def test_size_is_kept_across_replacements_and_reopening(tmp_path):
+    filename = str(tmp_path / 'responses.sqlite')
+    cache = ResponseCache(filename, ttl = lambda url, params: None)
+    cache.set(URL, None, os.urandom(1000), None)
+    cache.set(URL, None, os.urandom(500), None)
+    cache.set(URL, {'name': 'b'}, os.urandom(200), None)
+    size = cache.stats()['size']
+    cache.close()
+
+    reopened = ResponseCache(filename, ttl = lambda url, params: None)
+    assert reopened.stats()['size'] == size
+    assert 700 < size < 1000
+    reopened.clear()
+    assert reopened.stats()['size'] == 0
+    reopened.close()
+
+def test_expired_responses_are_removed_on_insert(cache, clock):
+    cache.set(URL, {'name': 'a'}, b'body', None)
+    clock.now += 60
+    cache.set(URL, {'name': 'b'}, b'body', None)
+
+    stats = cache.stats()
+    assert stats['entries'] == 1
+    assert stats['evictions'] == 0
+
+def test_evicts_more_than_a_batch(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite'),
+        max_size = 10 ** 6, ttl = lambda url, params: None)
+    for name in range(nbastats.cache.EVICTION_BATCH * 2):
+        cache.set(URL, {'name': name}, os.urandom(100), None)
+        clock.now += 1
+
+    cache.max_size = 3000
+    cache.set(URL, {'name': 'last'}, os.urandom(1000), None)
+    stats = cache.stats()
+    assert 2000 < stats['size'] <= 3000
+    assert stats['entries'] < 25
+    assert cache.get(URL, {'name': 'last'}) is not None
+    assert cache.get(URL, {'name': 0}) is None
+
+def test_eviction_queries_use_indexes(cache):
+    def plan(query, *args):
+        return ' '.join(row[-1] for row in
+            cache._db.execute('EXPLAIN QUERY PLAN ' + query, args))
+
+    assert 'responses_expires' in plan(
+        'SELECT SUM(size) FROM responses WHERE expires <= ?', 0)
+    assert 'responses_accessed' in plan(
+        'SELECT key, size FROM responses ORDER BY accessed LIMIT 1')
@@ -0,0 +1,34 @@
+import json
+import pytest
+from benchmarks.fixtures import encode, leaders_payload
+from nbastats.__main__ import main
+from nbastats.http import BaseClient
+
+@pytest.fixture(autouse = True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(BaseClient, '_backoff', lambda self, attempt,
+        retry_after = None: 0)
+
+def test_writes_json_lines(stub, capsys):
+    stub.payloads['leaguedashplayerstats'] = encode(leaders_payload(players = 5))
+
+    assert main(['--base-url', stub.base_url, 'leaders', '2018']) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 5
+    assert 'PLAYER_ID' in json.loads(lines[0])
+
+def test_api_errors_exit_non_zero(stub, capsys):
+    stub.payloads['leaguedashplayerstats'] = b'Invalid season'
+
+    assert main(['--base-url', stub.base_url, 'leaders', '2018']) == 1
+    err = capsys.readouterr().err
+    assert err.startswith('nbastats: error: ')
+    assert 'Invalid season' in err
+
+def test_connection_errors_exit_non_zero(capsys):
+    # Nothing listens on the discard port of a test machine
+    assert main(['--base-url', 'http://127.0.0.1:9', '--timeout', '1',
+        'game', '21800001']) == 1
+    err = capsys.readouterr().err
+    assert err.startswith('nbastats: error: ')
+    assert len(err.splitlines()) == 1
@@ -0,0 +1,51 @@
+import json
+import pytest
+from nbastats.decode import BACKENDS, get_backend, load_result_sets
+
+BACKENDS_INSTALLED = [backend for backend in BACKENDS
+    if backend == 'json' or get_backend() == backend]
+
+PAYLOAD = {
+    'resource': 'test',
+    'resultSets': [
+        # Every name can be encoded in latin-1 as well
+        {'name': 'First', 'headers': ['NAME'], 'rowSet': [['Müller'], ['Åge']]},
+        {'name': 'Second', 'headers': ['ID'], 'rowSet': [[1], [2]]},
+        {'name': 'Third', 'headers': ['ID'], 'rowSet': []}
+    ]
+}
+
+def bodies(encoding):
+    text = json.dumps(PAYLOAD, ensure_ascii = False)
+    return [text, text.encode(encoding)]
+
+@pytest.mark.parametrize('backend', BACKENDS_INSTALLED)
+@pytest.mark.parametrize('encoding', [None, 'utf-8', 'UTF8', 'latin-1'])
+def test_str_and_bytes_bodies(backend, encoding):
+    for body in bodies(encoding or 'utf-8'):
+        assert load_result_sets(body, encoding, backend = backend) == \
+            PAYLOAD['resultSets']
+
+@pytest.mark.parametrize('backend', BACKENDS_INSTALLED)
+def test_empty_result_sets(backend):
+    for body in ['{"resultSets":[]}', b'{"resultSets":[]}']:
+        assert load_result_sets(body, 'latin-1', backend = backend) == []
+
+@pytest.mark.parametrize('backend', BACKENDS_INSTALLED)
+def test_names_and_count_trim_the_same(backend):
+    body = bodies('utf-8')[1]
+    first, second = PAYLOAD['resultSets'][:2]
+    assert load_result_sets(body, names = ['Second'], backend = backend) == \
+        [None, second]
+    assert load_result_sets(body, count = 1, backend = backend) == [first]
+
+@pytest.mark.parametrize('backend', BACKENDS_INSTALLED)
+def test_api_errors_raise(backend):
+    with pytest.raises(ValueError):
+        load_result_sets(b'Invalid Season.', backend = backend)
+    with pytest.raises(ValueError):
+        load_result_sets(b'{"message": "error"}', backend = backend)
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        load_result_sets(b'{"resultSets": []}', backend = 'simplejson')
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+import scipy.sparse
+from sklearn import svm
+from sklearn.model_selection import cross_val_score
+from analysis.game_outcome.evaluation import JobResult, evaluate_grid, summarize
+from analysis.game_outcome.svc_model import PARAM_GRID
+
+@pytest.fixture(scope = 'module')
+def samples():
+    rand = np.random.RandomState(0)
+    data = rand.poisson(1.0, (60, 8)).astype(np.float64)
+    target = data[:, 0] + rand.normal(0, 0.5, 60) > 1
+    return data, target
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_scores_match_cross_val_score(samples, sparse):
+    data, target = samples
+    param_grid = {'kernel': ['linear', 'rbf'], 'C': [0.1, 10]}
+    shared = scipy.sparse.csr_matrix(data) if sparse else data
+
+    results = list(evaluate_grid(shared, target, param_grid, folds = 3,
+        processes = 2))
+
+    assert len(results) == 4 * 3
+    for params, scores in summarize(results):
+        expected = cross_val_score(svm.SVC(**params), data, target, cv = 3)
+        assert np.allclose(scores, expected)
+
+def test_summarize_orders_scores_by_fold():
+    params = {'C': 1}
+    results = [JobResult(params, fold, fold / 10, 0, 0) for fold in [2, 0, 1]]
+
+    (summary_params, scores), = summarize(results)
+    assert summary_params == params
+    assert list(scores) == [0, 0.1, 0.2]
+
+def test_gamma_is_only_swept_for_its_kernels(samples):
+    data, target = samples
+
+    results = list(evaluate_grid(data, target, PARAM_GRID, folds = 2,
+        processes = 2))
+
+    swept = [params for params, _ in summarize(results)]
+    assert len(swept) == 3 + 2 * 3 * 2
+    assert all('gamma' not in params for params in swept
+        if params['kernel'] == 'linear')
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+from analysis.game_outcome.preprocessing import LeaguePreprocessor
+from benchmarks.fixtures import encode, game_info_payload, schedule
+from nbastats.game import OutcomeIndex, get_game_outcomes
+from nbastats.http import set_default_client
+
+GAMES = 4
+
+def serve_games(stub, failed_game_ids = ()):
+    """Serves the outcomes of the games of a synthetic season but
+    failed_game_ids, and returns the schedule."""
+
+    games = schedule(GAMES)
+    by_id = {f'{game[0]:010d}': game for game in games}
+
+    def game_info(params):
+        game = by_id[params['GameID']]
+        if game[0] in failed_game_ids:
+            return 500, b''
+        return encode(game_info_payload(*game))
+
+    stub.payloads['boxscoresummaryv2'] = game_info
+    return games
+
+@pytest.fixture
+def default_client(client):
+    """Makes the stub's client the default of every fetcher."""
+
+    set_default_client(client)
+    yield client
+    set_default_client(None)
+
+def test_failed_games_are_left_out(stub, client):
+    game_ids = [game[0] for game in serve_games(stub)]
+    serve_games(stub, failed_game_ids = game_ids[1:2])
+
+    index = OutcomeIndex()
+    errors = dict()
+    outcomes = get_game_outcomes(game_ids, client = client, index = index,
+        errors = errors)
+
+    assert sorted(outcomes) == game_ids[:1] + game_ids[2:]
+    assert list(errors) == game_ids[1:2]
+    assert game_ids[1] not in index
+
+    # The failed game is the only one fetched again
+    requests = stub.requests
+    serve_games(stub)
+    outcomes = get_game_outcomes(game_ids, client = client, index = index)
+    assert sorted(outcomes) == game_ids
+    assert stub.requests == requests + 1
+
+def test_failed_games_raise_if_asked(stub, client):
+    game_ids = [game[0] for game in serve_games(stub)]
+    serve_games(stub, failed_game_ids = game_ids[:1])
+
+    index = OutcomeIndex()
+    with pytest.raises(ValueError):
+        get_game_outcomes(game_ids, client = client, index = index,
+            raise_errors = True)
+    assert [game_id in index for game_id in game_ids] == [False, True, True, True]
+
+def test_league_continues_without_failed_games(stub, default_client):
+    games = serve_games(stub)
+    serve_games(stub, failed_game_ids = [games[0][0]])
+
+    shots = pd.DataFrame([(game_id, team_id) for game_id, home, visiting, _ in games
+        for team_id in (home, visiting)], columns = ['GAME_ID', 'TEAM_ID'])
+
+    def featurizer(shots):
+        keys = pd.MultiIndex.from_frame(shots[['GAME_ID', 'TEAM_ID']])
+        return keys, np.ones((len(keys), 1))
+
+    league = LeaguePreprocessor(shots, featurizer)
+
+    assert list(league.outcome_errors) == [games[0][0]]
+    home, visiting = games[0][1:3]
+    for team_id in (home, visiting):
+        view = league.team_view(team_id)
+        assert games[0][0] not in view.game_ids
+        assert len(view.target) == len(view.game_ids)
@@ -0,0 +1,113 @@
+import threading
+import time
+import pytest
+import requests
+from nbastats.http import Client, RateLimiter
+
+URL = 'https://stats.nba.com/stats/endpoint'
+
+def test_base_url_replaces_host(stub, client):
+    stub.payloads['endpoint'] = lambda params: params['Season'].encode()
+
+    assert client.get(URL, {'Season': '2018-19'}) == '2018-19'
+    assert stub.requests == 1
+
+def test_retries_throttled_and_failed_requests(stub, client, observer):
+    statuses = [429, 503]
+    stub.payloads['endpoint'] = lambda params: (statuses.pop(0), b'') \
+        if statuses else b'ok'
+
+    assert client.get(URL) == 'ok'
+    assert stub.requests == 3
+    assert [event.status for event in observer.retries] == [429, 503]
+    assert [event.attempt for event in observer.retries] == [0, 1]
+
+    event, = observer.requests
+    assert event.status == 200
+    assert event.retries == 2
+    assert event.error is None
+
+def test_gives_up_after_retries(stub, client, observer):
+    stub.payloads['endpoint'] = lambda params: (500, b'error')
+
+    body, _ = client.get_content(URL)
+    assert body == b'error'
+    assert stub.requests == client.retries + 1
+    assert len(observer.retries) == client.retries
+    assert observer.requests[-1].status == 500
+    assert observer.requests[-1].retries == client.retries
+
+def test_does_not_retry_other_errors(stub, client, observer):
+    stub.payloads['endpoint'] = lambda params: (400, b'bad query')
+
+    assert client.get(URL) == 'bad query'
+    assert stub.requests == 1
+    assert not observer.retries
+
+def test_retry_after_overrides_backoff(stub, observer):
+    statuses = [429]
+    stub.payloads['endpoint'] = lambda params: (statuses.pop(0), b'',
+        {'Retry-After': '0'}) if statuses else b'ok'
+
+    with Client(base_url = stub.base_url, backoff_factor = 60, max_backoff = 60,
+        observers = [observer]
+    ) as client:
+        start = time.perf_counter()
+        assert client.get(URL) == 'ok'
+    assert time.perf_counter() - start < 5
+    assert observer.retries[0].delay == 0
+
+def test_backoff_is_capped():
+    client = Client(backoff_factor = 10, max_backoff = 1)
+
+    assert all(0 <= client._backoff(attempt) <= 1 for attempt in range(10))
+    assert client._backoff(0, '120') == 1
+
+def test_connection_errors_raise_after_retries(observer):
+    # Nothing listens on the discard port of a test machine
+    with Client(base_url = 'http://127.0.0.1:9', retries = 1, backoff_factor = 0,
+        timeout = 1, observers = [observer]
+    ) as client:
+        with pytest.raises(requests.ConnectionError):
+            client.get(URL)
+
+    retry, = observer.retries
+    assert retry.status is None
+    assert isinstance(retry.error, requests.ConnectionError)
+    event, = observer.requests
+    assert event.status is None
+    assert event.retries == 1
+    assert isinstance(event.error, requests.ConnectionError)
+
+def test_pool_limits_connections(stub):
+    lock = threading.Lock()
+    in_flight = [0, 0]
+
+    def payload(params):
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+        return b'ok'
+
+    stub.payloads['endpoint'] = payload
+    with Client(base_url = stub.base_url, pool_maxsize = 2) as client:
+        threads = [threading.Thread(target = client.get, args = (URL,))
+            for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert stub.requests == 8
+    assert in_flight[1] <= 2
+
+def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(50)
+
+    start = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+    assert time.monotonic() - start >= 5 / 50 * 0.9
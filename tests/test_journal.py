@@ -0,0 +1,41 @@
+from nbastats.journal import ScrapeJournal
+
+def shots(player_id, count):
+    return [{'PLAYER_ID': player_id, 'SHOT_NUMBER': i} for i in range(count)]
+
+def test_resumes_completed_players(tmp_path):
+    filename = str(tmp_path / 'journal.jsonl')
+    journal = ScrapeJournal(filename)
+    journal.append(1, shots(1, 2))
+    journal.append(2, shots(2, 3))
+
+    resumed = ScrapeJournal(filename)
+    assert 1 in resumed and 2 in resumed and 3 not in resumed
+    assert len(resumed) == 2
+    assert [player_id for player_id, _ in resumed.iter_players()] == [1, 2]
+    assert list(resumed.iter_shots()) == shots(1, 2) + shots(2, 3)
+
+def test_partial_line_is_dropped(tmp_path):
+    filename = str(tmp_path / 'journal.jsonl')
+    journal = ScrapeJournal(filename)
+    journal.append(1, shots(1, 2))
+    journal.append(2, shots(2, 3))
+
+    # A crash in the middle of writing the second player
+    with open(filename, 'rb+') as in_f:
+        size = len(in_f.read())
+        in_f.truncate(size - 5)
+
+    resumed = ScrapeJournal(filename)
+    assert resumed.completed == {1}
+    resumed.append(2, shots(2, 1))
+
+    resumed = ScrapeJournal(filename)
+    assert resumed.completed == {1, 2}
+    assert list(resumed.iter_shots()) == shots(1, 2) + shots(2, 1)
+
+def test_missing_file_is_empty(tmp_path):
+    journal = ScrapeJournal(str(tmp_path / 'journal.jsonl'))
+
+    assert len(journal) == 0
+    assert list(journal.iter_shots()) == []
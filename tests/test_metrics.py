@@ -0,0 +1,80 @@
+import io
+from benchmarks.fixtures import encode, shot_log_payload
+from nbastats.http import Client
+from nbastats.metrics import DecodeEvent, RequestEvent, RetryEvent, SummaryReporter
+from nbastats.options import Season, SeasonType
+from nbastats.player import get_shot_log
+
+def request(seconds, endpoint = 'shotchartdetail', error = None, cached = False,
+    retries = 0
+):
+    return RequestEvent(endpoint, f'https://stats.nba.com/stats/{endpoint}',
+        None, None if error else 200, seconds, 100, retries, cached, error)
+
+def test_summary_aggregates_events():
+    reporter = SummaryReporter(buckets = (0.01, 0.1, 1))
+    for seconds in (0.005, 0.05, 0.05, 0.5, 2):
+        reporter.on_request(request(seconds))
+    reporter.on_request(request(0.001, error = ValueError(), retries = 2))
+    reporter.on_request(request(0, cached = True))
+    reporter.on_retry(RetryEvent('shotchartdetail', '', 0, 503, None, 0))
+    reporter.on_retry(RetryEvent('shotchartdetail', '', 1, None, OSError(), 0))
+    reporter.on_decode(DecodeEvent('shotchartdetail', 0.25, 40))
+
+    stats = reporter.summary()['shotchartdetail']
+    assert stats['requests'] == 7
+    assert stats['errors'] == 1
+    assert stats['cache_hits'] == 1
+    assert stats['retries'] == 2
+    assert stats['bytes'] == 700
+    assert stats['rows'] == 40
+    assert stats['retry_reasons'] == {'503': 1, 'connection': 1}
+    assert stats['decode'] == {'count': 1, 'seconds': 0.25}
+    assert stats['latency']['max'] == 2
+    assert stats['latency']['buckets'] == [[0.01, 3], [0.1, 5], [1, 6],
+        [float('inf'), 7]]
+
+def test_percentiles_come_from_buckets():
+    reporter = SummaryReporter(buckets = (0.01, 0.1, 1))
+    assert reporter.percentile('shotchartdetail', 50) is None
+
+    for seconds in (0.005, 0.005, 0.05, 0.02):
+        reporter.on_request(request(seconds))
+    assert reporter.percentile('shotchartdetail', 50) == 0.01
+    assert reporter.percentile('shotchartdetail', 95) == 0.05
+
+    reporter.on_request(request(3))
+    assert reporter.percentile('shotchartdetail', 100) == 3
+
+def test_report_and_reset():
+    reporter = SummaryReporter()
+    reporter.on_request(request(0.02, endpoint = 'boxscoresummaryv2'))
+
+    out = io.StringIO()
+    reporter.report(out)
+    header, line = out.getvalue().splitlines()
+    assert header.split()[0] == 'endpoint'
+    assert line.split()[:2] == ['boxscoresummaryv2', '1']
+
+    reporter.reset()
+    assert reporter.summary() == {}
+
+def test_client_notifies_the_reporter(stub):
+    statuses = [503]
+    shots = encode(shot_log_payload(rows = 30, games = 2))
+    stub.payloads['shotchartdetail'] = lambda params: (statuses.pop(), b'') \
+        if statuses else shots
+
+    reporter = SummaryReporter()
+    with Client(base_url = stub.base_url, retries = 2, backoff_factor = 0,
+        observers = [reporter]
+    ) as client:
+        get_shot_log(1, Season(2015), SeasonType.REGULAR_SEASON, client)
+
+    stats = reporter.summary()['shotchartdetail']
+    assert stats['requests'] == 1
+    assert stats['retries'] == 1
+    assert stats['retry_reasons'] == {'503': 1}
+    assert stats['bytes'] == len(shots)
+    assert stats['rows'] == 30
+    assert stats['decode']['count'] == 1
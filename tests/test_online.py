@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from analysis.game_outcome.online import OnlineOutcomeModel
+
+TEAMS = 10
+
+def season(games = 600, columns = 40, seed = 0):
+    """Returns the strengths of teams and the keys, features and winners of
+    games where the features and the outcomes both follow the strengths."""
+
+    rng = np.random.RandomState(seed)
+    strengths = rng.normal(size = TEAMS)
+    loadings = rng.normal(size = columns)
+
+    keys = list()
+    rows = list()
+    winners = dict()
+    for game_id in range(games):
+        home, visiting = rng.choice(TEAMS, 2, replace = False)
+        for team in (home, visiting):
+            keys.append((game_id, 100 + team))
+            rows.append(rng.poisson(np.clip(3 + strengths[team] * loadings, 0.1, None)))
+        upset = rng.normal()
+        winners[game_id] = 100 + (home if strengths[home] + upset > strengths[visiting]
+            else visiting)
+    return strengths, keys, np.array(rows, dtype = float), winners
+
+def test_predictions_follow_strengths_after_nightly_updates(tmp_path):
+    strengths, keys, features, winners = season()
+    model = OnlineOutcomeModel(str(tmp_path / 'model.pickle'))
+
+    # A first fit over a third of the season, then a few games a night
+    model.update(keys[:400], features[:400], winners, epochs = 5)
+    for end in range(410, len(keys) + 1, 10):
+        model.update(keys[:end], features[:end], winners)
+
+    matchups = [(100 + team, 100 + opponent) for team in range(TEAMS)
+        for opponent in range(TEAMS) if team != opponent]
+    probabilities = model.predict_proba(matchups)
+    assert np.ptp(probabilities) > 0.5
+    assert np.mean(np.abs(probabilities - 0.5) < 0.01) < 0.5
+    differences = [strengths[team - 100] - strengths[opponent - 100]
+        for team, opponent in matchups]
+    assert np.corrcoef(differences, probabilities)[0, 1] > 0.8
+    # Saturated weights push both orders of a matchup to 0 or 1
+    assert np.abs(model._classifier.coef_).max() < 10
+
+def test_scale_is_frozen_after_the_first_update(tmp_path):
+    _, keys, features, winners = season()
+    filename = str(tmp_path / 'model.pickle')
+    model = OnlineOutcomeModel(filename)
+    model.update(keys[:400], features[:400], winners)
+    scale = model._scaler.scale_.copy()
+
+    # Later games are much larger, the state is reloaded in between
+    OnlineOutcomeModel(filename).update(keys, features * 10, winners)
+    assert np.array_equal(OnlineOutcomeModel(filename)._scaler.scale_, scale)
+
+def test_untrained_model_raises(tmp_path):
+    with pytest.raises(ValueError):
+        OnlineOutcomeModel(str(tmp_path / 'model.pickle')).predict_proba([(1, 2)])
@@ -0,0 +1,87 @@
+import copy
+import pickle
+from datetime import date
+import pytest
+from nbastats.options import (SHOT_LOG, Endpoint, Query, Season,
+    canonical_query, request_key)
+
+@pytest.mark.parametrize('season_year, season', [(1996, '1996-97'),
+    (1999, '1999-00'), (2000, '2000-01'), (2008, '2008-09'), (2009, '2009-10'),
+    (2018, '2018-19')])
+def test_season_string(season_year, season):
+    assert str(Season(season_year)) == season
+
+def test_current_season_starts_in_july():
+    assert Season.current(date(2019, 6, 30)).season_year == 2018
+    assert Season.current(date(2019, 7, 1)).season_year == 2019
+
+def test_query_is_read_only():
+    query = SHOT_LOG.query(PlayerID = 201939, Season = '2015-16',
+        SeasonType = 'Regular Season')
+    encoded = query.encoded
+
+    for modify in (lambda: query.__setitem__('DateFrom', '10/01/2015'),
+        lambda: query.update(DateFrom = '10/01/2015'),
+        lambda: query.setdefault('Extra', 1), lambda: query.pop('DateFrom'),
+        lambda: query.__delitem__('DateFrom'), query.popitem, query.clear
+    ):
+        with pytest.raises(TypeError):
+            modify()
+    with pytest.raises(TypeError):
+        query |= {'DateFrom': '10/01/2015'}
+
+    assert query.encoded == encoded == canonical_query(dict(query))
+    copied = dict(query)
+    copied['DateFrom'] = '10/01/2015'
+    assert canonical_query(copied) != encoded
+
+@pytest.mark.parametrize('duplicate', [copy.copy, copy.deepcopy,
+    lambda query: pickle.loads(pickle.dumps(query))])
+def test_query_copies_keep_encoding(duplicate):
+    query = SHOT_LOG.query(PlayerID = 201939, Season = '2015-16',
+        SeasonType = 'Regular Season')
+
+    copied = duplicate(query)
+    assert isinstance(copied, Query)
+    assert copied == query
+    assert copied.encoded == query.encoded
+
+ENDPOINT = Endpoint('https://stats.nba.com/stats/endpoint', {'PlayerID': None,
+    'Season': None, 'SeasonType': 'Regular Season', 'DateFrom': '', 'Month': 0})
+
+def test_encoded_matches_canonical_query():
+    query = ENDPOINT.query(PlayerID = 201939, Season = '2015-16',
+        DateFrom = '10/01/2015')
+
+    assert query == {'PlayerID': 201939, 'Season': '2015-16',
+        'SeasonType': 'Regular Season', 'DateFrom': '10/01/2015', 'Month': 0}
+    assert query.encoded == canonical_query(dict(query))
+    assert query.encoded == ('DateFrom=10%2F01%2F2015&Month=0&PlayerID=201939&'
+        'Season=2015-16&SeasonType=Regular+Season')
+    assert ENDPOINT.key(query) == request_key(ENDPOINT.url, dict(query))
+
+def test_invalid_and_missing_queries_raise():
+    with pytest.raises(ValueError):
+        ENDPOINT.query(PlayerID = 1, Season = '2015-16', Player = 1)
+    with pytest.raises(ValueError):
+        ENDPOINT.query(PlayerID = 1)
+
+def test_extended_endpoint_keeps_defaults():
+    extended = ENDPOINT.extend('https://stats.nba.com/stats/other',
+        SeasonType = 'Playoffs', LeagueID = '00')
+    query = extended.query(PlayerID = 1, Season = '2015-16')
+
+    assert query['SeasonType'] == 'Playoffs'
+    assert query.encoded == canonical_query(dict(query))
+    assert ENDPOINT.query(PlayerID = 1, Season = '2015-16')['SeasonType'] \
+        == 'Regular Season'
+
+def test_client_sends_the_encoded_query(stub, client):
+    sent = list()
+    stub.payloads['endpoint'] = lambda params: sent.append(params) or b'ok'
+
+    # The stub leaves out blank queries, so none are
+    query = ENDPOINT.query(PlayerID = 201939, Season = '2015-16',
+        DateFrom = '10/01/2015')
+    assert client.get(ENDPOINT.url, query) == 'ok'
+    assert sent == [{key: str(val) for key, val in query.items()}]
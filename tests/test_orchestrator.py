@@ -0,0 +1,132 @@
+import sqlite3
+import time
+from benchmarks.fixtures import (encode, game_info_payload, leaders_payload,
+    schedule, shot_log_payload)
+from nbastats.game import OutcomeIndex
+from nbastats.http import RateLimiter
+from nbastats.options import SeasonType
+from nbastats.orchestrator import (DONE, FAILED, LEADERS, OUTCOMES,
+    REQUESTS_PER_SECOND, SHOTS, ScrapeOrchestrator)
+from nbastats.store import ShotStore
+
+SEASON_TYPE = SeasonType.REGULAR_SEASON
+PLAYERS = 3
+GAMES = 4
+
+def serve_scrape(stub, failures = None):
+    """Serves a leaderboard of PLAYERS players, their shots over GAMES games
+    and the outcomes of the games.
+
+    Arguments:
+        failures: An optional dictionary of player ids to the number of shot
+            log requests of that player that fail.
+
+    Returns:
+        A dictionary of player ids to the times of their shot log requests.
+    """
+
+    failures = dict() if failures is None else failures
+    shots = encode(shot_log_payload(rows = 20, games = GAMES))
+    games = {f'{game[0]:010d}': game for game in schedule(GAMES)}
+    requested = dict()
+
+    def shot_log(params):
+        player_id = int(params['PlayerID'])
+        requested.setdefault(player_id, []).append(time.monotonic())
+        if failures.get(player_id, 0) >= len(requested[player_id]):
+            return 500, b''
+        return shots
+
+    stub.payloads['leaguedashplayerstats'] = encode(leaders_payload(players = PLAYERS))
+    stub.payloads['shotchartdetail'] = shot_log
+    stub.payloads['boxscoresummaryv2'] = lambda params: encode(
+        game_info_payload(*games[params['GameID']]))
+    return requested
+
+def orchestrator(tmp_path, client, **kwargs):
+    return ScrapeOrchestrator(str(tmp_path / 'state.sqlite'),
+        ShotStore(str(tmp_path / 'shots')), OutcomeIndex(), client = client,
+        rate_limiter = RateLimiter(1000), **kwargs)
+
+def test_scrapes_every_endpoint(stub, client, tmp_path):
+    serve_scrape(stub)
+
+    with orchestrator(tmp_path, client) as scrape:
+        assert scrape.plan([2015], [SEASON_TYPE]) == 1
+        results = list(scrape.run())
+
+        assert not any(result.error for result in results)
+        assert scrape.progress() == {(LEADERS, DONE): 1, (SHOTS, DONE): PLAYERS,
+            (OUTCOMES, DONE): GAMES}
+        assert len(scrape.outcome_index) == GAMES
+
+def test_failed_jobs_back_off(stub, client, tmp_path):
+    # Every attempt of the client retries twice, so a job fails on 3 errors
+    requested = serve_scrape(stub, failures = {200001: 6})
+
+    with orchestrator(tmp_path, client, backoff_factor = 0.2) as scrape:
+        scrape.plan([2015], [SEASON_TYPE], [SHOTS])
+        results = list(scrape.run())
+
+        assert [result.job.subject for result in results
+            if result.error is not None] == [200001, 200001]
+        assert scrape.progress() == {(LEADERS, DONE): 1, (SHOTS, DONE): PLAYERS}
+
+    times = requested[200001]
+    assert len(times) == 7
+    assert times[3] - times[2] >= 0.2 * 0.9
+    assert times[6] - times[5] >= 0.4 * 0.9
+
+def test_jobs_fail_after_max_attempts(stub, client, tmp_path):
+    serve_scrape(stub, failures = {200001: 6})
+
+    with orchestrator(tmp_path, client, max_attempts = 2, backoff_factor = 0.01
+    ) as scrape:
+        scrape.plan([2015], [SEASON_TYPE], [SHOTS])
+        list(scrape.run())
+
+        (job, error), = scrape.failed()
+        assert job.subject == 200001
+        assert scrape.progress()[(SHOTS, FAILED)] == 1
+
+        assert scrape.retry_failed() == 1
+        assert [result.error for result in scrape.run()] == [None]
+        assert not scrape.failed()
+
+def test_backoff_is_kept_between_runs(stub, client, tmp_path):
+    serve_scrape(stub, failures = {200001: 3})
+
+    with orchestrator(tmp_path, client, backoff_factor = 600) as scrape:
+        scrape.plan([2015], [SEASON_TYPE], [SHOTS])
+        # Stop once the only job left is backing off
+        for result in scrape.run():
+            if result.error is not None:
+                break
+
+    with sqlite3.connect(str(tmp_path / 'state.sqlite')) as db:
+        (not_before,), = db.execute('SELECT not_before FROM jobs WHERE '
+            'subject = 200001').fetchall()
+    assert not_before - time.time() > 500
+
+def test_rate_limited_by_default(client, tmp_path):
+    with ScrapeOrchestrator(str(tmp_path / 'state.sqlite'),
+        ShotStore(str(tmp_path / 'shots')), client = client
+    ) as scrape:
+        assert scrape.rate_limiter.interval == 1 / REQUESTS_PER_SECOND
+
+def test_old_databases_are_migrated(client, tmp_path):
+    filename = str(tmp_path / 'state.sqlite')
+    with sqlite3.connect(filename) as db:
+        db.execute('''CREATE TABLE jobs (endpoint TEXT NOT NULL,
+            season INTEGER NOT NULL, season_type TEXT NOT NULL,
+            subject INTEGER NOT NULL, status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0, rows INTEGER, error TEXT,
+            updated REAL NOT NULL,
+            PRIMARY KEY (endpoint, season, season_type, subject))''')
+        db.execute("INSERT INTO jobs VALUES ('leaders', 2015, 'Regular Season', "
+            "0, 'pending', 1, NULL, NULL, 0)")
+
+    with ScrapeOrchestrator(filename, ShotStore(str(tmp_path / 'shots')),
+        client = client
+    ) as scrape:
+        assert [job.endpoint for job in scrape._pending(4, [])] == [LEADERS]
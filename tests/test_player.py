@@ -0,0 +1,115 @@
+import threading
+import time
+import numpy as np
+import pytest
+from benchmarks.fixtures import encode, leaders_payload, shot_log_payload
+from nbastats.columnar import SHOT_LOG_DTYPES, SHOT_LOG_HEADERS
+from nbastats.http import RateLimiter
+from nbastats.options import Season, SeasonType
+from nbastats.player import (decode_shot_log, get_leaders, get_shot_log,
+    get_shot_logs, iter_leaders, iter_shot_log)
+
+SEASON = Season(2015)
+SEASON_TYPE = SeasonType.REGULAR_SEASON
+
+def test_failed_players_are_reported(stub, client):
+    shots = encode(shot_log_payload(rows = 20, games = 2))
+    stub.payloads['shotchartdetail'] = lambda params: (500, b'') \
+        if params['PlayerID'] == '2' else shots
+
+    results = {result.player_id: result
+        for result in get_shot_logs([1, 2, 3], SEASON, SEASON_TYPE, client = client)}
+
+    assert sorted(results) == [1, 2, 3]
+    assert results[2].shots is None
+    assert results[2].error is not None
+    for player_id in [1, 3]:
+        assert results[player_id].error is None
+        assert len(results[player_id].shots) == 20
+
+def test_players_share_the_rate_limiter(stub, client):
+    times = list()
+    lock = threading.Lock()
+    shots = encode(shot_log_payload(rows = 4, games = 1))
+
+    def payload(params):
+        with lock:
+            times.append(time.monotonic())
+        return shots
+
+    stub.payloads['shotchartdetail'] = payload
+    limiter = RateLimiter(20)
+    results = list(get_shot_logs(range(6), SEASON, SEASON_TYPE,
+        max_concurrency = 6, rate_limiter = limiter, client = client))
+
+    assert not any(result.error for result in results)
+    times.sort()
+    assert times[-1] - times[0] >= 5 / 20 * 0.9
+
+def test_player_queries_override_the_others(stub, client):
+    date_froms = dict()
+    shots = encode(shot_log_payload(rows = 4, games = 1))
+
+    def payload(params):
+        date_froms[params['PlayerID']] = params['DateFrom']
+        return shots
+
+    stub.payloads['shotchartdetail'] = payload
+    list(get_shot_logs([1, 2], SEASON, SEASON_TYPE, client = client,
+        player_kwargs = {2: {'DateFrom': '11/01/2015'}}, DateFrom = '10/01/2015'))
+
+    assert date_froms == {'1': '10/01/2015', '2': '11/01/2015'}
+
+def test_empty_shot_log_frame_keeps_columns(client):
+    for result_sets in ([], [{'name': 'LeagueAverages',
+        'headers': ['GRID_TYPE_NAME', 'FGA'], 'rowSet': [['League Averages', 1]]}]
+    ):
+        shots = decode_shot_log(encode({'resultSets': result_sets}),
+            as_frame = True, client = client)
+
+        assert list(shots.columns) == SHOT_LOG_HEADERS
+        assert len(shots) == 0
+        assert shots.LOC_X.dtype == SHOT_LOG_DTYPES['LOC_X']
+
+def test_shot_log_frame_matches_dictionaries(stub, client):
+    stub.payloads['shotchartdetail'] = encode(shot_log_payload(rows = 50, games = 3))
+
+    shots = get_shot_log(1, SEASON, SEASON_TYPE, client)
+    frame = get_shot_log(1, SEASON, SEASON_TYPE, client, as_frame = True)
+
+    # League averages are left out of both
+    assert len(frame) == len(shots) == 50
+    assert list(frame.columns) == SHOT_LOG_HEADERS
+    for header, dtype in SHOT_LOG_DTYPES.items():
+        if dtype == 'category':
+            assert frame[header].dtype.name == 'category'
+        else:
+            assert frame[header].dtype == dtype
+    # GAME_ID is the only column whose values change, from zero padded strings
+    for shot in shots:
+        shot['GAME_ID'] = int(shot['GAME_ID'])
+    assert frame.astype(object).to_dict('records') == shots
+
+def test_leaders_frame_matches_dictionaries(stub, client):
+    stub.payloads['leaguedashplayerstats'] = encode(leaders_payload(players = 20))
+
+    leaders = get_leaders(SEASON, SEASON_TYPE, client)
+    frame = get_leaders(SEASON, SEASON_TYPE, client, as_frame = True)
+
+    assert len(frame) == len(leaders) == 20
+    assert frame.PLAYER_ID.dtype == np.int64
+    assert frame.TEAM_ABBREVIATION.dtype.name == 'category'
+    assert frame.astype(object).to_dict('records') == leaders
+
+def test_batch_size_is_checked_eagerly(stub, client):
+    stub.payloads['shotchartdetail'] = encode(shot_log_payload(rows = 5, games = 1))
+
+    for batch_size in (0, -1):
+        with pytest.raises(ValueError):
+            iter_shot_log(1, SEASON, SEASON_TYPE, client, batch_size = batch_size)
+        with pytest.raises(ValueError):
+            iter_leaders(SEASON, SEASON_TYPE, client, batch_size = batch_size)
+    assert stub.requests == 0
+
+    batches = list(iter_shot_log(1, SEASON, SEASON_TYPE, client, batch_size = 2))
+    assert [len(batch) for batch in batches] == [2, 2, 1]
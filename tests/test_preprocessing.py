@@ -0,0 +1,247 @@
+import json
+from math import ceil
+import numpy as np
+import pandas as pd
+import pytest
+from analysis.game_outcome.preprocessing import (DataPreprocessor,
+    LeaguePreprocessor, ShotGroups, TeamPreprocessor, shots_to_features_wrapper,
+    shots_to_grid_features_wrapper, shots_to_matrix_wrapper,
+    sum_matrix_by_grids_wrapper)
+from analysis.game_outcome.svc_model import (GRID_LENGTH, GRID_WIDTH, LENGTH,
+    WIDTH, grid_featurizer)
+from benchmarks.fixtures import encode, schedule, shot_log_payload
+from nbastats.court import LENGTH_SHIFT, WIDTH_SHIFT
+from nbastats.game import OutcomeIndex
+from nbastats.options import Season, SeasonType
+from nbastats.player import get_shot_log
+
+class RowPreprocessor(DataPreprocessor):
+    """A preprocessor with a sample per row of its data and target columns."""
+
+    def _prep_data(self):
+        return list(self.raw_data[['a', 'b']].values), list(self.raw_data['won'])
+
+def row_preprocessor(dtype = None, sparse = False):
+    raw_data = pd.DataFrame({'a': range(10), 'b': range(10, 20),
+        'won': [i % 3 == 0 for i in range(10)]})
+    return RowPreprocessor(raw_data, lambda data: data, lambda target: target,
+        dtype = dtype, sparse = sparse)
+
+def test_data_is_contiguous():
+    preprocessor = row_preprocessor(dtype = np.float32)
+
+    assert preprocessor.data.shape == (10, 2)
+    assert preprocessor.data.dtype == np.float32
+    assert preprocessor.data.flags['C_CONTIGUOUS']
+    assert preprocessor.target.shape == (10,)
+    assert row_preprocessor(sparse = True).data.format == 'csr'
+
+def test_kfold_yields_indices():
+    preprocessor = row_preprocessor()
+    folds = list(preprocessor.kfold(5, random_state = 0))
+
+    assert len(folds) == 5
+    tested = np.concatenate([test_index for _, test_index in folds])
+    assert sorted(tested) == list(range(10))
+    for (train_index, test_index), copies in zip(folds,
+        preprocessor.kfold(5, random_state = 0, indices = False)
+    ):
+        assert not set(train_index) & set(test_index)
+        x_train, x_test, y_train, y_test = copies
+        assert (x_train == preprocessor.data[train_index]).all()
+        assert (y_test == preprocessor.target[test_index]).all()
+
+def league_shots(stub, client, games = 6):
+    """Returns the shots of a synthetic season as a pandas.DataFrame and
+    writes the winner of every game, the home team, to an OutcomeIndex."""
+
+    stub.payloads['shotchartdetail'] = encode(shot_log_payload(rows = 300,
+        games = games))
+    shots = get_shot_log(0, Season(2015), SeasonType.REGULAR_SEASON, client,
+        as_frame = True)
+    winners = {game_id: home for game_id, home, _, _ in schedule(games)}
+    return shots, winners
+
+def test_team_view_matches_team_preprocessor(stub, client, tmp_path):
+    shots, winners = league_shots(stub, client)
+    index = OutcomeIndex(str(tmp_path / 'outcomes.json'))
+    for game_id, team_id in winners.items():
+        index.add_winner(game_id, team_id)
+    index.save()
+
+    league = LeaguePreprocessor(shots, grid_featurizer(), index.filename)
+    to_features = shots_to_features_wrapper(WIDTH, LENGTH, WIDTH_SHIFT,
+        LENGTH_SHIFT, GRID_WIDTH, GRID_LENGTH)
+    for team_id in league.teams():
+        outcome_filename = str(tmp_path / f'{team_id}.json')
+        with open(outcome_filename, 'w') as out:
+            json.dump({game_id: winner == team_id
+                for game_id, winner in winners.items()}, out)
+        team = TeamPreprocessor(shots, team_id,
+            lambda pairs: [np.concatenate([to_features(team_shots),
+                to_features(opponent_shots)])
+                for team_shots, opponent_shots in pairs],
+            lambda target: target, outcome_filename)
+
+        view = league.team_view(team_id)
+        assert (view.data == team.data).all()
+        assert (view.target == team.target).all()
+
+def test_team_view_needs_a_single_opponent(stub, client, tmp_path):
+    shots, winners = league_shots(stub, client)
+    game_id, home, visiting, _ = schedule(6)[0]
+    other_id = next(team_id for team_id in set(shots.TEAM_ID)
+        if team_id not in (home, visiting))
+    third_team = shots[shots.GAME_ID == game_id].iloc[:1].copy()
+    third_team['TEAM_ID'] = other_id
+    shots = pd.concat([shots, third_team], ignore_index = True)
+
+    index = OutcomeIndex(str(tmp_path / 'outcomes.json'))
+    for winner_game_id, team_id in winners.items():
+        index.add_winner(winner_game_id, team_id)
+    index.save()
+
+    league = LeaguePreprocessor(shots, grid_featurizer(), index.filename)
+    with pytest.raises(ValueError):
+        league.team_view(home)
+
+def mask_split(shots, game_id, team_id):
+    """Splits a game's shots with boolean masks, as TeamPreprocessor did
+    before it grouped shots once."""
+
+    game_shots = shots[shots.GAME_ID == game_id]
+    return (game_shots[game_shots.TEAM_ID == team_id],
+        game_shots[game_shots.TEAM_ID != team_id])
+
+def test_shot_groups_match_masks(stub, client):
+    shots, _ = league_shots(stub, client)
+    groups = ShotGroups(shots)
+    indexed = ShotGroups(shots.set_index(['GAME_ID', 'TEAM_ID']))
+
+    assert groups.teams() == sorted(set(shots.TEAM_ID))
+    for team_id in groups.teams():
+        game_ids = sorted(set(shots.GAME_ID[shots.TEAM_ID == team_id]))
+        assert groups.games(team_id) == indexed.games(team_id) == game_ids
+        for game_id in game_ids:
+            expected = mask_split(shots, game_id, team_id)
+            for split in (groups.split(game_id, team_id),
+                indexed.split(game_id, team_id)
+            ):
+                for frame, expected_frame in zip(split, expected):
+                    assert list(frame.LOC_X) == list(expected_frame.LOC_X)
+                    assert list(frame.LOC_Y) == list(expected_frame.LOC_Y)
+    assert len(groups.rows(0, groups.teams()[0])) == 0
+
+def test_team_preprocessors_share_shot_groups(stub, client, tmp_path):
+    shots, winners = league_shots(stub, client)
+    groups = ShotGroups(shots)
+    team_id = groups.teams()[0]
+    outcome_filename = str(tmp_path / 'outcomes.json')
+    with open(outcome_filename, 'w') as out:
+        json.dump({game_id: winner == team_id
+            for game_id, winner in winners.items()}, out)
+
+    def to_counts(pairs):
+        return [np.array([len(team_shots), len(opponent_shots)])
+            for team_shots, opponent_shots in pairs]
+
+    shared = TeamPreprocessor(groups, team_id, to_counts, lambda target: target,
+        outcome_filename)
+    own = TeamPreprocessor(shots, team_id, to_counts, lambda target: target,
+        outcome_filename)
+
+    assert shared.raw_data is shots
+    assert (shared.data == own.data).all()
+    assert (shared.target == own.target).all()
+    expected = [[len(frame) for frame in mask_split(shots, game_id, team_id)]
+        for game_id in groups.games(team_id)]
+    assert shared.data.tolist() == expected
+
+# The featurization of the game outcome models before it was vectorized
+def loop_shots_to_matrix(shots, width, length, width_shift, length_shift):
+    shot_matrix = np.full((length, width), 0)
+    for _, shot in shots.iterrows():
+        x, y = shot.LOC_X + width_shift, shot.LOC_Y + length_shift
+        if 0 <= x < width and 0 <= y < length:
+            shot_matrix[y, x] += 1
+    return shot_matrix
+
+def loop_sum_matrix_by_grids(matrix, w, l):
+    if l == 1 and w == 1:
+        return matrix
+
+    length, width = matrix.shape
+    length_chunks, width_chunks = ceil(length / l), ceil(width / w)
+    length_pad = (length_chunks * l - length) // 2
+    width_pad = (width_chunks * w - width) // 2
+    corrected_mat = np.full((length_chunks * l, width_chunks * w), 0)
+    corrected_mat[length_pad: length_pad + length,
+        width_pad: width_pad + width] = matrix
+
+    grids = np.split(corrected_mat, length_chunks, axis = 0)
+    grids = [np.split(h_slice, width_chunks, axis = 1) for h_slice in grids]
+    return np.array([[np.sum(chunk) for chunk in chunks] for chunks in grids])
+
+def loop_shots_to_features(shots, grid_width, grid_length):
+    matrix = loop_shots_to_matrix(shots, WIDTH, LENGTH, WIDTH_SHIFT, LENGTH_SHIFT)
+    return loop_sum_matrix_by_grids(matrix, grid_width, grid_length).ravel()
+
+GRIDS = [(25, 25), (10, 10), (7, 13), (1, 1), (30, 40), (500, 375)]
+
+@pytest.fixture(scope = 'module')
+def edge_shots():
+    """Shots of two games and teams, with shots on and just off every edge of
+    the court."""
+
+    rand = np.random.RandomState(0)
+    x_edges = [-WIDTH_SHIFT - 1, -WIDTH_SHIFT, WIDTH - WIDTH_SHIFT - 1,
+        WIDTH - WIDTH_SHIFT]
+    y_edges = [-LENGTH_SHIFT - 1, -LENGTH_SHIFT, LENGTH - LENGTH_SHIFT - 1,
+        LENGTH - LENGTH_SHIFT]
+    loc_x = list(rand.randint(-WIDTH_SHIFT, WIDTH - WIDTH_SHIFT, 200))
+    loc_y = list(rand.randint(-LENGTH_SHIFT, LENGTH - LENGTH_SHIFT, 200))
+    for x in x_edges:
+        for y in y_edges + [0]:
+            loc_x.append(x)
+            loc_y.append(y)
+    for y in y_edges:
+        loc_x.append(0)
+        loc_y.append(y)
+
+    return pd.DataFrame({'GAME_ID': [21500001 + i % 2 for i in range(len(loc_x))],
+        'TEAM_ID': [1610612737 + i % 3 % 2 for i in range(len(loc_x))],
+        'LOC_X': loc_x, 'LOC_Y': loc_y})
+
+def test_matrix_matches_loop(edge_shots):
+    to_matrix = shots_to_matrix_wrapper(WIDTH, LENGTH, WIDTH_SHIFT, LENGTH_SHIFT)
+    matrix = to_matrix(edge_shots)
+
+    expected = loop_shots_to_matrix(edge_shots, WIDTH, LENGTH, WIDTH_SHIFT,
+        LENGTH_SHIFT)
+    assert (matrix == expected).all()
+    for grid_width, grid_length in GRIDS:
+        assert (sum_matrix_by_grids_wrapper(grid_width, grid_length)(matrix)
+            == loop_sum_matrix_by_grids(expected, grid_width, grid_length)).all()
+
+@pytest.mark.parametrize('sparse', [False, True])
+@pytest.mark.parametrize('grid', GRIDS)
+def test_features_match_loop(edge_shots, grid, sparse):
+    expected = loop_shots_to_features(edge_shots, *grid)
+    to_features = shots_to_features_wrapper(WIDTH, LENGTH, WIDTH_SHIFT,
+        LENGTH_SHIFT, *grid, sparse = sparse)
+    features = to_features(edge_shots)
+    if sparse:
+        assert features.shape == (1, len(expected))
+        features = features.toarray().ravel()
+    assert (features == expected).all()
+
+    keys, features = shots_to_grid_features_wrapper(WIDTH, LENGTH, WIDTH_SHIFT,
+        LENGTH_SHIFT, *grid, sparse = sparse)(edge_shots)
+    if sparse:
+        assert features.format == 'csr'
+        features = features.toarray()
+    assert len(keys) == 4
+    for row, (game_id, team_id) in enumerate(keys):
+        team_shots = edge_shots[(edge_shots.GAME_ID == game_id)
+            & (edge_shots.TEAM_ID == team_id)]
+        assert (features[row] == loop_shots_to_features(team_shots, *grid)).all()
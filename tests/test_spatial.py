@@ -0,0 +1,74 @@
+import datetime
+import numpy as np
+import pytest
+from benchmarks.fixtures import shot_log_payload
+from nbastats.columnar import SHOT_LOG_DTYPES, result_set_to_frame
+from nbastats.spatial import ShotIndex
+
+@pytest.fixture(scope = 'module')
+def shots():
+    result_set = shot_log_payload(rows = 5000, games = 40)['resultSets'][0]
+    shots = result_set_to_frame(result_set['headers'], result_set['rowSet'],
+        SHOT_LOG_DTYPES)
+    # Shots beyond the half court are kept in its edge cells
+    shots.loc[:10, 'LOC_Y'] = 700
+    shots.loc[10:20, 'LOC_X'] = -300
+    return shots
+
+@pytest.fixture(scope = 'module', params = [1, 10, 37])
+def index(request, shots):
+    return ShotIndex(shots, cell_size = request.param)
+
+def brute_force(shots, x_min, x_max, y_min, y_max):
+    return shots[(shots.LOC_X >= x_min) & (shots.LOC_X <= x_max)
+        & (shots.LOC_Y >= y_min) & (shots.LOC_Y <= y_max)]
+
+def assert_same_rows(found, expected):
+    assert list(found.index) == list(expected.index)
+
+RECTANGLES = [(-250, 250, -50, 425), (-20, 20, -10, 40), (0, 0, 0, 0),
+    (-400, 400, -100, 1000), (100.5, 180.2, 33.3, 99.9), (10, 0, 0, 10),
+    (240, 260, 300, 800)]
+
+@pytest.mark.parametrize('bounds', RECTANGLES)
+def test_rectangle(index, shots, bounds):
+    assert_same_rows(index.rectangle(*bounds), brute_force(shots, *bounds))
+
+def test_random_rectangles(index, shots):
+    rand = np.random.RandomState(0)
+    for _ in range(50):
+        x_min, x_max = sorted(rand.uniform(-300, 300, 2))
+        y_min, y_max = sorted(rand.uniform(-80, 500, 2))
+        assert_same_rows(index.rectangle(x_min, x_max, y_min, y_max),
+            brute_force(shots, x_min, x_max, y_min, y_max))
+
+@pytest.mark.parametrize('x, y, radius', [(0, 0, 80), (0, 0, 0), (-200, 300, 150),
+    (0, 700, 1)])
+def test_radius(index, shots, x, y, radius):
+    # LOC_X and LOC_Y are int16, squares of court distances overflow them
+    distances = ((shots.LOC_X.astype(np.int64) - x) ** 2
+        + (shots.LOC_Y.astype(np.int64) - y) ** 2)
+    assert_same_rows(index.radius(x, y, radius), shots[distances <= radius ** 2])
+
+def test_filters(index, shots):
+    player_id = int(shots.PLAYER_ID.iloc[0])
+    team_ids = sorted(set(shots.TEAM_ID))[:3]
+    bounds = (-100, 100, -50, 200)
+    in_bounds = brute_force(shots, *bounds)
+    dates = in_bounds.GAME_DATE.astype(str)
+
+    assert_same_rows(index.rectangle(*bounds, player_ids = player_id),
+        in_bounds[in_bounds.PLAYER_ID == player_id])
+    assert_same_rows(index.rectangle(*bounds, team_ids = team_ids),
+        in_bounds[in_bounds.TEAM_ID.isin(team_ids)])
+    assert_same_rows(index.rectangle(*bounds, date_from = '20151005',
+        date_to = datetime.date(2015, 10, 20)),
+        in_bounds[(dates >= '20151005') & (dates <= '20151020')])
+
+def test_zone(index, shots):
+    expected = shots[(shots.SHOT_ZONE_BASIC == 'Mid-Range')
+        & (shots.SHOT_ZONE_AREA == 'Left Side(L)')]
+
+    assert_same_rows(index.zone(zone_basic = 'Mid-Range',
+        zone_area = 'Left Side(L)'), expected)
+    assert index.zone(zone_basic = 'Backcourt').empty
@@ -0,0 +1,128 @@
+import pandas as pd
+import pytest
+from pandas.api.types import is_numeric_dtype
+from benchmarks.fixtures import shot_log_payload
+import nbastats.store
+from nbastats.options import Season, SeasonType
+from nbastats.store import ShotStore, convert_csv, player_chunk_name
+
+SEASON = Season(2015)
+SEASON_TYPE = SeasonType.REGULAR_SEASON
+
+@pytest.fixture
+def shots():
+    result_set = shot_log_payload(rows = 300, games = 10)['resultSets'][0]
+    return pd.DataFrame(result_set['rowSet'], columns = result_set['headers'])
+
+def assert_same_shots(stored, shots):
+    """Compares shots by value, as the store narrows dtypes and reads ids
+    such as GAME_ID as integers."""
+
+    assert list(stored.columns) == list(shots.columns)
+    assert len(stored) == len(shots)
+    for column in shots.columns:
+        expected = shots[column]
+        if is_numeric_dtype(stored[column].dtype):
+            expected = pd.to_numeric(expected)
+        assert list(stored[column].astype(str)) == list(expected.astype(str)), column
+
+def test_round_trip(tmp_path, shots):
+    store = ShotStore(str(tmp_path))
+    store.append(shots, SEASON, SEASON_TYPE, 'chunk')
+
+    assert_same_shots(store.read_chunk(SEASON, SEASON_TYPE, 'chunk'), shots)
+    assert_same_shots(store.read_chunk(SEASON, SEASON_TYPE, 'chunk', mmap = False),
+        shots)
+    assert store.read_chunk(SEASON, SEASON_TYPE, 'chunk').LOC_X.dtype == 'int16'
+    assert store.read_chunk(SEASON, SEASON_TYPE, 'chunk').SHOT_TYPE.dtype == 'category'
+
+def test_round_trip_of_dictionaries(tmp_path, shots):
+    store = ShotStore(str(tmp_path))
+    store.append(shots.to_dict('records'), SEASON, SEASON_TYPE, 'chunk')
+
+    assert_same_shots(store.read_chunk(SEASON, SEASON_TYPE, 'chunk'), shots)
+
+def test_reads_columns_across_chunks(tmp_path, shots):
+    store = ShotStore(str(tmp_path))
+    store.append(shots[:100], SEASON, SEASON_TYPE, 'a')
+    store.append(shots[100:], SEASON, SEASON_TYPE, 'b')
+    store.append(shots[:10], Season(2016), SEASON_TYPE, 'a')
+
+    columns = ['GAME_ID', 'LOC_X', 'SHOT_ZONE_BASIC']
+    assert_same_shots(store.read(columns, [SEASON]), shots[columns])
+    assert len(store.read(['GAME_ID'])) == len(shots) + 10
+    assert store.chunks([SEASON]) == [(str(SEASON), SEASON_TYPE, 'a'),
+        (str(SEASON), SEASON_TYPE, 'b')]
+    with pytest.raises(ValueError):
+        store.read_chunk(SEASON, SEASON_TYPE, 'a', ['NOT_A_COLUMN'])
+
+def test_extend_keeps_row_positions(tmp_path, shots):
+    store = ShotStore(str(tmp_path))
+    store.extend(shots[:100], SEASON, SEASON_TYPE, 'chunk')
+    store.extend(shots[100:], SEASON, SEASON_TYPE, 'chunk')
+
+    assert_same_shots(store.read_chunk(SEASON, SEASON_TYPE, 'chunk'), shots)
+
+def test_append_replaces_and_remove_deletes(tmp_path, shots):
+    store = ShotStore(str(tmp_path))
+    store.append(shots, SEASON, SEASON_TYPE, 'chunk')
+    store.append(shots[:5], SEASON, SEASON_TYPE, 'chunk')
+
+    assert len(store.read_chunk(SEASON, SEASON_TYPE, 'chunk')) == 5
+    store.remove_chunk(SEASON, SEASON_TYPE, 'chunk')
+    assert not store.has_chunk(SEASON, SEASON_TYPE, 'chunk')
+    assert store.chunks() == []
+
+def test_unfinished_chunks_are_ignored(tmp_path, shots):
+    store = ShotStore(str(tmp_path))
+    store.append(shots, SEASON, SEASON_TYPE, 'chunk')
+    (tmp_path / str(SEASON) / SEASON_TYPE / 'partial.tmp').mkdir()
+    (tmp_path / str(SEASON) / SEASON_TYPE / 'partial').mkdir()
+
+    assert store.chunks() == [(str(SEASON), SEASON_TYPE, 'chunk')]
+
+def test_convert_csv(tmp_path, shots):
+    csv_filename = str(tmp_path / 'shots.csv')
+    shots.to_csv(csv_filename)
+    store = ShotStore(str(tmp_path / 'store'))
+    convert_csv(csv_filename, store, SEASON, SEASON_TYPE)
+
+    player_ids = sorted(set(shots.PLAYER_ID))
+    assert [name for _, _, name in store.chunks()] == sorted(
+        player_chunk_name(player_id) for player_id in player_ids)
+    stored = store.read().sort_values(['PLAYER_ID', 'GAME_ID', 'GAME_EVENT_ID'])
+    expected = shots.sort_values(['PLAYER_ID', 'GAME_ID', 'GAME_EVENT_ID'])
+    assert_same_shots(stored, expected)
+
+def test_extend_writes_segments(tmp_path, shots, monkeypatch):
+    monkeypatch.setattr(nbastats.store, 'MAX_SEGMENTS', 4)
+    store = ShotStore(str(tmp_path))
+    chunk_dir = tmp_path / str(SEASON) / SEASON_TYPE / 'chunk'
+    store.extend(shots[:100], SEASON, SEASON_TYPE, 'chunk')
+    first = (chunk_dir / 'LOC_X.npy').stat().st_mtime_ns
+
+    # Every extend adds files of its own, and the chunk reads the same
+    for start in range(100, 250, 50):
+        store.extend(shots[start: start + 50], SEASON, SEASON_TYPE, 'chunk')
+        assert_same_shots(store.read_chunk(SEASON, SEASON_TYPE, 'chunk'),
+            shots[:start + 50])
+    assert (chunk_dir / 'LOC_X.npy').stat().st_mtime_ns == first
+    assert sorted(path.name for path in chunk_dir.glob('LOC_X*')) == \
+        ['LOC_X.1.npy', 'LOC_X.2.npy', 'LOC_X.3.npy', 'LOC_X.npy']
+
+    # Until the chunk is rewritten as a single segment
+    store.extend(shots[250:], SEASON, SEASON_TYPE, 'chunk')
+    assert [path.name for path in chunk_dir.glob('LOC_X*')] == ['LOC_X.npy']
+    assert_same_shots(store.read_chunk(SEASON, SEASON_TYPE, 'chunk'), shots)
+
+def test_missing_integers_are_stored_as_floats(tmp_path, shots):
+    shots = shots.astype({'SHOT_MADE_FLAG': float, 'GAME_ID': float})
+    shots.loc[3, ['SHOT_MADE_FLAG', 'GAME_ID']] = None
+    store = ShotStore(str(tmp_path))
+    store.append(shots, SEASON, SEASON_TYPE, 'chunk')
+
+    stored = store.read_chunk(SEASON, SEASON_TYPE, 'chunk')
+    assert stored.SHOT_MADE_FLAG.dtype == 'float32'
+    assert stored.GAME_ID.dtype == 'float64'
+    assert stored.SHOT_MADE_FLAG.isna().sum() == 1
+    assert list(stored.GAME_ID.dropna()) == list(shots.GAME_ID.dropna())
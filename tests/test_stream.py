@@ -0,0 +1,77 @@
+import json
+import pytest
+from benchmarks.fixtures import encode, shot_log_payload
+from nbastats.stream import iter_result_sets
+
+def chunked(body, size):
+    return [body[start: start + size] for start in range(0, len(body), size)]
+
+def expected_rows(body):
+    return [(result_set['name'], result_set['headers'], row)
+        for result_set in json.loads(body)['resultSets']
+        for row in result_set['rowSet']]
+
+# Multibyte characters, escapes, long numbers and whitespace between tokens
+SMALL_BODY = json.dumps({
+    'resource': 'test',
+    'resultSets': [
+        {'name': 'First', 'headers': ['NAME', 'VALUE'],
+            'rowSet': [['Luka Dončić', 123456789.125], ['"quoted" \\ name', -0.5],
+                ['ÆØÅ 日本', 1e-7]]},
+        {'name': 'Empty', 'headers': ['A'], 'rowSet': []},
+        {'rowSet': [[1, None], [2, True]], 'headers': ['ID', 'FLAG'],
+            'name': 'Headers Last'}
+    ]
+}, indent = 1, ensure_ascii = False).encode('utf-8')
+
+@pytest.mark.parametrize('size', range(1, 40))
+def test_every_chunk_boundary(size):
+    assert list(iter_result_sets(chunked(SMALL_BODY, size))) == \
+        expected_rows(SMALL_BODY)
+
+def test_large_response_in_network_sized_chunks():
+    body = encode(shot_log_payload(rows = 2000, games = 20))
+
+    for size in (1000, 1 << 16):
+        assert list(iter_result_sets(chunked(body, size))) == expected_rows(body)
+
+def test_headers_are_shared_by_the_rows_of_a_set():
+    rows = list(iter_result_sets([SMALL_BODY]))
+
+    assert rows[0][1] is rows[1][1]
+
+def test_error_responses_raise():
+    with pytest.raises(ValueError, match = 'API error - Invalid query'):
+        list(iter_result_sets(chunked(b'Invalid query', 3)))
+
+@pytest.mark.parametrize('end', [len(SMALL_BODY) // 2, len(SMALL_BODY) - 3])
+def test_truncated_responses_raise(end):
+    with pytest.raises(ValueError):
+        list(iter_result_sets(chunked(SMALL_BODY[:end], 7)))
+
+# Literals and escapes that are cut off by chunk boundaries
+ESCAPED_BODY = json.dumps({'resultSets': [{'name': 'Literals',
+    'headers': ['A', 'B', 'C'], 'rowSet': [[True, False, None],
+        [float('inf'), -float('inf'), 'Dončić 日\n\t"\\'], [-1.5e-10, 0, '']]}]},
+    ensure_ascii = True).encode('ascii')
+
+@pytest.mark.parametrize('size', range(1, 12))
+def test_literals_and_escapes_at_every_chunk_boundary(size):
+    assert list(iter_result_sets(chunked(ESCAPED_BODY, size))) == \
+        expected_rows(ESCAPED_BODY)
+
+def test_malformed_values_raise_without_reading_on():
+    rows = [[i, i * 2] for i in range(1000)]
+    body = json.dumps({'resultSets': [{'name': 'Rows', 'headers': ['A', 'B'],
+        'rowSet': rows}]}).replace('[3, 6]', '[3 6]').encode('utf-8')
+    chunks = chunked(body, 64)
+    read = list()
+
+    def stream():
+        for chunk in chunks:
+            read.append(chunk)
+            yield chunk
+
+    with pytest.raises(ValueError, match = 'API error'):
+        list(iter_result_sets(stream()))
+    assert len(read) <= 3 < len(chunks)
@@ -0,0 +1,129 @@
+from datetime import datetime
+from benchmarks.fixtures import encode, game_info_payload, schedule, shot_log_payload
+from nbastats.game import OutcomeIndex
+from nbastats.options import Season, SeasonType
+from nbastats.store import ShotStore, player_chunk_name
+from nbastats.update import update_season
+
+SEASON = Season(2015)
+SEASON_TYPE = SeasonType.REGULAR_SEASON
+GAMES = 4
+
+def serve_season(stub, failed_game_ids = ()):
+    """Serves the shots of a synthetic season and the outcomes of its games
+    but failed_game_ids."""
+
+    games = {f'{game[0]:010d}': game for game in schedule(GAMES)}
+
+    def game_info(params):
+        game = games[params['GameID']]
+        if game[0] in failed_game_ids:
+            return 500, b''
+        return encode(game_info_payload(*game))
+
+    stub.payloads['shotchartdetail'] = encode(shot_log_payload(rows = 40,
+        games = GAMES))
+    stub.payloads['boxscoresummaryv2'] = game_info
+    return sorted(game[0] for game in games.values())
+
+def test_outcomes_are_refreshed(stub, client, tmp_path):
+    game_ids = serve_season(stub)
+
+    index = OutcomeIndex()
+    result = update_season(ShotStore(str(tmp_path / 'shots')), SEASON,
+        SEASON_TYPE, [201939], outcome_index = index, client = client)
+
+    assert result.game_ids == game_ids
+    assert result.outcome_error is None
+    assert all(game_id in index for game_id in game_ids)
+
+def test_outcome_failures_are_reported(stub, client, tmp_path):
+    game_ids = serve_season(stub)
+    serve_season(stub, failed_game_ids = game_ids[:1])
+
+    store = ShotStore(str(tmp_path / 'shots'))
+    index = OutcomeIndex()
+    result = update_season(store, SEASON, SEASON_TYPE, [201939],
+        outcome_index = index, client = client)
+
+    # The shots are stored and reported even though an outcome failed
+    assert result.new_shots == {201939: 40}
+    assert result.game_ids == game_ids
+    assert not result.errors
+    assert isinstance(result.outcome_error, ValueError)
+    assert len(store.read_chunk(SEASON, SEASON_TYPE, player_chunk_name(201939))) == 40
+    assert [game_id in index for game_id in game_ids] == [False, True, True, True]
+
+def serve_played_shots(stub, played, requests):
+    """Serves the shots of the games in the played list, from the DateFrom
+    query on if there's one, and records the queries of every request."""
+
+    payload = shot_log_payload(rows = 240, games = 24)
+
+    def shot_log(params):
+        requests.append(params)
+        date_from = params.get('DateFrom')
+        date_from = date_from and datetime.strptime(date_from,
+            '%m/%d/%Y').strftime('%Y%m%d')
+        shots, averages = [dict(result_set) for result_set in payload['resultSets']]
+        shots['rowSet'] = [row for row in shots['rowSet']
+            if int(row[1]) in played and (not date_from or row[21] >= date_from)]
+        return encode(dict(payload, resultSets = [shots, averages]))
+
+    stub.payloads['shotchartdetail'] = shot_log
+    # 8 games a day, so 3 days of games
+    return [game[0] for game in schedule(24)]
+
+def stored_events(store, player_id):
+    stored = store.read_chunk(SEASON, SEASON_TYPE, player_chunk_name(player_id))
+    return list(zip(stored.GAME_ID.astype(int), stored.GAME_EVENT_ID.astype(int)))
+
+def test_second_update_adds_nothing(stub, client, tmp_path):
+    played = set()
+    requests = list()
+    game_ids = serve_played_shots(stub, played, requests)
+    played.update(game_ids)
+    player_id = 1610612737 * 10
+
+    store = ShotStore(str(tmp_path / 'shots'))
+    first = update_season(store, SEASON, SEASON_TYPE, [player_id], client = client)
+    events = stored_events(store, player_id)
+    second = update_season(store, SEASON, SEASON_TYPE, [player_id], client = client)
+
+    assert first.new_shots[player_id] == len(events) > 0
+    assert second.new_shots == {player_id: 0}
+    assert second.game_ids == []
+    assert stored_events(store, player_id) == events
+
+    # Only the shots of the latest day are requested again
+    assert 'DateFrom' not in requests[0]
+    assert requests[1]['DateFrom'] == '10/03/2015'
+
+def test_only_new_games_are_appended(stub, client, tmp_path):
+    played = set()
+    requests = list()
+    game_ids = serve_played_shots(stub, played, requests)
+    player_ids = sorted(set(row[3] for row in
+        shot_log_payload(rows = 240, games = 24)['resultSets'][0]['rowSet']))[:4]
+
+    store = ShotStore(str(tmp_path / 'shots'))
+    played.update(game_ids[:8])
+    update_season(store, SEASON, SEASON_TYPE, player_ids, client = client)
+    before = {player_id: stored_events(store, player_id) for player_id in player_ids
+        if store.has_chunk(SEASON, SEASON_TYPE, player_chunk_name(player_id))}
+
+    played.update(game_ids[8:16])
+    result = update_season(store, SEASON, SEASON_TYPE, player_ids, client = client)
+
+    assert result.game_ids and set(result.game_ids) <= set(game_ids[8:16])
+    for player_id in player_ids:
+        if not store.has_chunk(SEASON, SEASON_TYPE, player_chunk_name(player_id)):
+            continue
+        events = stored_events(store, player_id)
+        # The stored shots keep their positions and new shots are appended once
+        assert events[:len(before.get(player_id, []))] == before.get(player_id, [])
+        assert len(set(events)) == len(events)
+        assert len(events) - len(before.get(player_id, [])) == \
+            result.new_shots[player_id]
+        assert all(game_id in game_ids[:16] for game_id, _ in events)
+    assert sum(result.new_shots.values()) > 0